@@ -0,0 +1,33 @@
+"""
+web_app testleri için ortak fixture'lar.
+
+app_flask modülü oturum başına bir kez import edilir. Veritabanı ve veri
+dizini her zaman geçici bir dizine yönlendirilir: geliştiricinin ortamındaki
+DATABASE_URL kullanılmaz, repodaki data/ dizinine (snapshot, secret key,
+metrik dosyaları) bir şey yazılmaz.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+WEB_APP_DIR = REPO_DIR / 'web_app'
+PATTERNS_FILE = REPO_DIR / 'data' / 'control_list_1000.csv'
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    pytest.importorskip('flask')
+    pytest.importorskip('sqlalchemy')
+    data_dir = tmp_path_factory.mktemp('web_app_data')
+    os.environ['DATABASE_URL'] = f"sqlite:///{data_dir / 'test_reviews.db'}"
+    os.environ['DATA_DIR'] = str(data_dir)
+    os.environ['PATTERNS_FILE'] = str(PATTERNS_FILE)
+    os.environ['REVIEW_SYNC_SECONDS'] = '0'  # Arka plan senkronizasyon thread'i gerekmiyor
+    os.environ['WARMUP_MODE'] = 'sync'  # Kuyruklar import sırasında hazır olsun
+    os.environ['N_PLUS_ONE_WARNINGS'] = '1'  # Tekrarlanan sorgular NPlusOneWarning olarak yakalanabilsin
+    sys.path.insert(0, str(WEB_APP_DIR))
+    import app_flask
+    return app_flask
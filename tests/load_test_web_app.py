@@ -0,0 +1,315 @@
+"""
+web_app için çevrimdışı yük testi
+
+Sentetik bir kontrol listesi (--rows) ve geçici bir SQLite veritabanı (ya da
+--database-url ile yerel bir PostgreSQL) ile uygulamayı ayrı bir process'te
+başlatır. --reviewers kadar kullanıcı current → approve/reject/next döngüsünü
+çalıştırır; route bazında throughput ve p50/p95/p99 gecikmeleri JSON olarak
+yazılır. Böylece commit'ler arasında karşılaştırılabilir.
+
+Çalıştırma:
+    python tests/load_test_web_app.py --rows 50000 --reviewers 16 --duration 30 --output load.json
+    python tests/load_test_web_app.py --rows 500000 --server flask --baseline load.json
+    python tests/load_test_web_app.py --compare eski.json yeni.json
+
+--database-url ile verilen veritabanı boş/atılabilir olmalı: kararlar oraya yazılır.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+WEB_APP_DIR = Path(__file__).resolve().parent.parent / 'web_app'
+PATTERNS = ['Geometric', 'Floral', 'Tribal', 'Abstract', 'Solid', 'Striped', 'Medallion', 'Damask', 'Moroccan', 'Error']
+# Döngüdeki aksiyon ağırlıkları (approve, reject, next)
+ACTION_WEIGHTS = {'approve': 6, 'reject': 3, 'next': 1}
+
+
+def write_control_list(path, rows):
+    """Gerçek kontrol listesiyle aynı kolonlarda sentetik CSV oluştur"""
+    rng = random.Random(rows)
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Variant SKU', 'Product SKU', 'Original Patterns', 'AI Detected Pattern', 'Design Image URL'])
+        for i in range(rows):
+            product_sku = f"LT{i // 4:07d}"
+            writer.writerow([
+                f"{product_sku}-{i % 4:03d}",
+                product_sku,
+                '',
+                rng.choice(PATTERNS),
+                f"https://example.invalid/{product_sku}/{product_sku}-{i % 4:03d}_prm_1.jpg",
+            ])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, work_dir, port):
+    """Uygulamayı ayrı process'te başlat, /ready 200 dönene kadar bekle"""
+    data_dir = work_dir / 'data'
+    data_dir.mkdir()
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': args.database_url or f"sqlite:///{work_dir / 'load_test.db'}",
+        'DATA_DIR': str(data_dir),
+        'PATTERNS_FILE': str(work_dir / 'control_list.csv'),
+        'PORT': str(port),
+        'SECRET_KEY': 'load-test',
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'LOG_LEVEL': 'WARNING',
+        'PATTERNS_WATCH_SECONDS': '0',
+    })
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app_flask:app']
+    else:
+        command = [sys.executable, 'app_flask.py']
+    log_file = open(work_dir / 'server.log', 'w')
+    process = subprocess.Popen(command, cwd=WEB_APP_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+    started = time.perf_counter()
+    deadline = started + args.startup_timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Sunucu başlamadan kapandı, log: {work_dir / 'server.log'}")
+        try:
+            response = requests.get(f"http://127.0.0.1:{port}/ready", timeout=2)
+            if response.status_code == 200:
+                return process, round(time.perf_counter() - started, 3), response.json()
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Sunucu {args.startup_timeout} sn içinde hazır olmadı")
+
+
+def stop_server(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def db_queries(response):
+    """Server-Timing başlığından sorgu sayısını oku (yoksa None)"""
+    header = response.headers.get('Server-Timing', '')
+    if 'desc="' not in header:
+        return None
+    try:
+        return int(header.split('desc="')[1].split()[0])
+    except ValueError:
+        return None
+
+
+class Reviewer(threading.Thread):
+    """Tek kullanıcı: current → approve/reject/next döngüsü, her isteğin gecikmesini kaydeder"""
+
+    def __init__(self, index, base_url, deadline, think_seconds, seed):
+        super().__init__(name=f'reviewer-{index}', daemon=True)
+        self.email = f"loadtest{index}@boutiquerugs.com"
+        self.base_url = base_url
+        self.deadline = deadline
+        self.think_seconds = think_seconds
+        self.rng = random.Random(seed)
+        self.samples = []  # (route, saniye, status, sorgu sayısı)
+        self.decisions = 0
+        self.exhausted = False
+
+    def call(self, http, method, route, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = http.request(method, self.base_url + route, timeout=30, **kwargs)
+        except requests.RequestException:
+            self.samples.append((f"{method} {route}", time.perf_counter() - started, 'error', None))
+            return None
+        self.samples.append((f"{method} {route}", time.perf_counter() - started, response.status_code, db_queries(response)))
+        return response
+
+    def run(self):
+        http = requests.Session()
+        http.post(self.base_url + '/login', data={'email': self.email}, allow_redirects=False)
+        actions, weights = zip(*ACTION_WEIGHTS.items())
+        while time.perf_counter() < self.deadline:
+            response = self.call(http, 'GET', '/api/current')
+            if response is None or response.status_code != 200:
+                time.sleep(0.1)
+                continue
+            current = response.json()
+            if not current.get('variant_sku'):
+                self.exhausted = True  # Kuyruk bitti
+                break
+            if self.think_seconds:
+                time.sleep(self.rng.uniform(0, 2 * self.think_seconds))
+            action = self.rng.choices(actions, weights)[0]
+            response = self.call(http, 'POST', f'/api/{action}', json={'variant_sku': current['variant_sku']})
+            if response is not None and response.status_code == 200 and action != 'next':
+                self.decisions += 1
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(reviewers, elapsed):
+    """Route bazında istek sayısı, hata, throughput ve gecikme yüzdelikleri"""
+    by_route = {}
+    for reviewer in reviewers:
+        for route, seconds, status, queries in reviewer.samples:
+            by_route.setdefault(route, []).append((seconds, status, queries))
+    routes = {}
+    for route, samples in sorted(by_route.items()):
+        latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+        errors = sum(1 for _, status, _ in samples if status == 'error' or status >= 500)
+        queries = [count for _, _, count in samples if count is not None]
+        routes[route] = {
+            'requests': len(samples),
+            'errors': errors,
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'max_ms': round(latencies[-1], 2),
+            'db_queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    return routes
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=WEB_APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(args):
+    work_dir = Path(tempfile.mkdtemp(prefix='review_load_'))
+    port = free_port()
+    print(f"Sentetik kontrol listesi oluşturuluyor ({args.rows:,} satır)...", file=sys.stderr)
+    write_control_list(work_dir / 'control_list.csv', args.rows)
+    print(f"Sunucu başlatılıyor ({args.server}, port {port})...", file=sys.stderr)
+    process, startup_seconds, ready = start_server(args, work_dir, port)
+    try:
+        print(f"Hazır ({startup_seconds} sn), {args.reviewers} kullanıcı {args.duration} sn çalışıyor...", file=sys.stderr)
+        base_url = f"http://127.0.0.1:{port}"
+        started = time.perf_counter()
+        deadline = started + args.duration
+        reviewers = [Reviewer(i, base_url, deadline, args.think_ms / 1000, args.seed + i) for i in range(args.reviewers)]
+        for reviewer in reviewers:
+            reviewer.start()
+        for reviewer in reviewers:
+            reviewer.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        stop_server(process)
+        if args.keep:
+            print(f"Çalışma dizini: {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    routes = summarize(reviewers, elapsed)
+    total_requests = sum(route['requests'] for route in routes.values())
+    decisions = sum(reviewer.decisions for reviewer in reviewers)
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'rows': args.rows,
+            'reviewers': args.reviewers,
+            'duration_seconds': args.duration,
+            'think_ms': args.think_ms,
+            'server': args.server,
+            'workers': args.workers if args.server == 'gunicorn' else 1,
+            'threads': args.threads if args.server == 'gunicorn' else None,
+            'database': 'postgresql' if args.database_url else 'sqlite',
+        },
+        'startup_seconds': startup_seconds,
+        'warmup_steps': ready.get('steps'),
+        'elapsed_seconds': round(elapsed, 3),
+        'total_requests': total_requests,
+        'throughput_rps': round(total_requests / elapsed, 2),
+        'decisions': decisions,
+        'decisions_per_second': round(decisions / elapsed, 2),
+        'queue_exhausted': any(reviewer.exhausted for reviewer in reviewers),
+        'routes': routes,
+    }
+
+
+def compare(baseline, current, max_regression):
+    """Route bazında p95 karşılaştırması; eşiği aşan gerilemeleri döndür"""
+    regressions = []
+    print(f"{'Route':<24}{'p95 önce':>12}{'p95 sonra':>12}{'değişim':>10}", file=sys.stderr)
+    for route, stats in current['routes'].items():
+        before = baseline['routes'].get(route)
+        if not before or not before['p95_ms']:
+            continue
+        change = (stats['p95_ms'] - before['p95_ms']) / before['p95_ms']
+        print(f"{route:<24}{before['p95_ms']:>12.2f}{stats['p95_ms']:>12.2f}{change:>+10.1%}", file=sys.stderr)
+        if change > max_regression:
+            regressions.append(route)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Review API çevrimdışı yük testi')
+    parser.add_argument('--rows', type=int, default=10000, help='Sentetik kontrol listesi satır sayısı (1k-500k)')
+    parser.add_argument('--reviewers', type=int, default=8, help='Eşzamanlı kullanıcı sayısı')
+    parser.add_argument('--duration', type=float, default=20, help='Test süresi (sn)')
+    parser.add_argument('--think-ms', type=float, default=0, help='Kararlar arası ortalama bekleme (ms)')
+    parser.add_argument('--server', choices=('gunicorn', 'flask'), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='Gunicorn worker sayısı')
+    parser.add_argument('--threads', type=int, default=4, help='Worker başına thread sayısı')
+    parser.add_argument('--database-url', help='Yerel PostgreSQL (boş/atılabilir); verilmezse geçici SQLite')
+    parser.add_argument('--startup-timeout', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Sonuç JSON dosyası (verilmezse stdout)')
+    parser.add_argument('--baseline', help='Karşılaştırılacak önceki sonuç JSON dosyası')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='İzin verilen p95 artışı (0.2 = %%20)')
+    parser.add_argument('--compare', nargs=2, metavar=('ONCEKI', 'SONRAKI'), help='Test çalıştırmadan iki sonucu karşılaştır')
+    parser.add_argument('--keep', action='store_true', help='Geçici çalışma dizinini (sunucu logu, veritabanı) silme')
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text()) for path in args.compare)
+        return 1 if compare(baseline, current, args.max_regression) else 0
+
+    result = run_load_test(args)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+    if args.baseline:
+        regressions = compare(json.loads(Path(args.baseline).read_text()), result, args.max_regression)
+        if regressions:
+            print(f"p95 gerilemesi: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
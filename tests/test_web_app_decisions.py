@@ -0,0 +1,61 @@
+"""
+web_app/app_flask.py karar endpoint'lerini doğrular.
+
+Karar kaydedilemezse istemci bunu görebilmeli (2xx dışı yanıt) ve SKU'nun
+kirası kullanıcıda kalmalı ki aynı karar tekrar gönderilebilsin. İstemcinin
+biriktirip /api/decisions'a gönderdiği toplu kararlar da burada kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_decisions.py -q
+"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+EMAIL = 'decisions@boutiquerugs.com'
+
+
+@pytest.fixture
+def client(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['email'] = EMAIL
+    return client
+
+
+def test_failed_save_returns_error_and_keeps_lease(app_module, client, monkeypatch):
+    current = client.get('/api/current').get_json()
+    assert 'variant_sku' in current, current
+
+    def failing_save(decisions, user_email):
+        raise RuntimeError('veritabanı yok')
+
+    monkeypatch.setattr(app_module, 'save_reviews', failing_save)
+    response = client.post('/api/approve', json={'variant_sku': current['variant_sku']})
+    assert response.status_code == 500
+    assert response.get_json()['error'] == app_module.DECISION_SAVE_ERROR
+    assert current['variant_sku'] in app_module.pending_queue
+    assert app_module.review_leases.holder(current['variant_sku']) == EMAIL
+
+
+def test_batched_decisions_are_saved(app_module, client):
+    items = client.get('/api/current?n=3').get_json()['items']
+    skus = [sku for item in items for sku in item['group_skus']]
+    response = client.post('/api/decisions', json={
+        'mode': 'review',
+        'decisions': [{'variant_sku': sku, 'status': 'Rejected'} for sku in skus],
+    })
+    assert response.get_json() == {'success': True, 'saved': len(skus), 'skipped': []}
+    assert not any(sku in app_module.pending_queue for sku in skus)
+    assert all(app_module.review_leases.holder(sku) is None for sku in skus)
+
+
+def test_invalid_batch_entries_are_skipped(app_module, client):
+    sku = client.get('/api/current').get_json()['variant_sku']
+    response = client.post('/api/decisions', json={
+        'mode': 'review',
+        'decisions': ['bozuk', {'variant_sku': 'YOK-1', 'status': 'Approved'}, {'variant_sku': sku, 'status': 'Approved'}],
+    })
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'saved': 1, 'skipped': [None, 'YOK-1']}
+    assert sku not in app_module.pending_queue
@@ -0,0 +1,82 @@
+"""
+web_app/app_flask.py gömülü SQLite deposunu doğrular.
+
+DATABASE_URL verilmediğinde DATA_DIR altında gömülü veritabanının
+oluşturulduğu, SQLite bağlantılarının WAL modunda açıldığı ve eski CSV fallback
+dosyalarındaki kararların veritabanına (SKU başına en son karar) bir kez
+aktarıldığı kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_embedded_store.py -q
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import select, text
+
+CSV_HEADER = 'Variant SKU,Product SKU,AI Detected Pattern,Design Image URL,Status,Reviewed By,Timestamp\n'
+
+
+def test_embedded_database_created_without_database_url(app_module, tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != 'DATABASE_URL'}
+    env.update(DATA_DIR=str(tmp_path), PATTERNS_FILE=str(tmp_path / 'missing.csv'),
+               WARMUP_MODE='sync', DEFER_BACKGROUND_WORKERS='1')
+    # Modül bu oturumda zaten import edildi; varsayılan davranış ayrı bir process'te denenir
+    result = subprocess.run(
+        [sys.executable, '-c', 'import sys, app_flask; sys.stderr.write(str(app_flask.EMBEDDED_DATABASE))'],
+        cwd=app_module.BASE_DIR / 'web_app', env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stderr.endswith('True')  # Loglar stdout'a gider
+
+    db_path = tmp_path / 'reviews.db'
+    assert db_path.exists()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'pattern_reviews'").fetchone()[0] == 1
+
+
+def test_sqlite_connections_use_wal(app_module):
+    with app_module.engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == app_module.SQLITE_BUSY_TIMEOUT_MS
+
+
+def test_legacy_csv_import_keeps_latest_decision(app_module, tmp_path, monkeypatch):
+    (tmp_path / 'approved_patterns.csv').write_text(
+        CSV_HEADER
+        + 'LEGACY-1,P1,Floral,u1,Approved,a@boutiquerugs.com,2025-01-01T10:00:00\n'
+        + 'LEGACY-2,P2,Solid,u2,Approved,a@boutiquerugs.com,2025-01-01T10:00:00\n',
+        encoding='utf-8-sig')
+    (tmp_path / 'rejected_patterns.csv').write_text(
+        CSV_HEADER + 'LEGACY-2,P2,Solid,u2,Rejected,b@boutiquerugs.com,2025-01-02T10:00:00\n',
+        encoding='utf-8-sig')
+    monkeypatch.setattr(app_module, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(app_module, 'EMBEDDED_DATABASE', True)
+
+    app_module._migration_import_legacy_csv(app_module.engine)
+
+    reviews = app_module.PatternReview.__table__
+    with app_module.engine.connect() as conn:
+        rows = dict(conn.execute(
+            select(reviews.c.variant_sku, reviews.c.status).where(reviews.c.variant_sku.like('LEGACY-%'))
+        ).all())
+    assert rows == {'LEGACY-1': 'Approved', 'LEGACY-2': 'Rejected'}
+
+
+def test_legacy_csv_import_skipped_for_external_database(app_module, tmp_path, monkeypatch):
+    (tmp_path / 'approved_patterns.csv').write_text(
+        CSV_HEADER + 'LEGACY-3,P3,Floral,u3,Approved,a@boutiquerugs.com,2025-01-01T10:00:00\n',
+        encoding='utf-8-sig')
+    monkeypatch.setattr(app_module, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(app_module, 'EMBEDDED_DATABASE', False)
+
+    app_module._migration_import_legacy_csv(app_module.engine)
+
+    with app_module.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM pattern_reviews WHERE variant_sku = 'LEGACY-3'")).scalar() == 0
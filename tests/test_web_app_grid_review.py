@@ -0,0 +1,96 @@
+"""
+web_app/app_flask.py grid (toplu) kontrol modunu doğrular.
+
+Grid sayfasının sadece seçilen AI pattern'ine sahip kayıtları kiraladığı,
+seçili kartların tek toplu kayıtla onaylandığı ve seçimi kaldırılan
+(outlier) kartların onaylanmadan kuyrukta kaldığı kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_grid_review.py -q
+"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import select
+
+IMAGE_BASE = 'https://brugs-image.s3.us-east-2.amazonaws.com/GRID'
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    patterns = ['Geometric', 'Floral'] * 10
+    items = [app_module.ReviewItem(f'GRID-{i:02d}', f'GRID{i:02d}', pattern, f'{IMAGE_BASE}/GRID-{i:02d}.jpg')
+             for i, pattern in enumerate(patterns)]
+    groups = app_module.ReviewGroups('image')
+    groups.rebuild(items)
+    queue = app_module.PendingQueue()
+    queue.rebuild(items)
+    monkeypatch.setattr(app_module, 'review_groups', groups)
+    monkeypatch.setattr(app_module, 'pending_queue', queue)
+    monkeypatch.setattr(app_module, 'review_leases', app_module.LeaseScheduler(queue, groups=groups))
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['email'] = 'grid@boutiquerugs.com'
+    return client
+
+
+def test_grid_page_shares_one_pattern(app_module, client):
+    page = client.get('/api/grid?pattern=Floral&n=6').get_json()
+    assert page['ai_pattern'] == 'Floral'
+    assert len(page['items']) == 6
+    assert {item['ai_pattern'] for item in page['items']} == {'Floral'}
+
+    # Pattern verilmezse kuyruktaki ilk kaydın pattern'i; önceki pattern'in kiraları bırakılır
+    page = client.get('/api/grid?n=6').get_json()
+    assert page['ai_pattern'] == 'Geometric'
+    assert app_module.review_leases.holder('GRID-01') is None
+
+    patterns = client.get('/api/grid/patterns').get_json()['patterns']
+    assert patterns == [{'ai_pattern': 'Geometric', 'remaining': 10}, {'ai_pattern': 'Floral', 'remaining': 10}]
+
+
+def test_grid_approves_selected_and_keeps_outliers(app_module, client):
+    page = client.get('/api/grid?pattern=Geometric&n=4').get_json()
+    skus = [item['variant_sku'] for item in page['items']]
+    response = client.post('/api/grid/approve', json={'variant_skus': skus[:3], 'outliers': skus[3:]})
+    assert response.get_json() == {'success': True, 'saved': 3, 'outliers': 1}
+    if app_module.decision_journal is not None:
+        app_module.decision_journal.flush()
+
+    reviews = app_module.PatternReview.__table__
+    with app_module.engine.connect() as conn:
+        rows = dict(conn.execute(
+            select(reviews.c.variant_sku, reviews.c.status).where(reviews.c.variant_sku.in_(skus))
+        ).all())
+    assert rows == {sku: 'Approved' for sku in skus[:3]}
+    assert skus[3] in app_module.pending_queue
+
+    # Outlier bu kullanıcının sonraki grid sayfasına gelmez
+    page = client.get('/api/grid?pattern=Geometric&n=4').get_json()
+    assert skus[3] not in [item['variant_sku'] for item in page['items']]
+
+
+def test_queue_pattern_index_follows_changes(app_module):
+    queue = app_module.PendingQueue()
+    queue.rebuild([app_module.ReviewItem(f'IDX-{i}', None, pattern, None)
+                   for i, pattern in enumerate(['Floral', 'Geometric', 'Floral'])])
+    queue.remove('IDX-0')
+    queue.replace(app_module.ReviewItem('IDX-1', None, 'Floral', None))
+    assert queue.pattern_skus('Floral') == ['IDX-2', 'IDX-1']
+    assert queue.pattern_counts() == {'Floral': 2}
+
+
+def test_grid_save_error_is_generic(app_module, client, monkeypatch):
+    page = client.get('/api/grid?pattern=Floral&n=2').get_json()
+    skus = [item['variant_sku'] for item in page['items']]
+
+    def failing_save(decisions, user_email):
+        raise RuntimeError('connection refused: db.internal:5432')
+
+    monkeypatch.setattr(app_module, 'save_reviews', failing_save)
+    response = client.post('/api/grid/approve', json={'variant_skus': skus, 'outliers': []})
+    assert response.status_code == 500
+    assert response.get_json() == {'error': app_module.DECISION_SAVE_ERROR}
+    assert all(app_module.review_leases.holder(sku) == 'grid@boutiquerugs.com' for sku in skus)
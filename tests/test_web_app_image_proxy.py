@@ -0,0 +1,79 @@
+"""
+web_app/app_flask.py görsel proxy'sini (/img/<variant_sku>) doğrular.
+
+Proxy'nin giriş istediği, kaynak görseli boyut sınırıyla indirdiği ve
+varyant/orijinal kilitleri aynı şeride düşse de kilitlenmediği kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_image_proxy.py -q
+"""
+import io
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+
+class FakeResponse:
+    def __init__(self, chunks, headers=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+
+class FakeRequests:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, timeout, stream):
+        return self.response
+
+
+def test_image_proxy_requires_login(app_module):
+    response = app_module.app.test_client().get('/img/237144-012')
+    assert response.status_code == 401
+
+
+def test_fetch_image_enforces_size_limit(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'IMAGE_MAX_SOURCE_BYTES', 10)
+    assert app_module.fetch_image(FakeRequests(FakeResponse([b'12345', b'67890'])), 'x') == b'1234567890'
+    with pytest.raises(ValueError):
+        app_module.fetch_image(FakeRequests(FakeResponse([b'12345', b'678901'])), 'x')
+    with pytest.raises(ValueError):
+        app_module.fetch_image(FakeRequests(FakeResponse([], {'Content-Length': '11'})), 'x')
+
+
+def test_variant_and_original_locks_do_not_collide(app_module, tmp_path, monkeypatch):
+    Image = pytest.importorskip('PIL.Image')
+    source = io.BytesIO()
+    Image.new('RGB', (1000, 800), 'red').save(source, 'JPEG')
+    item = app_module.ReviewItem('IMG-1', 'IMG', 'Floral', 'https://example.com/IMG-1.jpg')
+    monkeypatch.setattr(app_module, 'pattern_items', {'IMG-1': item})
+    monkeypatch.setattr(app_module, 'image_cache', app_module.ImageDiskCache(tmp_path / 'image_cache', 10 * 1024 * 1024))
+    monkeypatch.setattr(app_module, 'fetch_image', lambda requests, image_url: source.getvalue())
+    # Tek şeritli havuzlar: varyant ve orijinal anahtarları her zaman aynı şeride düşer
+    monkeypatch.setattr(app_module, '_image_variant_locks', [threading.Lock()])
+    monkeypatch.setattr(app_module, '_image_original_locks', [threading.Lock()])
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['email'] = 'images@boutiquerugs.com'
+    responses = []
+    worker = threading.Thread(target=lambda: responses.append(client.get('/img/IMG-1?w=320')), daemon=True)
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive(), 'görsel isteği kilitlendi'
+    assert responses[0].status_code == 200
+    assert responses[0].mimetype.startswith('image/')
@@ -0,0 +1,57 @@
+"""
+web_app/app_flask.py kira zamanlayıcısını (LeaseScheduler) doğrular.
+
+Paylaşılan kira turunun (veritabanı) zamanlayıcı kilidi dışında yapıldığı,
+başka worker'da kiralı çıkan adayların atlandığı ve süresi dolmuş kira
+satırlarının temizlendiği kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_leases.py -q
+"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import select
+
+
+class OtherWorkerStore:
+    """İlk SKU başka worker'da kiralıymış gibi davranan, kilidi kontrol eden sahte store"""
+
+    def __init__(self):
+        self.scheduler = None
+        self.calls = []
+
+    def acquire(self, email, skus, ttl):
+        assert not self.scheduler._lock.locked()
+        self.calls.append(list(skus))
+        return {sku for sku in skus if sku != 'LEASE-0'}
+
+    def release(self, email, skus=None):
+        pass
+
+
+def test_shared_acquire_runs_outside_lock(app_module):
+    queue = app_module.PendingQueue()
+    queue.rebuild([app_module.ReviewItem(f'LEASE-{i}', None, 'Floral', None) for i in range(4)])
+    store = OtherWorkerStore()
+    leases = app_module.LeaseScheduler(queue, store=store)
+    store.scheduler = leases
+
+    claimed = [item['variant_sku'] for item in leases.claim('a@boutiquerugs.com', 2)]
+    assert claimed == ['LEASE-1', 'LEASE-2']
+    assert store.calls == [['LEASE-0', 'LEASE-1'], ['LEASE-2']]
+    assert leases.holder('LEASE-0') == app_module.LeaseScheduler.OTHER_WORKER
+
+
+def test_prune_deletes_expired_lease_rows(app_module):
+    store = app_module.DatabaseLeaseStore('prune-test')
+    store.acquire('a@boutiquerugs.com', ['PRUNE-1', 'PRUNE-2'], ttl=300)
+    store.acquire('a@boutiquerugs.com', ['PRUNE-3'], ttl=-1)
+    assert store.prune() == 1
+
+    leases = app_module.ReviewLease.__table__
+    with app_module.engine.connect() as conn:
+        rows = conn.execute(select(leases.c.variant_sku).where(leases.c.queue == 'prune-test')).scalars().all()
+    assert sorted(rows) == ['PRUNE-1', 'PRUNE-2']
+    store.release('a@boutiquerugs.com')
@@ -0,0 +1,38 @@
+"""
+web_app/app_flask.py loglamasını (QueueListener) doğrular.
+
+Fork edilen process'te (gunicorn worker) logların yeni kurulan kuyruk ve
+listener üzerinden yazılmaya devam ettiği kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_logging.py -q
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+FORK_SCRIPT = '''
+import os, sys, app_flask
+parent_listener = app_flask.log_listener
+pid = os.fork()
+if pid == 0:
+    assert app_flask.log_listener is not parent_listener
+    app_flask.logger.warning('child-log-ok')
+    sys.exit(0)
+_, status = os.waitpid(pid, 0)
+sys.exit(os.waitstatus_to_exitcode(status))
+'''
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork gerekli')
+def test_logging_restarts_in_forked_child(app_module, tmp_path):
+    env = dict(os.environ, DATA_DIR=str(tmp_path), PATTERNS_FILE=str(tmp_path / 'missing.csv'),
+               DATABASE_URL=f"sqlite:///{tmp_path / 'fork.db'}", WARMUP_MODE='sync', DEFER_BACKGROUND_WORKERS='1')
+    result = subprocess.run([sys.executable, '-c', FORK_SCRIPT], cwd=app_module.BASE_DIR / 'web_app',
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'child-log-ok' in result.stdout
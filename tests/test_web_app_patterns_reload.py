@@ -0,0 +1,54 @@
+"""
+web_app/app_flask.py kontrol listesi yenilemesini (reload_patterns) doğrular.
+
+Dosya değişince kuyruklar yeniden kurulmadan sadece farklar uygulanır; bu
+farkların tam yüklemeyle (load_patterns) aynı kuyrukları vermesi kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_patterns_reload.py -q
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+CSV_HEADER = 'Variant SKU,Product SKU,Original Patterns,AI Detected Pattern,Design Image URL\n'
+
+
+def write_control_list(path, rows):
+    path.write_text(CSV_HEADER + ''.join(f'{sku},P-{sku},,{pattern},https://example.com/{sku}.jpg\n'
+                                         for sku, pattern in rows), encoding='utf-8')
+
+
+@pytest.fixture
+def control_list(app_module, tmp_path, monkeypatch):
+    path = tmp_path / 'control_list.csv'
+    monkeypatch.setattr(app_module, 'PATTERNS_FILE', path)
+    monkeypatch.setattr(app_module, 'PATTERNS_SNAPSHOT_DIR', tmp_path / 'snapshots')
+    monkeypatch.setattr(app_module, 'patterns_info', None)
+    monkeypatch.setattr(app_module, 'pattern_items', {})
+    monkeypatch.setattr(app_module, 'reviewed_skus', set())
+    monkeypatch.setattr(app_module, 'pending_queue', app_module.PendingQueue())
+    monkeypatch.setattr(app_module, 'recheck_queue', app_module.PendingQueue())
+    monkeypatch.setattr(app_module, 'review_groups', app_module.ReviewGroups())
+    return path
+
+
+def test_reload_enqueues_items_that_leave_error(app_module, control_list):
+    app_module.upsert_reviews([{
+        'id': 'RELOAD-3', 'variant_sku': 'RELOAD-3', 'product_sku': 'P-RELOAD-3', 'ai_pattern': 'Error',
+        'image_url': None, 'status': 'Rejected', 'reviewed_by': 'reload@boutiquerugs.com',
+        'timestamp': datetime.now(timezone.utc),
+    }])
+    write_control_list(control_list, [('RELOAD-1', 'Error'), ('RELOAD-2', 'Floral'), ('RELOAD-3', 'Error')])
+    app_module.load_patterns()
+    assert 'RELOAD-1' not in app_module.pending_queue
+    assert 'RELOAD-2' in app_module.pending_queue
+
+    write_control_list(control_list, [('RELOAD-1', 'Floral'), ('RELOAD-2', 'Error'), ('RELOAD-3', 'Geometric')])
+    assert app_module.reload_patterns() == {'added': 0, 'removed': 0, 'changed': 3}
+
+    assert 'RELOAD-1' in app_module.pending_queue
+    assert 'RELOAD-2' not in app_module.pending_queue
+    assert app_module.recheck_queue.get('RELOAD-3')['ai_pattern'] == 'Geometric'
@@ -0,0 +1,136 @@
+"""
+web_app/app_flask.py sorgu enstrümantasyonunu doğrular.
+
+İstek başına sorgu sayısı/süresi, yavaş sorgu log'u ve N+1 uyarısı test
+client üzerinden geçici bir SQLite veritabanında kontrol edilir. Karar
+endpoint'lerinin sorgu bütçesi de burada sabitlenir: tıklama başına sorgu
+sayısı artarsa test kırılır. Bir isteğin tüm sorguları tek bağlantı üzerinden
+çalışmalı ve bağlantı istek sonunda (hata olsa da) havuza dönmeli.
+
+Çalıştırma: python -m pytest tests/test_web_app_query_instrumentation.py -q
+"""
+import logging
+import warnings
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import event, text
+
+# Tek kararlık istekte beklenen en fazla sorgu sayısı
+DECISION_QUERY_BUDGET = 4
+
+
+@pytest.fixture
+def client(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['email'] = 'instrumentation@boutiquerugs.com'
+    return client
+
+
+def db_timing(response):
+    """Server-Timing başlığından (süre ms, sorgu sayısı) döndür"""
+    header = response.headers['Server-Timing']
+    duration = float(header.split('dur=')[1].split(';')[0])
+    queries = int(header.split('desc="')[1].split()[0])
+    return duration, queries
+
+
+def test_requests_report_query_count_and_time(app_module, client):
+    response = client.get('/api/current')
+    assert response.status_code == 200
+    duration, queries = db_timing(response)
+    assert queries >= 0 and duration >= 0
+
+    metrics_text = client.get('/metrics').get_data(as_text=True)
+    assert 'db_queries_per_request_count{route="/api/current"}' in metrics_text
+    assert 'db_query_duration_seconds_count{' in metrics_text
+
+
+def test_decision_stays_within_query_budget(app_module, client):
+    current = client.get('/api/current').get_json()
+    assert 'variant_sku' in current, current
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', app_module.NPlusOneWarning)
+        response = client.post('/api/approve', json={'variant_sku': current['variant_sku']})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    _, queries = db_timing(response)
+    assert queries <= DECISION_QUERY_BUDGET
+
+
+def test_slow_queries_are_logged(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'SLOW_QUERY_MS', 0)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    app_module.slow_query_logger.addHandler(handler)
+    try:
+        with app_module.app.test_request_context('/api/current'):
+            app_module.app.preprocess_request()
+            with app_module.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+    finally:
+        app_module.slow_query_logger.removeHandler(handler)
+    assert any('SELECT 1' in record.getMessage() and record.route == '/api/current' for record in records)
+    assert 'db_slow_queries_total' in app_module.render_metrics([app_module.metrics.snapshot()])
+
+
+def test_repeated_query_warns_n_plus_one(app_module):
+    with app_module.app.test_request_context('/api/current'):
+        app_module.app.preprocess_request()
+        with app_module.engine.connect() as conn:
+            for i in range(app_module.N_PLUS_ONE_THRESHOLD):
+                conn.execute(text('SELECT :i'), {'i': i})
+        with pytest.warns(app_module.NPlusOneWarning, match='SELECT'):
+            app_module.app.process_response(app_module.app.response_class())
+
+
+def test_repeated_query_is_logged_in_production(app_module, monkeypatch, caplog):
+    monkeypatch.setattr(app_module, 'N_PLUS_ONE_WARNINGS', False)
+    with app_module.app.test_request_context('/api/current'):
+        app_module.app.preprocess_request()
+        with app_module.engine.connect() as conn:
+            for i in range(app_module.N_PLUS_ONE_THRESHOLD):
+                conn.execute(text('SELECT :i'), {'i': i})
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', app_module.NPlusOneWarning)
+            app_module.app.process_response(app_module.app.response_class())
+    assert 'N+1' in caplog.text
+
+
+@contextmanager
+def counted_checkouts(engine):
+    """Blok içinde havuzdan kaç bağlantı alındığını say"""
+    checkouts = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    event.listen(engine, 'checkout', on_checkout)
+    try:
+        yield checkouts
+    finally:
+        event.remove(engine, 'checkout', on_checkout)
+
+
+def test_request_uses_single_connection(app_module):
+    with counted_checkouts(app_module.engine) as checkouts:
+        with app_module.app.test_request_context('/admin/all'):
+            app_module.load_rejected_skus()
+            app_module.load_review_stats()
+            app_module.paginate_decisions(app_module.PatternReview, app_module.REVIEW_COLUMNS, [], None, 3)
+            assert app_module.engine.pool.checkedout() == 1
+    assert len(checkouts) == 1
+    assert app_module.engine.pool.checkedout() == 0
+
+
+def test_request_session_released_after_error(app_module):
+    with pytest.raises(Exception):
+        with app_module.app.test_request_context('/admin/all'):
+            with app_module.db_session_scope() as db_session:
+                db_session.execute(text('SELECT * FROM missing_table'))
+    assert app_module.engine.pool.checkedout() == 0
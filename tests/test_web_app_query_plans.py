@@ -0,0 +1,102 @@
+"""
+web_app/app_flask.py sık kullanılan sorgularının index kullandığını doğrular.
+
+Uygulamanın gerçekten çalıştırdığı SELECT'ler yakalanır ve geçici bir SQLite
+veritabanında EXPLAIN QUERY PLAN ile kontrol edilir: hiçbir sorgu
+pattern_reviews / pattern_rechecks tablosunu index'siz taramamalı.
+
+Çalıştırma: python -m pytest tests/test_web_app_query_plans.py -q
+"""
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import event, text
+
+
+@contextmanager
+def captured_selects(engine):
+    """Blok içinde çalışan SELECT ifadelerini (sql, parametreler) olarak topla"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'sqlite_master' not in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def full_table_scans(engine, statements):
+    """Index kullanmadan tablo tarayan plan satırlarını döndür"""
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                if detail.startswith('SCAN pattern_') and 'INDEX' not in detail:
+                    scans.append((statement, detail))
+    return scans
+
+
+def seed_decisions(app_module):
+    now = datetime.now(timezone.utc)
+    items = list(app_module.pattern_items.values())[:20]
+    app_module.upsert_reviews([{
+        'id': item['variant_sku'],
+        'variant_sku': item['variant_sku'],
+        'product_sku': item['product_sku'],
+        'ai_pattern': item['ai_pattern'],
+        'image_url': item['image_url'],
+        'status': 'Approved' if i % 2 else 'Rejected',
+        'reviewed_by': f'user{i % 3}@boutiquerugs.com',
+        'timestamp': now - timedelta(seconds=i),
+    } for i, item in enumerate(items)])
+    app_module.upsert_rechecks({items[0]['variant_sku']: 'Approved'}, 'user0@boutiquerugs.com', now)
+
+
+def test_migrations_create_indexes(app_module):
+    with app_module.engine.connect() as conn:
+        index_names = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        versions = set(conn.execute(text('SELECT version FROM schema_migrations')).scalars())
+    expected = {index.name for index in app_module.PatternReview.__table__.indexes}
+    expected |= {index.name for index in app_module.PatternRecheck.__table__.indexes}
+    assert expected <= index_names
+    assert versions == {version for version, _, _ in app_module.MIGRATIONS}
+    assert app_module.run_migrations(app_module.engine) == []
+
+
+def test_hot_queries_use_indexes(app_module):
+    seed_decisions(app_module)
+    # Veritabanı timestamp'leri timezone'suz döner, watermark da öyle olmalı
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5)
+
+    with captured_selects(app_module.engine) as statements:
+        app_module.load_reviewed_skus()
+        app_module.load_rejected_skus()
+        app_module.load_review_stats()
+        app_module.review_change_feed.watermark = since
+        app_module.review_change_feed.poll()
+        for status in app_module.REVIEW_STATUSES:
+            _, cursor = app_module.paginate_decisions(
+                app_module.PatternReview, app_module.REVIEW_COLUMNS,
+                [app_module.PatternReview.status == status], None, 3)
+            app_module.paginate_decisions(
+                app_module.PatternReview, app_module.REVIEW_COLUMNS,
+                [app_module.PatternReview.status == status], cursor, 3)
+        app_module.paginate_decisions(
+            app_module.PatternReview, app_module.REVIEW_COLUMNS,
+            [app_module.PatternReview.reviewed_by == 'user1@boutiquerugs.com',
+             app_module.PatternReview.status == 'Approved'], None, 3)
+        app_module.paginate_decisions(app_module.PatternRecheck, app_module.RECHECK_COLUMNS, [], None, 3)
+
+    assert statements
+    assert full_table_scans(app_module.engine, statements) == []
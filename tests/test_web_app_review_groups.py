@@ -0,0 +1,84 @@
+"""
+web_app/app_flask.py görsel grubu bazlı kontrol modunu doğrular.
+
+Aynı Design Image URL'i paylaşan varyantların birlikte kiralandığı, tek
+kart olarak döndüğü ve karar/"Sonraki" işleminin gruptaki tüm varyantlara
+uygulandığı kontrol edilir.
+
+Çalıştırma: python -m pytest tests/test_web_app_review_groups.py -q
+"""
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import select
+
+IMAGE_URL = 'https://brugs-image.s3.us-east-2.amazonaws.com/237144A1/237144-013_prm_1.jpg'
+
+
+def make_items(app_module):
+    return [
+        app_module.ReviewItem('237144-012', '237144A1', 'Floral', IMAGE_URL),
+        app_module.ReviewItem('237144-013', '237144A1', 'Floral', IMAGE_URL.replace('https://brugs-image', 'HTTPS://BRUGS-IMAGE') + '?v=2'),
+        app_module.ReviewItem('237150-002', '237150A1', 'Geometric', 'https://brugs-image.s3.us-east-2.amazonaws.com/237150A1/237150-002_prm_1.jpg'),
+        app_module.ReviewItem('237144-014', '237144A1', 'Floral', f' {IMAGE_URL} '),
+    ]
+
+
+def test_groups_by_normalized_image_url(app_module):
+    items = make_items(app_module)
+    groups = app_module.ReviewGroups('image')
+    groups.rebuild(items)
+    assert groups.members(items[0]) == ('237144-012', '237144-013', '237144-014')
+    assert groups.members(items[2]) == ('237150-002',)
+
+    ungrouped = app_module.ReviewGroups('none')
+    ungrouped.rebuild(items)
+    assert ungrouped.members(items[0]) == ('237144-012',)
+
+
+def test_scheduler_leases_whole_groups(app_module):
+    items = make_items(app_module)
+    groups = app_module.ReviewGroups('image')
+    groups.rebuild(items)
+    queue = app_module.PendingQueue()
+    queue.rebuild(items)
+    leases = app_module.LeaseScheduler(queue, groups=groups)
+
+    claimed = [item['variant_sku'] for item in leases.claim('a@boutiquerugs.com', 1)]
+    assert claimed == ['237144-012', '237144-013', '237144-014']
+    assert leases.claim('b@boutiquerugs.com', 1)[0]['variant_sku'] == '237150-002'
+
+    leases.skip('a@boutiquerugs.com', *claimed)
+    assert all(leases.holder(sku) is None for sku in claimed)
+
+
+def test_decision_fans_out_to_group(app_module, monkeypatch):
+    items = make_items(app_module)
+    groups = app_module.ReviewGroups('image')
+    groups.rebuild(items)
+    queue = app_module.PendingQueue()
+    queue.rebuild(items)
+    monkeypatch.setattr(app_module, 'review_groups', groups)
+    monkeypatch.setattr(app_module, 'pending_queue', queue)
+    monkeypatch.setattr(app_module, 'review_leases', app_module.LeaseScheduler(queue, groups=groups))
+
+    client = app_module.app.test_client()
+    with client.session_transaction() as sess:
+        sess['email'] = 'groups@boutiquerugs.com'
+    card = client.get('/api/current?n=5').get_json()
+    assert [item['group_skus'] for item in card['items']] == [['237144-012', '237144-013', '237144-014'], ['237150-002']]
+
+    response = client.post('/api/reject', json={'variant_sku': card['variant_sku'], 'variant_skus': card['group_skus']})
+    assert response.status_code == 200
+    if app_module.decision_journal is not None:
+        app_module.decision_journal.flush()
+
+    reviews = app_module.PatternReview.__table__
+    with app_module.engine.connect() as conn:
+        rows = dict(conn.execute(
+            select(reviews.c.variant_sku, reviews.c.status).where(reviews.c.variant_sku.like('237144-%'))
+        ).all())
+    assert rows == {'237144-012': 'Rejected', '237144-013': 'Rejected', '237144-014': 'Rejected'}
+    assert len(queue) == 1 and '237150-002' in queue
@@ -1,40 +1,235 @@
-from flask import Flask, render_template_string, request, jsonify, session, redirect, url_for, send_file
-import pandas as pd
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file, Response, g, has_request_context
 from pathlib import Path
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import secrets
 import os
 import io
-from sqlalchemy import create_engine, Column, String, DateTime, Text
+import threading
+import time
+import json
+import atexit
+import base64
+import csv
+import zlib
+import gzip
+import hashlib
+import sys
+import warnings
+import logging
+import logging.handlers
+import queue
+import random
+from collections import Counter
+from operator import attrgetter
+from contextlib import contextmanager
+from sqlalchemy import event, create_engine, Column, String, DateTime, Text, Integer, Index, text, select, case, literal, func, tuple_, or_, delete
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from jinja2 import DictLoader
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)  # Session için secret key
 
-# PostgreSQL bağlantısı
+# Loglama - satırlar istek thread'inde değil, QueueListener thread'inde yazılır;
+# yoğun kullanımda stdout yazımı karar isteklerini bekletmez
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()  # text | json
+LOG_DECISION_SAMPLE_RATE = float(os.environ.get('LOG_DECISION_SAMPLE_RATE', 0.05))  # Karar başına debug loglarının yazılma oranı
+_LOG_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+class JsonLogFormatter(logging.Formatter):
+    """Tek satır JSON; logger.info(..., extra={...}) alanları da eklenir"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'pid': record.process,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _LOG_RECORD_FIELDS})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logging():
+    """Uygulama logger'ını kuyruk üzerinden stdout'a yazacak şekilde ayarla
+
+    Tekrar çağrılırsa (fork sonrası) önceki kuyruk handler'ı yenisiyle değiştirilir.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s'))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    # app.logger ile aynı logger: Flask kendi handler'ını eklemez, hatalar da kuyruktan geçer
+    app_logger = logging.getLogger(app.name)
+    app_logger.setLevel(LOG_LEVEL)
+    for old_handler in [h for h in app_logger.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        app_logger.removeHandler(old_handler)
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.propagate = False
+    listener.start()
+    atexit.register(listener.stop)  # Kapanışta kuyrukta kalan satırlar yazılsın
+    return app_logger, listener
+
+logger, log_listener = setup_logging()
+slow_query_logger = logger.getChild('slow_query')
+
+def _restart_logging():
+    # Fork'tan sonra (gunicorn worker) listener thread'i child process'te yoktur;
+    # parent'ınkini yeniden kullanmak yerine kuyruk, handler ve listener baştan kurulur
+    global log_listener
+    atexit.unregister(log_listener.stop)
+    _, log_listener = setup_logging()
+
+os.register_at_fork(after_in_child=_restart_logging)
+
+def log_decision(message, *args):
+    """Karar başına detay logu - LOG_DECISION_SAMPLE_RATE oranında örneklenir"""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_DECISION_SAMPLE_RATE:
+        logger.debug(message, *args)
+
+# Veri dizini: gömülü veritabanı, journal, snapshot ve cache dosyaları (testlerde geçici dizin verilir)
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = Path(os.environ.get('DATA_DIR', BASE_DIR / "data"))
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+def load_secret_key():
+    """Session secret key - tüm worker'larda ve yeniden başlatmalarda aynı olmalı
+
+    Öncelik SECRET_KEY environment variable'ında; yoksa data/ altındaki dosyada
+    saklanan (ilk açılışta oluşturulan) anahtar kullanılır.
+    """
+    if os.environ.get('SECRET_KEY'):
+        return os.environ['SECRET_KEY']
+    key_file = DATA_DIR / ".flask_secret_key"
+    try:
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        # O_EXCL: aynı anda açılan worker'lardan sadece biri anahtarı oluşturur
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+    except FileExistsError:
+        pass
+    except OSError as e:
+        logger.warning(f"Secret key dosyası yazılamadı, geçici anahtar kullanılıyor: {e}")
+        return secrets.token_hex(32)
+    for _ in range(50):
+        key = key_file.read_text().strip()
+        if key:
+            return key
+        time.sleep(0.01)  # Diğer worker henüz yazmayı bitirmedi
+    return secrets.token_hex(32)
+
+app.secret_key = load_secret_key()  # Session için secret key (SECRET_KEY env ile sabitlenir)
+
+# Veritabanı bağlantısı - DATABASE_URL yoksa (tek sunuculu kurulum / local development)
+# data/reviews.db gömülü SQLite veritabanı kullanılır (WAL modu, aynı şema ve index'ler)
 DATABASE_URL = os.environ.get('DATABASE_URL')
-USE_DATABASE = False
+EMBEDDED_DATABASE_PATH = DATA_DIR / "reviews.db"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))  # Yazma kilidi bu kadar beklenir
+# Bağlantı havuzu (worker başına). PostgreSQL bağlantı limiti için:
+# WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) limitin altında kalmalı
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # Boş bağlantı bu kadar beklenir, sonra hata
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Sunucu tarafı idle kapanışlarından önce yenile (sn)
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'yes')
+EMBEDDED_DATABASE = False
 engine = None
-SessionLocal = None
 
-print(f"🔍 DATABASE_URL kontrolü: {'VAR' if DATABASE_URL else 'YOK'}", flush=True)
+def create_database_engine(url):
+    """SQLAlchemy engine oluştur; SQLite bağlantıları WAL moduna alınır"""
+    pool_options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+    if not url.startswith('sqlite'):
+        return create_engine(url, pool_pre_ping=DB_POOL_PRE_PING, **pool_options)
+    # Yerel dosyada ping gereksiz; bellek içi SQLite tek bağlantılı havuz kullanır
+    db_engine = create_engine(url, **({} if ':memory:' in url or url == 'sqlite://' else pool_options))
+
+    @event.listens_for(db_engine, 'connect')
+    def configure_sqlite(dbapi_connection, connection_record):
+        # WAL: okuyucular yazanı beklemez; synchronous=NORMAL: WAL'da güvenli, commit başına fsync yok
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+    return db_engine
+
+logger.info(f"DATABASE_URL kontrolü: {'VAR' if DATABASE_URL else 'YOK'}")
 if DATABASE_URL:
     try:
         # Render PostgreSQL URL'i genellikle postgres:// ile başlar, SQLAlchemy postgresql:// istiyor
         if DATABASE_URL.startswith('postgres://'):
             DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
-        print(f"🔍 Database URL formatı düzeltildi", flush=True)
-        engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-        SessionLocal = sessionmaker(bind=engine)
-        USE_DATABASE = True
-        print("✅ PostgreSQL veritabanı kullanılıyor", flush=True)
+            logger.debug("Database URL formatı düzeltildi")
+        engine = create_database_engine(DATABASE_URL)
+        logger.info(f"Veritabanı kullanılıyor: {engine.dialect.name}")
     except Exception as e:
-        print(f"❌ PostgreSQL bağlantı hatası: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
-        USE_DATABASE = False
-else:
-    print("⚠️ DATABASE_URL environment variable bulunamadı!", flush=True)
+        logger.exception(f"Veritabanı bağlantı hatası, gömülü SQLite kullanılacak: {e}")
+if engine is None:
+    EMBEDDED_DATABASE = True
+    engine = create_database_engine(f"sqlite:///{EMBEDDED_DATABASE_PATH}")
+    logger.warning(f"DATABASE_URL yok, gömülü SQLite kullanılıyor: {EMBEDDED_DATABASE_PATH} "
+                   "(kalıcı disk yoksa kararlar yeniden deploy'da kaybolur)")
+SessionLocal = sessionmaker(bind=engine)
+
+def checkout_connection():
+    """Havuzdan bağlantı al; bekleme süresi (pre-ping dahil) ve zaman aşımları metriklere yazılır"""
+    started = time.perf_counter()
+    try:
+        connection = engine.connect()
+    except PoolTimeoutError:
+        metrics.inc('db_pool_timeouts_total', ())
+        raise
+    metrics.observe('db_pool_checkout_seconds', (), time.perf_counter() - started, DB_LATENCY_BUCKETS)
+    return connection
+
+@contextmanager
+def db_session_scope():
+    """Veritabanı session'ı
+
+    İstek içinde tüm yardımcılar isteğin tek session'ını (tek bağlantı) paylaşır,
+    session istek sonunda close_db_session() ile kapatılır. İstek dışında
+    (arka plan thread'leri, akışlı CSV export) her kullanım kendi kısa session'ını açar.
+    """
+    if has_request_context():
+        db_session = g.get('db_session')
+        if db_session is None:
+            g.db_connection = checkout_connection()
+            db_session = g.db_session = SessionLocal(bind=g.db_connection)
+        try:
+            yield db_session
+        except Exception:
+            db_session.rollback()  # Aynı istekteki sonraki sorgular çalışabilsin
+            raise
+        return
+    connection = checkout_connection()
+    db_session = SessionLocal(bind=connection)
+    try:
+        yield db_session
+    finally:
+        db_session.close()
+        connection.close()
+
+@app.teardown_appcontext
+def close_db_session(exc):
+    """İsteğin session'ını kapat ve bağlantıyı havuza geri ver (hata olsa da)"""
+    db_session = g.pop('db_session', None)
+    if db_session is not None:
+        try:
+            db_session.close()
+        finally:
+            g.pop('db_connection').close()
 
 # Veritabanı modelleri
 Base = declarative_base()
@@ -50,6 +245,13 @@ class PatternReview(Base):
     status = Column(String, nullable=False)  # 'Approved' or 'Rejected'
     reviewed_by = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('ix_pattern_reviews_status_variant_sku', 'status', 'variant_sku'),  # approved/rejected SKU listeleri
+        Index('ix_pattern_reviews_status_timestamp', 'status', 'timestamp', 'variant_sku'),  # admin listeleri (sayfalı)
+        Index('ix_pattern_reviews_reviewed_by_status_timestamp', 'reviewed_by', 'status', 'timestamp'),  # kullanıcı sonuçları + istatistikler
+        Index('ix_pattern_reviews_timestamp', 'timestamp'),  # worker senkronizasyonu
+    )
 
 class PatternRecheck(Base):
     __tablename__ = 'pattern_rechecks'
@@ -63,328 +265,1784 @@ class PatternRecheck(Base):
     recheck_status = Column(String, nullable=False)  # İkinci kontrol sonucu: 'Approved' or 'Rejected'
     reviewed_by = Column(String, nullable=False)
     timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('ix_pattern_rechecks_reviewed_by_timestamp', 'reviewed_by', 'timestamp'),
+        Index('ix_pattern_rechecks_timestamp', 'timestamp', 'variant_sku'),  # senkronizasyon + admin listesi
+    )
 
-# Tabloları oluştur
-if USE_DATABASE:
-    try:
-        Base.metadata.create_all(engine)
-        print("✅ Veritabanı tabloları hazır")
-    except Exception as e:
-        print(f"❌ Tablo oluşturma hatası: {e}")
+class ReviewLease(Base):
+    """Worker'lar arası paylaşılan SKU kiraları (çoklu worker modunda)"""
+    __tablename__ = 'review_leases'
+    
+    queue = Column(String, primary_key=True)  # 'review' veya 'recheck'
+    variant_sku = Column(String, primary_key=True)
+    reviewer = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class SchemaMigration(Base):
+    __tablename__ = 'schema_migrations'
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+# Şema migration'ları - sırayla ve bir kez uygulanır, uygulananlar schema_migrations'a yazılır.
+# Yeni şema değişikliği = listenin sonuna yeni versiyon (mevcutları asla değiştirme).
+MIGRATION_LOCK_ID = 729301  # PostgreSQL advisory lock (aynı anda tek worker migrate eder)
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+def _migration_initial_schema(engine):
+    """pattern_reviews ve pattern_rechecks tablolarını oluştur (yoksa)"""
+    Base.metadata.create_all(engine, tables=[PatternReview.__table__, PatternRecheck.__table__])
+
+def _migration_review_indexes(engine):
+    """Sık kullanılan sorgular için index'leri ekle (mevcut tablolarda)"""
+    indexes = list(PatternReview.__table__.indexes) + list(PatternRecheck.__table__.indexes)
+    if engine.dialect.name == 'postgresql':
+        # CONCURRENTLY: büyük tabloda yazmaları kilitlemeden oluştur (transaction dışında çalışmalı)
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            for index in indexes:
+                columns = ', '.join(column.name for column in index.columns)
+                conn.execute(text(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {index.table.name} ({columns})'
+                ))
+    else:
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(conn, checkfirst=True)
+
+def _migration_review_leases(engine):
+    """Çoklu worker için paylaşılan kira tablosunu oluştur"""
+    ReviewLease.__table__.create(engine, checkfirst=True)
+
+LEGACY_CSV_FILES = {'Approved': "approved_patterns.csv", 'Rejected': "rejected_patterns.csv"}
+LEGACY_IMPORT_BATCH_SIZE = 1000
+
+def read_legacy_csv_decisions(data_dir):
+    """Eski CSV fallback dosyalarındaki kararları oku (SKU başına en son karar)"""
+    latest = {}
+    for status, filename in LEGACY_CSV_FILES.items():
+        path = data_dir / filename
+        if not path.exists():
+            continue
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                sku = (row.get('Variant SKU') or '').strip()
+                if not sku:
+                    continue
+                try:
+                    timestamp = datetime.fromisoformat(row.get('Timestamp') or '')
+                except ValueError:
+                    timestamp = datetime.now(timezone.utc)
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+                previous = latest.get(sku)
+                if previous is not None and previous['timestamp'] > timestamp:
+                    continue
+                latest[sku] = {
+                    'id': sku,
+                    'variant_sku': sku,
+                    'product_sku': row.get('Product SKU') or None,
+                    'ai_pattern': row.get('AI Detected Pattern') or None,
+                    'image_url': row.get('Design Image URL') or None,
+                    'status': status,
+                    'reviewed_by': row.get('Reviewed By') or 'unknown',
+                    'timestamp': timestamp,
+                }
+    return list(latest.values())
+
+def _migration_import_legacy_csv(engine):
+    """CSV fallback döneminden kalan kararları gömülü veritabanına aktar (PostgreSQL'de işlem yapmaz)"""
+    if not EMBEDDED_DATABASE:
+        return
+    rows = read_legacy_csv_decisions(DATA_DIR)
+    for start in range(0, len(rows), LEGACY_IMPORT_BATCH_SIZE):
+        upsert_reviews(rows[start:start + LEGACY_IMPORT_BATCH_SIZE])
+    if rows:
+        logger.info(f"Eski CSV dosyalarından {len(rows)} karar aktarıldı")
+
+MIGRATIONS = [
+    (1, 'initial_schema', _migration_initial_schema),
+    (2, 'review_indexes', _migration_review_indexes),
+    (3, 'review_leases', _migration_review_leases),
+    (4, 'import_legacy_csv', _migration_import_legacy_csv),
+]
+
+def run_migrations(engine):
+    """Uygulanmamış migration'ları sırayla uygula, uygulanan versiyonları döndür"""
+    applied_now = []
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == 'postgresql':
+            # pg_advisory_lock ile beklemek açık bir snapshot tutar ve CREATE INDEX CONCURRENTLY
+            # bu snapshot'ı bekler; bu yüzden kilit açık transaction olmadan aralıklarla denenir
+            while not lock_conn.execute(text('SELECT pg_try_advisory_lock(:id)'), {'id': MIGRATION_LOCK_ID}).scalar():
+                lock_conn.commit()
+                time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+            lock_conn.commit()
+        try:
+            SchemaMigration.__table__.create(engine, checkfirst=True)
+            with engine.connect() as conn:
+                applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+            for version, name, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                logger.info(f"Migration uygulanıyor: {version} - {name}")
+                migrate(engine)
+                with engine.begin() as conn:
+                    conn.execute(SchemaMigration.__table__.insert().values(
+                        version=version, name=name, applied_at=datetime.now(timezone.utc)
+                    ))
+                applied_now.append(version)
+        finally:
+            if engine.dialect.name == 'postgresql':
+                lock_conn.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': MIGRATION_LOCK_ID})
+                lock_conn.commit()
+    return applied_now
+
+def migrate_database():
+    """Tabloları oluştur / güncelle (başlangıçta warm_up() içinde çalışır)"""
+    run_migrations(engine)
+    logger.info("Veritabanı tabloları hazır")
 
 # Dosya yolları - Sadece pattern yükleme için
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-PATTERNS_FILE = DATA_DIR / "control_list_1000.csv"  # Kontrol listesi dosyası (1000 ürün)
+PATTERNS_FILE = Path(os.environ.get('PATTERNS_FILE', DATA_DIR / "control_list_1000.csv"))  # Kontrol listesi dosyası
+PATTERNS_SNAPSHOT_DIR = DATA_DIR / "snapshots"  # Dosya hash'ine göre Arrow snapshot'ları
+PATTERNS_WATCH_SECONDS = float(os.environ.get('PATTERNS_WATCH_SECONDS', 10))  # 0 = dosya izlenmez
 
 # Global state
-patterns_data = None
+patterns_info = None  # Yüklü kontrol listesi: {'hash', 'rows', 'source'}
+pattern_items = {}  # variant_sku -> item (kontrol listesindeki tüm kayıtlar)
 reviewed_skus = set()  # Global olarak kontrol edilen tüm SKU'lar
 
-def load_patterns():
-    """Pattern dosyasını yükle - kontrol listesi dosyası (1000 ürün)"""
-    global patterns_data
+MAX_BATCH_SIZE = 20  # /api/current?n=... ile tek seferde dönebilecek en fazla kayıt
+MAX_DECISIONS_PER_REQUEST = 500  # /api/decisions ile tek seferde kaydedilebilecek en fazla karar
+
+class PendingQueue:
+    """Kontrol bekleyen pattern'ler için thread-safe kuyruk.
+
+    SKU -> düğüm sözlüğü üzerinde çift yönlü bağlı liste tutar; böylece
+    sıradaki kaydı bulmak, bir kaydın ardılını bulmak ve karar verilen
+    kaydı çıkarmak O(1) olur (her istekte DataFrame filtrelemeye gerek kalmaz).
+    AI pattern'ine göre ayrıca bir indeks tutulur (grid modu sadece o pattern'in
+    kayıtlarını gezer).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._nodes = {}  # variant_sku -> [prev_sku, next_sku, item]
+        self._by_pattern = {}  # ai_pattern -> {variant_sku: None} (kuyruğa giriş sırasıyla)
+        self._head = None
+        self._tail = None
+
+    def rebuild(self, items):
+        """Kuyruğu verilen item listesiyle sıfırdan kur"""
+        with self._lock:
+            self._nodes = {}
+            self._by_pattern = {}
+            self._head = self._tail = None
+            for item in items:
+                self._append(item)
+
+    def _append(self, item):
+        sku = item['variant_sku']
+        if sku in self._nodes:
+            return
+        self._nodes[sku] = [self._tail, None, item]
+        self._by_pattern.setdefault(item['ai_pattern'], {})[sku] = None
+        if self._tail is None:
+            self._head = sku
+        else:
+            self._nodes[self._tail][1] = sku
+        self._tail = sku
+
+    def append(self, item):
+        with self._lock:
+            self._append(item)
+
+    def _unindex(self, sku, item):
+        bucket = self._by_pattern.get(item['ai_pattern'])
+        if bucket is not None:
+            bucket.pop(sku, None)
+            if not bucket:
+                del self._by_pattern[item['ai_pattern']]
+
+    def remove(self, variant_sku):
+        """Kaydı kuyruktan çıkar, çıkarıldıysa True döndür"""
+        with self._lock:
+            node = self._nodes.pop(str(variant_sku), None)
+            if node is None:
+                return False
+            prev_sku, next_sku, item = node
+            self._unindex(str(variant_sku), item)
+            if prev_sku is None:
+                self._head = next_sku
+            else:
+                self._nodes[prev_sku][1] = next_sku
+            if next_sku is None:
+                self._tail = prev_sku
+            else:
+                self._nodes[next_sku][0] = prev_sku
+            return True
+
+    def get(self, variant_sku):
+        with self._lock:
+            node = self._nodes.get(str(variant_sku))
+            return node[2] if node else None
+
+    def replace(self, item):
+        """Kuyruktaki kaydın bilgilerini sırasını bozmadan güncelle"""
+        with self._lock:
+            sku = item['variant_sku']
+            node = self._nodes.get(sku)
+            if node is not None:
+                if node[2]['ai_pattern'] != item['ai_pattern']:
+                    self._unindex(sku, node[2])
+                    self._by_pattern.setdefault(item['ai_pattern'], {})[sku] = None
+                node[2] = item
+
+    def first(self):
+        with self._lock:
+            return self._nodes[self._head][2] if self._head is not None else None
+
+    def after(self, variant_sku, wrap=True):
+        """Verilen SKU'dan sonraki kaydı döndür (wrap=True ise sona gelindiğinde başa sar)"""
+        with self._lock:
+            node = self._nodes.get(str(variant_sku))
+            if node is None or node[1] is None:
+                return self.first() if wrap else None
+            return self._nodes[node[1]][2]
+
+    def pattern_counts(self):
+        """AI pattern -> kuyrukta bekleyen kayıt sayısı"""
+        with self._lock:
+            return Counter({pattern: len(bucket) for pattern, bucket in self._by_pattern.items()})
+
+    def pattern_skus(self, ai_pattern):
+        """Verilen AI pattern'indeki SKU'lar kuyruğa giriş sırasıyla (kopya liste)"""
+        with self._lock:
+            return list(self._by_pattern.get(ai_pattern, ()))
+
+    def __contains__(self, variant_sku):
+        return str(variant_sku) in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+pending_queue = PendingQueue()  # İlk kontrolü bekleyen pattern'ler
+
+# Lease (kiralama) ayarları - her kullanıcıya TTL'li, ayrık bir SKU grubu verilir
+LEASE_TTL_SECONDS = int(os.environ.get('LEASE_TTL_SECONDS', 300))
+LEASE_BATCH_SIZE = int(os.environ.get('LEASE_BATCH_SIZE', 5))
+# Birden fazla worker varsa kiralar review_leases tablosunda paylaşılır ('auto' = WEB_CONCURRENCY > 1)
+SHARED_LEASES = os.environ.get('SHARED_LEASES', 'auto').lower()
+if SHARED_LEASES == 'auto':
+    SHARED_LEASES = int(os.environ.get('WEB_CONCURRENCY', 1)) > 1
+else:
+    SHARED_LEASES = SHARED_LEASES in ('1', 'true', 'yes')
+
+class DatabaseLeaseStore:
+    """Kiraları review_leases tablosunda tutar - tüm worker'lar aynı kiraları görür"""
+
+    def __init__(self, queue_name):
+        self.queue_name = queue_name
+
+    def acquire(self, email, skus, ttl):
+        """Boşta, süresi dolmuş veya zaten bu kullanıcıda olan SKU'ları tek ifadede kirala/yenile"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        leases = ReviewLease.__table__
+        stmt = _insert_for_dialect(leases).values([
+            {'queue': self.queue_name, 'variant_sku': sku, 'reviewer': email, 'expires_at': now + timedelta(seconds=ttl)}
+            for sku in skus
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['queue', 'variant_sku'],
+            set_={'reviewer': stmt.excluded.reviewer, 'expires_at': stmt.excluded.expires_at},
+            where=or_(leases.c.expires_at < now, leases.c.reviewer == email)
+        ).returning(leases.c.variant_sku)
+        with db_session_scope() as db_session:
+            acquired = set(db_session.execute(stmt).scalars())
+            db_session.commit()
+        return acquired
+
+    def release(self, email, skus=None):
+        """Kullanıcının kiralarını bırak (skus=None ise hepsini)"""
+        leases = ReviewLease.__table__
+        stmt = delete(leases).where(leases.c.queue == self.queue_name, leases.c.reviewer == email)
+        if skus is not None:
+            stmt = stmt.where(leases.c.variant_sku.in_(list(skus)))
+        with db_session_scope() as db_session:
+            db_session.execute(stmt)
+            db_session.commit()
+
+    def prune(self):
+        """Süresi dolmuş kira satırlarını sil (karar verilmiş SKU'ların satırları da böyle temizlenir)"""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        leases = ReviewLease.__table__
+        stmt = delete(leases).where(leases.c.queue == self.queue_name, leases.c.expires_at < now)
+        with db_session_scope() as db_session:
+            deleted = db_session.execute(stmt).rowcount
+            db_session.commit()
+        return deleted
+
+# Aynı tasarım görselini paylaşan varyantlar tek kart olarak gösterilir, karar hepsine uygulanır
+# ('image' = normalize edilmiş Design Image URL, 'product' = Product SKU, 'none' = gruplama yok)
+REVIEW_GROUP_BY = os.environ.get('REVIEW_GROUP_BY', 'image').lower()
+
+def normalize_image_url(url):
+    """Aynı görselin farklı yazımlarını birleştir (boşluk, şema/host harf büyüklüğü, query string)
+
+    Her satırda çalıştığı için urlsplit yerine basit string işlemleri kullanılır;
+    zaten normalize olan adresler (çoğunluk) kopyalanmadan döner.
+    """
+    if not url:
+        return None
+    url = str(url).strip()
+    if '?' in url or '#' in url:
+        url = url.split('#', 1)[0].split('?', 1)[0]
+    scheme, separator, rest = url.partition('://')
+    if not separator:
+        return url or None
+    host, slash, path = rest.partition('/')
+    if scheme.islower() and (host.islower() or host == host.lower()):
+        return url
+    return f"{scheme.lower()}://{host.lower()}{slash}{path}"
+
+class ReviewGroups:
+    """Kontrol listesindeki varyantları görsele (veya Product SKU'ya) göre gruplar.
+
+    Bellekte sadece birden fazla varyantı olan gruplar tutulur; tekil
+    kayıtlar kendi başına bir gruptur. Anahtar her seferinde item'dan
+    hesaplanır, böylece SKU -> grup sözlüğü gerekmez.
+    """
+
+    def __init__(self, by=REVIEW_GROUP_BY):
+        self.by = by
+        self._members = {}  # grup anahtarı -> (variant_sku, ...) kontrol listesi sırasıyla
+
+    def _value(self, item):
+        if self.by == 'image':
+            return normalize_image_url(item['image_url'])
+        if self.by == 'product':
+            return str(item['product_sku'] or '').strip() or None
+        return None
+
+    def key(self, item):
+        """Grup anahtarı: normalize değer (str) veya gruplanmayan kayıtlar için ('sku', variant_sku)"""
+        return self._value(item) or ('sku', str(item['variant_sku']))
+
+    def rebuild(self, items):
+        """Grup indeksini ReviewItem'lardan yeniden kur (her worker'da ve her yenilemede çalışır)"""
+        if self.by not in ('image', 'product'):
+            self._members = {}
+            return
+        # Satır başına maliyet önemli: alanlar attrgetter ile (C seviyesinde) okunur
+        fields = attrgetter('variant_sku', 'image_url' if self.by == 'image' else 'product_sku')
+        normalize = normalize_image_url if self.by == 'image' else (lambda value: str(value or '').strip() or None)
+        groups = {}
+        for item in items:
+            sku, raw = fields(item)
+            value = normalize(raw)
+            if value:
+                skus = groups.get(value)
+                if skus is None:
+                    groups[value] = [sku]
+                else:
+                    skus.append(sku)
+        self._members = {key: tuple(skus) for key, skus in groups.items() if len(skus) > 1}
+
+    def members(self, item):
+        """Item'ın grubundaki tüm variant SKU'lar (item'ın kendisi dahil)"""
+        return self._members.get(self.key(item), (str(item['variant_sku']),))
+
+review_groups = ReviewGroups()
+
+class LeaseScheduler:
+    """Kuyruktaki SKU'ları kullanıcılara ayrık gruplar halinde kiralar.
+
+    Her SKU aynı anda en fazla bir kullanıcıya kiralanır; kullanıcı her
+    istekte kiralarını yeniler, süresi dolan kiralar başka kullanıcılara
+    verilebilir. Böylece iki kişi aynı SKU üzerinde çalışmaz. store verilirse
+    (DatabaseLeaseStore) kiralar worker'lar arasında da paylaşılır. groups
+    verilirse (ReviewGroups) aynı gruptaki varyantlar birlikte kiralanır ve
+    n kayıt yerine n grup sayılır.
+    """
+
+    OTHER_WORKER = ''  # Başka bir worker'daki kullanıcıya kiralı (sadece store ile)
+    MAX_CLAIM_ROUNDS = 5  # Adaylar başka worker'da kiralı çıkarsa en fazla bu kadar tekrar denenir
+
+    def __init__(self, queue, ttl=LEASE_TTL_SECONDS, batch_size=LEASE_BATCH_SIZE, store=None, groups=None):
+        self.queue = queue
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.store = store
+        self.groups = groups or ReviewGroups('none')
+        self._lock = threading.Lock()
+        self._leases = {}  # variant_sku -> (email, expires_at)
+        self._by_reviewer = {}  # email -> {variant_sku: None} (sıralı)
+        self._skipped = {}  # email -> "Sonraki" ile geçilen SKU'lar
+        self._next_prune = 0.0
+
+    def claim(self, email, n=None, ai_pattern=None):
+        """Kullanıcının kiralarını yenile, eksikse kuyruktan n gruba tamamla ve item'ları döndür
+
+        ai_pattern verilirse (grid modu) sadece o pattern'in kayıtları (kuyruğun
+        pattern indeksinden) kiralanır; kullanıcının başka pattern'deki kiraları bırakılır.
+        Adaylar kilit altında seçilip ayrılır, paylaşılan kira (veritabanı) turu kilit
+        dışında yapılır ve sonuç tekrar kilit alınarak işlenir.
+        """
+        n = max(n or self.batch_size, 1)
+        with self._lock:
+            mine = self._by_reviewer.setdefault(email, {})
+            for sku in list(mine):
+                lease = self._leases.get(sku)
+                if sku not in self.queue or lease is None or lease[0] != email:
+                    del mine[sku]
+                    if lease is not None and lease[0] == email:
+                        del self._leases[sku]
+            dropped = []
+            if ai_pattern is not None:
+                dropped = [sku for sku in mine if not self._has_pattern(sku, ai_pattern)]
+                for sku in dropped:
+                    del mine[sku]
+                    del self._leases[sku]
+            renewals = list(mine)
+            candidates = self._reserve(email, mine, n, ai_pattern, rewind=True)
+        
+        if dropped:
+            self._release_shared(email, dropped)
+        acquired = self._acquire(email, renewals + candidates)
+        with self._lock:
+            now = time.monotonic()
+            mine = self._by_reviewer.setdefault(email, {})
+            for sku in renewals:
+                if sku not in mine:
+                    continue  # Bu sırada karar verildi veya bırakıldı
+                if sku in acquired:
+                    self._leases[sku] = (email, now + self.ttl)
+                else:
+                    # Kira süresi dolmuş ve başka worker'da başkasına verilmiş
+                    del mine[sku]
+                    self._leases[sku] = (self.OTHER_WORKER, now + self.ttl)
+            self._assign(email, mine, candidates, acquired, now)
+        
+        # Adaylar başka worker'da kiralıysa (ör. henüz senkronize olmamış kararlar) sıradakileri dene
+        for _ in range(self.MAX_CLAIM_ROUNDS):
+            if not candidates or acquired.issuperset(candidates):
+                break
+            with self._lock:
+                mine = self._by_reviewer.setdefault(email, {})
+                candidates = self._reserve(email, mine, n, ai_pattern)
+            acquired = self._acquire(email, candidates)
+            with self._lock:
+                self._assign(email, self._by_reviewer.setdefault(email, {}), candidates, acquired, time.monotonic())
+        
+        with self._lock:
+            items = [self.queue.get(sku) for sku in self._by_reviewer.get(email, {})]
+        return [item for item in items if item is not None]
+
+    def _reserve(self, email, mine, n, ai_pattern=None, rewind=False):
+        """Eksik gruplar için adayları seç ve geçici olarak bu kullanıcıya ayır (kilit altında çağrılır)
+
+        Ayrılan SKU'lar veritabanı turu sürerken aynı worker'daki diğer isteklere verilmez.
+        """
+        now = time.monotonic()
+        needed = n - self._group_count(mine)
+        candidates = self._candidates(email, mine, needed, now, ai_pattern)
+        if rewind and not candidates and needed > 0 and self._skipped.get(email):
+            # Geçilenler dışında boşta kayıt kalmadıysa başa sar
+            self._skipped[email].clear()
+            candidates = self._candidates(email, mine, needed, now, ai_pattern)
+        for sku in candidates:
+            lease = self._leases.get(sku)
+            if lease is not None:
+                self._by_reviewer.get(lease[0], {}).pop(sku, None)
+            self._leases[sku] = (email, now + self.ttl)
+        return candidates
+
+    def _group_count(self, mine):
+        return len({self.groups.key(item) for item in map(self.queue.get, mine) if item is not None})
+
+    def _assign(self, email, mine, candidates, acquired, now):
+        for sku in candidates:
+            lease = self._leases.get(sku)
+            if lease is None or lease[0] != email or sku not in self.queue:
+                continue  # Ayrım bu sırada bırakıldı (ör. çıkış) veya karar verildi
+            if sku in acquired:
+                self._leases[sku] = (email, now + self.ttl)
+                mine[sku] = None
+            else:
+                self._leases[sku] = (self.OTHER_WORKER, now + self.ttl)
+
+    def _has_pattern(self, sku, ai_pattern):
+        item = self.queue.get(sku)
+        return item is not None and item['ai_pattern'] == ai_pattern
+
+    def _queue_items(self, ai_pattern=None):
+        """Kuyruktaki item'lar sırayla; ai_pattern verilirse sadece o pattern'in indeksi gezilir"""
+        if ai_pattern is not None:
+            for sku in self.queue.pattern_skus(ai_pattern):
+                item = self.queue.get(sku)
+                if item is not None:
+                    yield item
+            return
+        item = self.queue.first()
+        while item is not None:
+            yield item
+            item = self.queue.after(item['variant_sku'], wrap=False)
+
+    def _candidates(self, email, mine, needed, now, ai_pattern=None):
+        """Boşta (kiralanmamış veya süresi dolmuş) SKU'ları kuyruk sırasıyla, grupları tamamıyla seç"""
+        skipped = self._skipped.get(email, ())
+
+        def is_free(sku):
+            lease = self._leases.get(sku)
+            if sku in mine or sku in skipped or (lease is not None and lease[1] >= now):
+                return False
+            return ai_pattern is None or self._has_pattern(sku, ai_pattern)
+
+        candidates = {}
+        groups = 0
+        if needed <= 0:
+            return []
+        for item in self._queue_items(ai_pattern):
+            sku = item['variant_sku']
+            if sku not in candidates and is_free(sku):
+                candidates[sku] = None
+                for member in self.groups.members(item):
+                    if member not in candidates and member in self.queue and is_free(member):
+                        candidates[member] = None
+                groups += 1
+                if groups >= needed:
+                    break
+        return list(candidates)
+
+    def _acquire(self, email, skus):
+        if self.store is None or not skus:
+            return set(skus)
+        try:
+            return self.store.acquire(email, skus, self.ttl)
+        except Exception as e:
+            # Veritabanına ulaşılamazsa sadece bu worker içinde kiralamaya devam et
+            logger.error(f"Paylaşılan kira hatası: {e}")
+            return set(skus)
+
+    def _release_shared(self, email, skus=None):
+        if self.store is None:
+            return
+        try:
+            self.store.release(email, skus)
+        except Exception as e:
+            logger.error(f"Paylaşılan kira bırakma hatası: {e}")
+
+    def prune_shared(self):
+        """Süresi dolmuş paylaşılan kira satırlarını en fazla TTL'de bir temizle (arka plan thread'i çağırır)"""
+        now = time.monotonic()
+        if self.store is None or now < self._next_prune:
+            return
+        self._next_prune = now + self.ttl
+        try:
+            deleted = self.store.prune()
+            if deleted:
+                logger.debug(f"{deleted} süresi dolmuş kira satırı silindi ({self.store.queue_name})")
+        except Exception as e:
+            logger.error(f"Kira temizleme hatası: {e}")
+
+    def release(self, email, variant_sku):
+        """Karar verilen SKU'nun kirasını bırak
+
+        Paylaşılan kira satırı bilerek hemen silinmez: diğer worker'lar kararı
+        senkronizasyonla görene kadar kira SKU'nun başkasına verilmesini engeller.
+        Süresi dolunca prune_shared ile temizlenir.
+        """
+        sku = str(variant_sku)
+        with self._lock:
+            lease = self._leases.get(sku)
+            if lease is not None and lease[0] == email:
+                del self._leases[sku]
+            self._by_reviewer.get(email, {}).pop(sku, None)
+
+    def skip(self, email, *variant_skus):
+        """SKU'ları bırak ve bu kullanıcıya tekrar verme ("Sonraki" butonu)"""
+        skus = [str(sku) for sku in variant_skus]
+        for sku in skus:
+            self.release(email, sku)
+        self._release_shared(email, skus)
+        with self._lock:
+            self._skipped.setdefault(email, set()).update(skus)
+
+    def holder(self, variant_sku):
+        """SKU'yu şu an kiralamış kullanıcıyı döndür (kira yoksa veya süresi dolduysa None)"""
+        with self._lock:
+            lease = self._leases.get(str(variant_sku))
+            if lease is None or lease[1] < time.monotonic():
+                return None
+            return lease[0]
+
+    def release_all(self, email):
+        """Kullanıcının tüm kiralarını bırak (çıkış yapınca)"""
+        with self._lock:
+            for sku in self._by_reviewer.pop(email, {}):
+                lease = self._leases.get(sku)
+                if lease is not None and lease[0] == email:
+                    del self._leases[sku]
+            self._skipped.pop(email, None)
+        self._release_shared(email)
+
+    def active_reviewers(self):
+        """Süresi dolmamış kirası olan kullanıcılar (bu worker'da)"""
+        now = time.monotonic()
+        with self._lock:
+            return {lease[0] for lease in self._leases.values() if lease[1] >= now and lease[0]}
+
+review_leases = LeaseScheduler(pending_queue, store=DatabaseLeaseStore('review') if SHARED_LEASES else None, groups=review_groups)
+
+recheck_queue = PendingQueue()  # Reddedilmiş ve henüz recheck edilmemiş pattern'ler
+recheck_leases = LeaseScheduler(recheck_queue, store=DatabaseLeaseStore('recheck') if SHARED_LEASES else None, groups=review_groups)
+rechecked_skus = set()  # Recheck kaydı olan SKU'lar
+
+PATTERN_COLUMNS = ('variant_sku', 'product_sku', 'ai_pattern', 'image_url')
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ReviewItem:
+    """Kontrol listesindeki tek kayıt - DataFrame satırı/dict yerine kompakt (__slots__) nesne.
+
+    item['ai_pattern'] gibi okunabilir ve dict(item) ile sözlüğe çevrilebilir.
+    Tekrarlanan pattern ve ürün SKU string'leri intern edilir.
+    """
+
+    __slots__ = PATTERN_COLUMNS
+
+    def __init__(self, variant_sku, product_sku, ai_pattern, image_url):
+        self.variant_sku = variant_sku
+        self.product_sku = sys.intern(product_sku) if product_sku else product_sku
+        self.ai_pattern = sys.intern(ai_pattern) if ai_pattern else ai_pattern
+        self.image_url = image_url
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def keys(self):
+        return PATTERN_COLUMNS
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in PATTERN_COLUMNS}
+
+    def __eq__(self, other):
+        if not isinstance(other, ReviewItem):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in PATTERN_COLUMNS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ReviewItem({self.variant_sku!r}, {self.ai_pattern!r})"
+
+PATTERNS_CSV_COLUMNS = ['Variant SKU', 'Product SKU', 'Original Patterns', 'AI Detected Pattern', 'Design Image URL']
+
+def parse_patterns_csv(path):
+    """Kontrol listesi CSV'sini csv modülüyle oku, PATTERN_COLUMNS sütun listelerini döndür
+
+    Başlıktan fazla sütun varsa (tırnaksız virgüllü pattern'ler) fazlalar
+    'AI Detected Pattern' ile birleştirilir; başlıktan uzun satırlar atlanır.
+    """
+    columns = {name: [] for name in PATTERN_COLUMNS}
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return columns
+        width = len(header)
+        for row in reader:
+            if len(row) > width:
+                continue
+            row = [value if value != '' else None for value in row] + [None] * (width - len(row))
+            ai_pattern = row[3] if width > 3 else None
+            extras = [value for value in row[len(PATTERNS_CSV_COLUMNS):] if value is not None]
+            if extras:
+                ai_pattern = ', '.join([str(ai_pattern)] + extras)
+            variant_sku, image_url = row[0], row[4] if width > 4 else None
+            if variant_sku is None or image_url is None:
+                continue
+            columns['variant_sku'].append(variant_sku)
+            columns['product_sku'].append(row[1] if width > 1 else None)
+            columns['ai_pattern'].append(ai_pattern)
+            columns['image_url'].append(image_url)
+    return columns
+
+def patterns_snapshot_path(path, file_hash):
+    return PATTERNS_SNAPSHOT_DIR / f"{Path(path).stem}.{file_hash[:16]}.arrow"
+
+def read_patterns_snapshot(snapshot_path):
+    """Arrow snapshot'ını memory-map ile aç ve sütun listelerini döndür"""
+    import pyarrow as pa
+    with pa.memory_map(str(snapshot_path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return {name: table.column(name).to_pylist() for name in PATTERN_COLUMNS}
+
+def write_patterns_snapshot(snapshot_path, columns):
+    """Sütunları Arrow IPC dosyası olarak atomik yaz, aynı listenin eski snapshot'larını sil"""
+    import pyarrow as pa
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.table({name: pa.array(columns[name], type=pa.string()) for name in PATTERN_COLUMNS})
+    tmp_path = snapshot_path.with_name(f".{snapshot_path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, snapshot_path)
+    stem = snapshot_path.name.split('.', 1)[0]
+    for old in snapshot_path.parent.glob(f"{stem}.*.arrow"):
+        if old != snapshot_path:
+            old.unlink(missing_ok=True)
+
+def read_control_list(path):
+    """Kontrol listesini snapshot'tan (varsa) veya CSV'den oku: (sütunlar, dosya hash'i, kaynak)"""
+    file_hash = file_sha256(path)
+    snapshot_path = patterns_snapshot_path(path, file_hash)
+    try:
+        import pyarrow  # noqa: F401 - opsiyonel, yoksa her açılışta CSV okunur
+    except ImportError:
+        return parse_patterns_csv(path), file_hash, 'csv'
+    if snapshot_path.exists():
+        try:
+            return read_patterns_snapshot(snapshot_path), file_hash, 'snapshot'
+        except Exception as e:
+            logger.warning(f"Snapshot okunamadı, CSV'den yeniden oluşturuluyor: {e}")
+    columns = parse_patterns_csv(path)
+    try:
+        write_patterns_snapshot(snapshot_path, columns)
+    except Exception as e:
+        logger.warning(f"Snapshot yazılamadı: {e}")
+    return columns, file_hash, 'csv'
+
+def items_from_columns(columns):
+    """Sütun listelerinden variant_sku -> item sözlüğü kur (tekrar eden SKU'larda ilki geçerli)"""
+    items = {}
+    for sku, product_sku, ai_pattern, image_url in zip(*(columns[name] for name in PATTERN_COLUMNS)):
+        sku = str(sku)
+        if sku not in items:
+            items[sku] = ReviewItem(sku, product_sku, ai_pattern, image_url)
+    return items
+
+def is_error_pattern(item):
+    return str(item['ai_pattern']).strip().upper() == 'ERROR'
+
+def rebuild_pending_queue():
+    """Pattern listesinden reviewed ve 'Error' olanları çıkararak kuyruğu kur (tek seferlik)"""
+    items = []
+    for sku, item in pattern_items.items():
+        if is_error_pattern(item):
+            continue
+        if sku in reviewed_skus:
+            continue
+        items.append(item)
+    pending_queue.rebuild(items)
+
+def load_patterns(rebuild_queue=True):
+    """Kontrol listesini yükle (snapshot varsa CSV parse edilmez) ve kuyruğu kur
+
+    Ardından load_reviewed_skus() çağrılacaksa (kuyruğu o da kurar) rebuild_queue=False verilir.
+    """
+    global patterns_info, pattern_items
     if not PATTERNS_FILE.exists():
         return None
     
     try:
-        df = pd.read_csv(PATTERNS_FILE, encoding='utf-8-sig', on_bad_lines='skip', low_memory=False)
-        expected_columns = ['Variant SKU', 'Product SKU', 'Original Patterns', 'AI Detected Pattern', 'Design Image URL']
-        if len(df.columns) > len(expected_columns):
-            if 'AI Detected Pattern' in df.columns:
-                extra_cols = df.columns[len(expected_columns):]
-                for col in extra_cols:
-                    df['AI Detected Pattern'] = df['AI Detected Pattern'].astype(str) + ', ' + df[col].astype(str)
-                df = df[expected_columns]
-        if len(df.columns) >= len(expected_columns):
-            df.columns = expected_columns[:len(df.columns)]
-        df = df.dropna(subset=['Variant SKU', 'Design Image URL'])
-        patterns_data = df
-        return df
+        columns, file_hash, source = read_control_list(PATTERNS_FILE)
+        pattern_items = items_from_columns(columns)
+        patterns_info = {'hash': file_hash, 'rows': len(columns['variant_sku']), 'source': source}
+        review_groups.rebuild(pattern_items.values())
+        if rebuild_queue:
+            rebuild_pending_queue()
+        return patterns_info
     except Exception as e:
-        print(f"Hata: {e}")
+        logger.error(f"Kontrol listesi yüklenemedi: {e}")
         return None
 
-def load_reviewed_skus():
-    """Veritabanından tüm kontrol edilmiş SKU'ları yükle (global) - Sadece approved ve recheck edilmiş olanlar"""
+def reload_patterns():
+    """Kontrol listesi dosyası değiştiyse kuyrukları yeniden kurmadan sadece farkları uygula"""
+    global patterns_info, pattern_items
+    file_hash = file_sha256(PATTERNS_FILE)
+    if patterns_info is not None and patterns_info['hash'] == file_hash:
+        return None
+    columns, file_hash, source = read_control_list(PATTERNS_FILE)
+    new_items = items_from_columns(columns)
+    old_items = pattern_items
+    
+    removed = [sku for sku in old_items if sku not in new_items]
+    added = [sku for sku in new_items if sku not in old_items]
+    changed = [sku for sku, item in new_items.items() if sku in old_items and old_items[sku] != item]
+    
+    # Önce yeni liste yayınlanır, sonra kuyruklar güncellenir (pattern_items ataması atomik)
+    pattern_items = new_items
+    patterns_info = {'hash': file_hash, 'rows': len(columns['variant_sku']), 'source': source}
+    review_groups.rebuild(new_items.values())
+    for sku in removed:
+        pending_queue.remove(sku)
+        recheck_queue.remove(sku)
+    recheck_candidates = False
+    for sku in changed:
+        item = new_items[sku]
+        if is_error_pattern(item):
+            pending_queue.remove(sku)
+            recheck_queue.remove(sku)
+            continue
+        # Daha önce filtrelenmiş (ör. 'Error' iken düzeltilmiş) kayıtlar kuyruğa girsin
+        if sku in pending_queue:
+            pending_queue.replace(item)
+        elif sku not in reviewed_skus:
+            pending_queue.append(item)
+        if sku in recheck_queue:
+            recheck_queue.replace(item)
+        elif is_error_pattern(old_items[sku]) and sku not in rechecked_skus:
+            recheck_candidates = True
+    for sku in added:
+        item = new_items[sku]
+        if sku not in reviewed_skus and not is_error_pattern(item):
+            pending_queue.append(item)
+    if recheck_candidates or any(sku in reviewed_skus for sku in added):
+        # Listeye geri eklenen veya 'Error'dan çıkan reddedilmiş SKU'lar recheck kuyruğuna da girsin
+        rebuild_recheck_queue()
+    
+    summary = {'added': len(added), 'removed': len(removed), 'changed': len(changed)}
+    logger.info(f"Kontrol listesi yenilendi ({source}): {summary}")
+    return summary
+
+class PatternsFileWatcher:
+    """Kontrol listesi dosyasını (mtime/boyut) izler, değişince reload_patterns() çağırır"""
+
+    def __init__(self, path, interval=PATTERNS_WATCH_SECONDS):
+        self.path = Path(path)
+        self.interval = interval
+        self._signature = self._stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def check(self):
+        """Dosya değiştiyse yeniden yükle"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        return reload_patterns()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Yarım yazılmış dosya vb. - bir sonraki değişiklikte tekrar denenir
+                self._signature = None
+                logger.error(f"Kontrol listesi yenileme hatası: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='patterns-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+def load_reviewed_skus(raise_errors=False):
+    """Veritabanından tüm kontrol edilmiş SKU'ları yükle (global) - Sadece approved ve recheck edilmiş olanlar
+
+    raise_errors=True ise (warm_up) okuma hatası yutulmaz; boş küme ile kuyruk
+    kurulursa karar verilmiş SKU'lar tekrar gösterilirdi.
+    """
     global reviewed_skus
     reviewed = set()
     
-    if USE_DATABASE:
-        try:
-            db_session = SessionLocal()
-            # Sadece approved olanları ve recheck edilmiş olanları al
-            approved_reviews = db_session.query(PatternReview).filter_by(status='Approved').all()
-            reviewed.update({str(review.variant_sku) for review in approved_reviews})
+    try:
+        with db_session_scope() as db_session:
+            # Sadece approved olanları ve recheck edilmiş olanları al (ORM nesnesi değil, sadece SKU)
+            approved = db_session.execute(
+                select(PatternReview.variant_sku).where(PatternReview.status == 'Approved')
+            ).scalars()
+            reviewed.update(str(sku) for sku in approved)
             
             # Recheck edilmiş olanları da ekle (ikinci kontrol yapılmış)
-            rechecks = db_session.query(PatternRecheck).all()
-            reviewed.update({str(recheck.variant_sku) for recheck in rechecks})
-            
-            db_session.close()
-        except Exception as e:
-            print(f"Veritabanı okuma hatası: {e}")
-    else:
-        # Fallback: CSV dosyalarından oku (local development)
-        approved_file = DATA_DIR / "approved_patterns.csv"
-        rejected_file = DATA_DIR / "rejected_patterns.csv"
-        
-        if approved_file.exists():
-            try:
-                approved_df = pd.read_csv(approved_file)
-                if 'Variant SKU' in approved_df.columns:
-                    reviewed.update(approved_df['Variant SKU'].dropna().astype(str))
-            except:
-                pass
-        # Rejected dosyasını yükleme - çünkü onları tekrar kontrol edeceğiz
+            rechecked = {str(sku) for sku in db_session.execute(select(PatternRecheck.variant_sku)).scalars()}
+        reviewed.update(rechecked)
+        rechecked_skus.clear()
+        rechecked_skus.update(rechecked)
+    except Exception as e:
+        if raise_errors:
+            raise
+        logger.error(f"Veritabanı okuma hatası: {e}")
     
     reviewed_skus = reviewed
+    rebuild_pending_queue()
     return reviewed
 
-def load_rejected_skus():
-    """Veritabanından sadece rejected olan SKU'ları yükle (recheck için)"""
+def load_rejected_skus(raise_errors=False):
+    """Veritabanından sadece rejected olup recheck edilmemiş SKU'ları yükle (recheck için)
+
+    Tek bir anti-join sorgusu ile sadece SKU'lar döner; ORM nesnesi oluşturulmaz.
+    raise_errors=True ise okuma hatası yutulmaz (warm_up tekrar denesin diye).
+    """
     rejected = set()
     
-    if USE_DATABASE:
-        try:
-            db_session = SessionLocal()
-            # Sadece rejected olanları al
-            rejected_reviews = db_session.query(PatternReview).filter_by(status='Rejected').all()
-            rejected = {str(review.variant_sku) for review in rejected_reviews}
-            
-            # Recheck edilmiş olanları çıkar (tekrar kontrol edilmiş)
-            rechecks = db_session.query(PatternRecheck).all()
-            rechecked_skus = {str(recheck.variant_sku) for recheck in rechecks}
-            rejected = rejected - rechecked_skus  # Recheck edilmiş olanları çıkar
-            
-            db_session.close()
-        except Exception as e:
-            print(f"Veritabanı okuma hatası: {e}")
+    query = (
+        select(PatternReview.variant_sku)
+        .outerjoin(PatternRecheck, PatternRecheck.id == PatternReview.id)  # id = variant_sku (primary key)
+        .where(PatternReview.status == 'Rejected', PatternRecheck.id.is_(None))
+    )
+    try:
+        with db_session_scope() as db_session:
+            rejected = {str(sku) for sku in db_session.execute(query).scalars()}
+    except Exception as e:
+        if raise_errors:
+            raise
+        logger.error(f"Veritabanı okuma hatası: {e}")
     
     return rejected
 
-def get_current_pattern():
-    """Kullanıcı bazlı pattern döndür (her kullanıcı farklı pattern görür)"""
-    global patterns_data, reviewed_skus
-    
-    if patterns_data is None:
-        load_patterns()
+def rebuild_recheck_queue(raise_errors=False):
+    """Recheck bekleyen SKU'ları veritabanından bir kez çekip kuyruğu kur"""
+    rejected = load_rejected_skus(raise_errors)
+    recheck_queue.rebuild([
+        item for sku, item in pattern_items.items()
+        if sku in rejected and not is_error_pattern(item)
+    ])
+
+def add_pending_recheck(variant_sku):
+    """Yeni reddedilen SKU'yu recheck kuyruğuna ekle (daha önce recheck edilmediyse)"""
+    sku = str(variant_sku)
+    item = pattern_items.get(sku)
+    if item is None or sku in rechecked_skus or is_error_pattern(item):
+        return
+    recheck_queue.append(item)
+
+def review_cards(items):
+    """Kiralanmış item'ları kartlara böl - aynı gruptaki varyantlar tek kartta gösterilir
+
+    Kartta grubun ilk varyantı gösterilir, group_skus karar verilecek tüm varyantları listeler.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(review_groups.key(item), []).append(item)
+    return [dict(members[0].to_dict(), group_skus=[member['variant_sku'] for member in members])
+            for members in groups.values()]
+
+def get_current_pattern(n=1):
+    """Kullanıcı bazlı pattern döndür (her kullanıcı kendisine kiralanmış pattern'i görür)
+
+    n > 1 ise 'items' alanında kullanıcıya kiralanmış sıradaki n kart da döner
+    (istemci görselleri önceden yükleyebilsin diye).
+    """
+    if patterns_info is None:
+        load_patterns(rebuild_queue=False)
         load_reviewed_skus()
     
-    if patterns_data is None or len(patterns_data) == 0:
+    if len(pending_queue) == 0:
         return None
     
-    # Kullanıcı bazlı current_index (session'da saklanır)
     user_email = session.get('email', 'unknown')
-    current_index = session.get(f'current_index_{user_email}', 0)
-    
-    # Filtrele: Hem global olarak reviewed olanları hem de "Error" pattern'lerini atla
-    df = patterns_data[
-        ~patterns_data['Variant SKU'].astype(str).isin(reviewed_skus) &
-        (patterns_data['AI Detected Pattern'].astype(str).str.strip().str.upper() != 'ERROR')
-    ].copy()
-    
-    if len(df) == 0:
+    cards = review_cards(review_leases.claim(user_email, max(n, review_leases.batch_size)))[:n]
+    if not cards:
         return None
     
-    # Index'i sınırla
-    if current_index >= len(df):
-        current_index = 0
-        session[f'current_index_{user_email}'] = 0
-    
-    current_row = df.iloc[current_index]
-    return {
-        'variant_sku': current_row['Variant SKU'],
-        'product_sku': current_row['Product SKU'],
-        'ai_pattern': current_row['AI Detected Pattern'],
-        'image_url': current_row['Design Image URL'],
-        'total': len(patterns_data),
-        'reviewed': len(reviewed_skus),
-        'remaining': len(df)
-    }
+    return dict(cards[0], items=cards, total=patterns_info['rows'], reviewed=len(reviewed_skus), remaining=len(pending_queue))
 
-def get_current_recheck_pattern():
-    """Rejected pattern'leri tekrar kontrol için döndür"""
-    global patterns_data
-    
-    if patterns_data is None:
-        load_patterns()
+def decision_group(queue, leases, variant_sku, variant_skus=None):
+    """Kararın uygulanacağı item'lar: kartın grubundaki, kuyrukta bekleyen ve başkasına kiralı olmayan varyantlar
+
+    İstemci kartta gördüğü varyantları (variant_skus) gönderdiyse karar sadece onlara uygulanır.
+    """
+    user_email = session.get('email', 'unknown')
+    item = queue.get(variant_sku)
+    if item is None or leases.holder(variant_sku) not in (None, user_email):
+        return []
+    shown = {str(sku) for sku in variant_skus} if variant_skus else None
+    items = [item]
+    for sku in review_groups.members(item):
+        if sku == item['variant_sku'] or (shown is not None and sku not in shown):
+            continue
+        member = queue.get(sku)
+        if member is not None and leases.holder(sku) in (None, user_email):
+            items.append(member)
+    return items
+
+def get_patterns_for_decision(variant_sku=None, variant_skus=None):
+    """Karar verilecek pattern'leri bul - istemci SKU gönderdiyse onun kartını, yoksa mevcut kartı kullan"""
+    if not variant_sku:
+        pattern = get_current_pattern()
+        if pattern is None:
+            return []
+        variant_sku, variant_skus = pattern['variant_sku'], pattern['group_skus']
+    return decision_group(pending_queue, review_leases, variant_sku, variant_skus)
+
+# Grid modu: aynı AI pattern'ine sahip kartlar tek sayfada gösterilir, seçili olanlar tek kayıtla onaylanır
+GRID_PAGE_SIZE = int(os.environ.get('GRID_PAGE_SIZE', 24))
+
+def first_free_pattern(user_email):
+    """Kuyrukta bu kullanıcıya verilebilecek ilk kaydın AI pattern'i (grid'de pattern seçilmediyse)"""
+    item = pending_queue.first()
+    while item is not None:
+        if review_leases.holder(item['variant_sku']) in (None, user_email):
+            return item['ai_pattern']
+        item = pending_queue.after(item['variant_sku'], wrap=False)
+    return None
+
+def get_grid_page(ai_pattern=None, n=GRID_PAGE_SIZE):
+    """Aynı AI pattern'ine sahip n kartı kullanıcıya kirala ve grid sayfası olarak döndür"""
+    if patterns_info is None:
+        load_patterns(rebuild_queue=False)
+        load_reviewed_skus()
     
-    if patterns_data is None or len(patterns_data) == 0:
+    user_email = session.get('email', 'unknown')
+    ai_pattern = ai_pattern or first_free_pattern(user_email)
+    if ai_pattern is None:
+        return None
+    items = review_leases.claim(user_email, n, ai_pattern=ai_pattern)
+    cards = review_cards(items)[:n]
+    if not cards:
         return None
     
-    # Rejected SKU'ları yükle (recheck edilmemiş olanlar)
-    rejected_skus = load_rejected_skus()
+    return {'ai_pattern': ai_pattern, 'items': cards, 'total': patterns_info['rows'], 'reviewed': len(reviewed_skus), 'remaining': len(pending_queue)}
+
+def get_current_recheck_pattern(n=1):
+    """Rejected pattern'leri tekrar kontrol için döndür (kullanıcıya kiralanmış olanlar)"""
+    if patterns_info is None:
+        load_patterns()
     
-    if len(rejected_skus) == 0:
+    if len(recheck_queue) == 0:
         return None
     
-    # Kullanıcı bazlı current_index (session'da saklanır)
     user_email = session.get('email', 'unknown')
-    current_index = session.get(f'recheck_index_{user_email}', 0)
-    
-    # Sadece rejected olanları filtrele
-    df = patterns_data[
-        patterns_data['Variant SKU'].astype(str).isin(rejected_skus) &
-        (patterns_data['AI Detected Pattern'].astype(str).str.strip().str.upper() != 'ERROR')
-    ].copy()
+    cards = review_cards(recheck_leases.claim(user_email, max(n, recheck_leases.batch_size)))[:n]
+    if not cards:
+        return None
     
-    if len(df) == 0:
+    return dict(cards[0], items=cards, total=patterns_info['rows'], rejected_count=len(recheck_queue), remaining=len(recheck_queue))
+
+def get_recheck_patterns_for_decision(variant_sku=None, variant_skus=None):
+    """Recheck kararı verilecek pattern'leri bul - istemci SKU gönderdiyse onun kartını kullan"""
+    if not variant_sku:
+        pattern = get_current_recheck_pattern()
+        if pattern is None:
+            return []
+        variant_sku, variant_skus = pattern['variant_sku'], pattern['group_skus']
+    return decision_group(recheck_queue, recheck_leases, variant_sku, variant_skus)
+
+def get_grid_size():
+    """İstekteki ?n= parametresini grid sayfa boyutu aralığına çek"""
+    try:
+        n = int(request.args.get('n', GRID_PAGE_SIZE))
+    except ValueError:
+        n = GRID_PAGE_SIZE
+    return min(max(n, 1), GRID_PAGE_SIZE)
+
+def get_batch_size():
+    """İstekteki ?n= parametresini güvenli aralığa çek"""
+    try:
+        n = int(request.args.get('n', 1))
+    except ValueError:
+        n = 1
+    return min(max(n, 1), MAX_BATCH_SIZE)
+
+def get_requested_sku():
+    """POST gövdesindeki variant_sku alanını döndür (eski istemciler göndermez)"""
+    data = request.get_json(silent=True) or {}
+    return data.get('variant_sku')
+
+def get_requested_group():
+    """POST gövdesindeki variant_skus alanını (kartta gösterilen grup) döndür, yoksa None"""
+    data = request.get_json(silent=True) or {}
+    skus = data.get('variant_skus')
+    if not isinstance(skus, list):
         return None
+    return skus[:MAX_DECISIONS_PER_REQUEST]
+
+REVIEW_STATUSES = ('Approved', 'Rejected')
+REVIEW_UPDATE_COLUMNS = ('variant_sku', 'product_sku', 'ai_pattern', 'image_url', 'status', 'reviewed_by', 'timestamp')
+RECHECK_UPDATE_COLUMNS = ('product_sku', 'ai_pattern', 'image_url', 'recheck_status', 'reviewed_by', 'timestamp')
+
+def _insert_for_dialect(table):
+    """Veritabanına göre ON CONFLICT destekleyen INSERT ifadesi oluştur (PostgreSQL veya SQLite)"""
+    if engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+def upsert_reviews(rows):
+    """pattern_reviews tablosuna tek INSERT ... ON CONFLICT DO UPDATE ile toplu kayıt"""
+    # Aynı SKU bir batch içinde iki kez olamaz (ON CONFLICT aynı satırı iki kez güncelleyemez)
+    rows = list({row['id']: row for row in rows}.values())
+    if not rows:
+        return 0
+    stmt = _insert_for_dialect(PatternReview.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={col: stmt.excluded[col] for col in REVIEW_UPDATE_COLUMNS}
+    )
+    with db_session_scope() as db_session:
+        db_session.execute(stmt)
+        db_session.commit()
+    return len(rows)
+
+def upsert_rechecks(recheck_statuses, user_email, timestamp):
+    """pattern_rechecks tablosuna tek INSERT ... SELECT ... ON CONFLICT DO UPDATE ile toplu kayıt
+
+    recheck_statuses: {variant_sku: 'Approved' | 'Rejected'}. İlk kontrol durumu
+    (original_status) aynı ifade içinde pattern_reviews'dan okunur; ilk kontrol
+    kaydı olmayan SKU'lar atlanır. Yazılan satır sayısını döndürür.
+    """
+    if not recheck_statuses:
+        return 0
+    reviews = PatternReview.__table__
+    source = select(
+        reviews.c.id,
+        reviews.c.variant_sku,
+        reviews.c.product_sku,
+        reviews.c.ai_pattern,
+        reviews.c.image_url,
+        reviews.c.status,
+        case(recheck_statuses, value=reviews.c.variant_sku),
+        literal(user_email, String),
+        literal(timestamp, DateTime),
+    ).where(reviews.c.id.in_(list(recheck_statuses)))  # id = variant_sku (primary key)
+    stmt = _insert_for_dialect(PatternRecheck.__table__).from_select(
+        ['id', 'variant_sku', 'product_sku', 'ai_pattern', 'image_url',
+         'original_status', 'recheck_status', 'reviewed_by', 'timestamp'],
+        source
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={col: stmt.excluded[col] for col in RECHECK_UPDATE_COLUMNS}
+    )
+    with db_session_scope() as db_session:
+        result = db_session.execute(stmt)
+        db_session.commit()
+    return result.rowcount
+
+# Write-behind modu: kararlar önce yerel journal dosyasına yazılıp onaylanır,
+# arka plan thread'i bunları toplu olarak veritabanına aktarır
+WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get('WRITE_BEHIND_FLUSH_SECONDS', 1.0))
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+# Her process kendi journal dosyasına yazar (decision_journal.<pid>.jsonl)
+DECISION_JOURNAL_GLOB = "decision_journal*.jsonl"
+
+def decision_journal_path(pid=None):
+    return DATA_DIR / f"decision_journal.{pid or os.getpid()}.jsonl"
+
+class DecisionJournal:
+    """Veritabanına henüz yazılmamış kararlar için kalıcı (fsync'li) journal.
+
+    append() kararı dosyaya yazıp fsync ettikten sonra döner; arka plan thread'i
+    bekleyen kayıtları flush_fn ile toplu yazar ve yazılanları journal'dan siler.
+    Uygulama çökerse journal bir sonraki açılışta replay() ile geri yüklenir.
+    """
+
+    def __init__(self, path, flush_fn, interval=WRITE_BEHIND_FLUSH_SECONDS, batch_size=WRITE_BEHIND_BATCH_SIZE):
+        self.path = Path(path)
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _encode(row):
+        return json.dumps(dict(row, timestamp=row['timestamp'].isoformat()), ensure_ascii=False)
+
+    @staticmethod
+    def _decode(line):
+        row = json.loads(line)
+        row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+        return row
+
+    def append(self, rows):
+        """Kayıtları journal'a yaz ve diske garanti et"""
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(self._encode(row) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def replay(self):
+        """Önceki çalışmadan kalan journal kayıtlarını yükle ve döndür"""
+        if not self.path.exists():
+            return []
+        rows = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(self._decode(line))
+                except (ValueError, KeyError):
+                    # Çökme anında yarım kalmış son satır
+                    logger.warning(f"Journal satırı atlandı: {line[:80]!r}")
+        with self._lock:
+            self._pending = rows + self._pending
+        return rows
+
+    def _rewrite(self):
+        """Journal'ı sadece bekleyen kayıtlarla atomik olarak yeniden yaz (self._lock altında)"""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in self._pending:
+                f.write(self._encode(row) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def flush(self):
+        """Bekleyen kayıtları batch'ler halinde veritabanına yaz, yazılan kayıt sayısını döndür"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.batch_size]
+                if not batch:
+                    break
+                self.flush_fn(batch)
+                with self._lock:
+                    del self._pending[:len(batch)]
+                    self._rewrite()
+                written += len(batch)
+        return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Veritabanı erişilemiyorsa kayıtlar journal'da kalır, sonra tekrar denenir
+                logger.error(f"Write-behind flush hatası: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='decision-journal', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Thread'i durdur ve kalan kayıtları yaz (kapanışta)"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Kapanışta journal flush hatası (kayıtlar journal'da kaldı): {e}")
+
+    def __len__(self):
+        return len(self._pending)
+
+decision_journal = None  # WRITE_BEHIND açıksa başlangıçta oluşturulur
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def apply_journal_rows(rows):
+    """Henüz veritabanında olmayan kararları bellekteki kuyruklara uygula"""
+    for row in rows:
+        reviewed_skus.add(row['variant_sku'])
+        pending_queue.remove(row['variant_sku'])
+        if row['status'] == 'Rejected':
+            add_pending_recheck(row['variant_sku'])
+
+def recover_decision_journals():
+    """Önceki çalışmalardan (tüm worker'lardan) kalan journal'ları geri yükle ve veritabanına yaz"""
+    recovered = 0
+    for path in sorted(DATA_DIR.glob(DECISION_JOURNAL_GLOB)):
+        pid = path.stem.rsplit('.', 1)[-1]
+        if pid.isdigit() and int(pid) != os.getpid() and _process_alive(int(pid)):
+            continue  # Hâlâ çalışan bir worker'ın journal'ı
+        journal = DecisionJournal(path, upsert_reviews)
+        rows = journal.replay()
+        apply_journal_rows(rows)
+        try:
+            journal.flush()
+        except Exception as e:
+            # Kayıtlar dosyada kalır, bir sonraki açılışta tekrar denenir
+            logger.error(f"Journal kurtarma hatası ({path.name}): {e}")
+            continue
+        path.unlink(missing_ok=True)  # Başka bir worker da aynı dosyayı kurtarmış olabilir
+        recovered += len(rows)
+    if recovered:
+        logger.info(f"Journal'dan {recovered} karar geri yüklendi")
+    return recovered
+
+def start_write_behind():
+    """Bu process için write-behind journal'ını kur ve thread'i başlat"""
+    global decision_journal
+    decision_journal = DecisionJournal(decision_journal_path(), upsert_reviews)
+    # Aynı pid'in eski bir journal'ı varsa (pid tekrar kullanılmışsa) kayıtları kaybolmasın
+    apply_journal_rows(decision_journal.replay())
+    decision_journal.start()
+    atexit.register(decision_journal.stop)
+    logger.info("Write-behind modu aktif")
+
+def save_reviews(decisions, user_email):
+    """Kararları toplu kaydet. decisions: [(item, status), ...] - kaydedilen sayıyı döndürür"""
+    timestamp = datetime.now(timezone.utc)
     
-    # Index'i sınırla
-    if current_index >= len(df):
-        current_index = 0
-        session[f'recheck_index_{user_email}'] = 0
+    write = decision_journal.append if decision_journal is not None else upsert_reviews
+    write([{
+        'id': str(item['variant_sku']),
+        'variant_sku': str(item['variant_sku']),
+        'product_sku': item['product_sku'],
+        'ai_pattern': item['ai_pattern'],
+        'image_url': item['image_url'],
+        'status': status,
+        'reviewed_by': user_email,
+        'timestamp': timestamp
+    } for item, status in decisions])
     
-    current_row = df.iloc[current_index]
-    return {
-        'variant_sku': current_row['Variant SKU'],
-        'product_sku': current_row['Product SKU'],
-        'ai_pattern': current_row['AI Detected Pattern'],
-        'image_url': current_row['Design Image URL'],
-        'total': len(patterns_data),
-        'rejected_count': len(rejected_skus),
-        'remaining': len(df)
-    }
+    metrics.record_decisions('review', [status for _, status in decisions])
+    for item, status in decisions:
+        reviewed_skus.add(str(item['variant_sku']))
+        pending_queue.remove(item['variant_sku'])
+        if status == 'Rejected':
+            add_pending_recheck(item['variant_sku'])
+        else:
+            recheck_queue.remove(item['variant_sku'])
+    return len(decisions)
 
-def save_review(variant_sku, product_sku, ai_pattern, image_url, approved=True):
-    """Veritabanına kaydet veya CSV'ye (fallback)"""
-    timestamp = datetime.now(timezone.utc)
+def save_review(items, approved=True):
+    """Kartın kararını gruptaki tüm varyantlara tek toplu yazımla kaydet, kaydedilemezse False döndür"""
     user_email = session.get('email', 'unknown')
     status = 'Approved' if approved else 'Rejected'
     
-    # Detaylı log ekle
-    print(f"🔍 save_review çağrıldı: USE_DATABASE={USE_DATABASE}, variant_sku={variant_sku}, status={status}", flush=True)
+    try:
+        save_reviews([(item, status) for item in items], user_email)
+        log_decision("Karar kaydedildi: %s - %s (%d varyant)", items[0]['variant_sku'], status, len(items))
+        return True
+    except Exception as e:
+        logger.exception(f"Veritabanı kayıt hatası: {e}")
+        return False
+
+def save_recheck_reviews(recheck_statuses, user_email):
+    """Recheck kararlarını toplu kaydet. recheck_statuses: {variant_sku: status}"""
+    if decision_journal is not None and len(decision_journal):
+        # Recheck ilk kontrol kaydını pattern_reviews'dan okur; journal'da bekleyen varsa önce yaz
+        decision_journal.flush()
+    saved = upsert_rechecks(recheck_statuses, user_email, datetime.now(timezone.utc))
+    metrics.record_decisions('recheck', list(recheck_statuses.values()))
+    for sku in recheck_statuses:
+        # reviewed_skus'a ekle (artık tekrar gösterilmesin)
+        reviewed_skus.add(str(sku))
+        rechecked_skus.add(str(sku))
+        pending_queue.remove(sku)
+        recheck_queue.remove(sku)
+    return saved
+
+def save_recheck_review(items, approved=True):
+    """İkinci kontrol (recheck) sonucunu gruptaki tüm varyantlara kaydet, kaydedilemezse False döndür"""
+    user_email = session.get('email', 'unknown')
+    recheck_status = 'Approved' if approved else 'Rejected'
+    variant_sku = items[0]['variant_sku']
     
-    if USE_DATABASE:
-        try:
-            print(f"🔍 Veritabanına kaydediliyor...", flush=True)
-            db_session = SessionLocal()
-            print(f"🔍 Database session oluşturuldu", flush=True)
-            
-            # Mevcut kaydı kontrol et
-            existing = db_session.query(PatternReview).filter_by(variant_sku=str(variant_sku)).first()
-            print(f"🔍 Mevcut kayıt kontrolü: {'VAR' if existing else 'YOK'}", flush=True)
-            
-            if existing:
-                # Güncelle
-                existing.product_sku = product_sku
-                existing.ai_pattern = ai_pattern
-                existing.image_url = image_url
-                existing.status = status
-                existing.reviewed_by = user_email
-                existing.timestamp = timestamp
-                print(f"🔍 Mevcut kayıt güncelleniyor...", flush=True)
+    try:
+        if save_recheck_reviews({str(item['variant_sku']): recheck_status for item in items}, user_email):
+            log_decision("Recheck kararı kaydedildi: %s - %s (%d varyant)", variant_sku, recheck_status, len(items))
+        else:
+            logger.warning(f"İlk kontrol kaydı bulunamadı: {variant_sku}")
+        return True
+    except Exception as e:
+        logger.exception(f"Recheck kayıt hatası: {e}")
+        return False
+
+# Worker'lar arası senkronizasyon: diğer process'lerin kaydettiği kararlar
+# pattern_reviews/pattern_rechecks.timestamp üzerinden periyodik olarak çekilir
+REVIEW_SYNC_SECONDS = float(os.environ.get('REVIEW_SYNC_SECONDS', 5))
+REVIEW_SYNC_OVERLAP_SECONDS = float(os.environ.get('REVIEW_SYNC_OVERLAP_SECONDS', 30))
+
+class ReviewChangeFeed:
+    """Timestamp watermark ile yeni kararları çeker ve sadece farkları bellekteki duruma uygular.
+
+    Geç commit edilen (veya write-behind ile sonradan yazılan) kayıtlar
+    kaçmasın diye her sorgu watermark'tan overlap kadar geriden başlar;
+    uygulama idempotent olduğu için tekrar gelen kayıtlar zararsızdır.
+    """
+
+    def __init__(self, interval=REVIEW_SYNC_SECONDS, overlap=REVIEW_SYNC_OVERLAP_SECONDS):
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap)
+        self.watermark = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prime(self):
+        """Watermark'ı veritabanındaki en son karar zamanına ayarla (tam yüklemeden hemen önce)"""
+        with db_session_scope() as db_session:
+            latest = [
+                db_session.execute(select(func.max(PatternReview.timestamp))).scalar(),
+                db_session.execute(select(func.max(PatternRecheck.timestamp))).scalar(),
+            ]
+        latest = [ts for ts in latest if ts is not None]
+        self.watermark = max(latest) if latest else None
+
+    def poll(self):
+        """Watermark'tan sonraki kararları çek ve uygula, yeni uygulanan SKU sayısını döndür"""
+        since = self.watermark - self.overlap if self.watermark is not None else None
+        reviews = select(PatternReview.variant_sku, PatternReview.timestamp, PatternReview.status)
+        rechecks = select(PatternRecheck.variant_sku, PatternRecheck.timestamp, literal(None, String))
+        if since is not None:
+            reviews = reviews.where(PatternReview.timestamp > since)
+            rechecks = rechecks.where(PatternRecheck.timestamp > since)
+        with db_session_scope() as db_session:
+            rows = db_session.execute(reviews).all() + db_session.execute(rechecks).all()
+        
+        applied = 0
+        # Önce ilk kontroller, sonra recheck'ler uygulanır (status None = recheck satırı)
+        for variant_sku, ts, status in rows:
+            sku = str(variant_sku)
+            if sku not in reviewed_skus:
+                applied += 1
+            # Kararı kaydeden worker'ın yerelde yaptığının aynısı
+            reviewed_skus.add(sku)
+            pending_queue.remove(sku)
+            if status is None:
+                rechecked_skus.add(sku)
+                recheck_queue.remove(sku)
+            elif status == 'Rejected':
+                add_pending_recheck(sku)
             else:
-                # Yeni kayıt
-                review = PatternReview(
-                    id=str(variant_sku),
-                    variant_sku=str(variant_sku),
-                    product_sku=product_sku,
-                    ai_pattern=ai_pattern,
-                    image_url=image_url,
-                    status=status,
-                    reviewed_by=user_email,
-                    timestamp=timestamp
-                )
-                db_session.add(review)
-                print(f"🔍 Yeni kayıt eklendi: {variant_sku}", flush=True)
-            
-            db_session.commit()
-            print(f"🔍 Commit başarılı", flush=True)
-            db_session.close()
-            reviewed_skus.add(str(variant_sku))
-            print(f"✅ Kayıt veritabanına kaydedildi: {variant_sku} - {status}", flush=True)
-        except Exception as e:
-            print(f"❌ Veritabanı kayıt hatası: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            print(f"❌ Hata detayları yukarıda", flush=True)
-    else:
-        print(f"⚠️ USE_DATABASE=False, CSV'ye kaydediliyor (ama Render'da kalıcı değil!)", flush=True)
-        # Fallback: CSV'ye kaydet
-        filename = DATA_DIR / ("approved_patterns.csv" if approved else "rejected_patterns.csv")
-        data = {
-            'Variant SKU': variant_sku,
-            'Product SKU': product_sku,
-            'AI Detected Pattern': ai_pattern,
-            'Design Image URL': image_url,
-            'Status': status,
-            'Reviewed By': user_email,
-            'Timestamp': timestamp.isoformat()
-        }
-        df = pd.DataFrame([data])
-        if filename.exists():
-            df.to_csv(filename, mode='a', header=False, index=False, encoding='utf-8-sig')
+                recheck_queue.remove(sku)
+            if ts is not None and (self.watermark is None or ts > self.watermark):
+                self.watermark = ts
+        return applied
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                applied = self.poll()
+                if applied:
+                    logger.debug(f"Diğer worker'lardan {applied} karar senkronize edildi")
+            except Exception as e:
+                logger.error(f"Karar senkronizasyon hatası: {e}")
+            for leases in (review_leases, recheck_leases):
+                leases.prune_shared()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='review-change-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+review_change_feed = ReviewChangeFeed()
+
+# Metrikler (/metrics, Prometheus metin formatı) - worker sayısı > 1 ise her worker
+# kendi sayaçlarını periyodik olarak data/metrics/<pid>.json'a yazar, /metrics hepsini toplar
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Verilirse /metrics "Authorization: Bearer <token>" ister
+METRICS_DIR = DATA_DIR / "metrics"
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+METRICS_MULTIPROCESS = int(os.environ.get('WEB_CONCURRENCY', 1)) > 1
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERIES_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRIC_HELP = {
+    'http_request_duration_seconds': ('histogram', 'İstek süresi (route bazında)'),
+    'http_requests_total': ('counter', 'Tamamlanan istek sayısı'),
+    'http_requests_in_flight': ('gauge', 'Şu an işlenen istek sayısı'),
+    'db_queries_per_request': ('histogram', 'İstek başına veritabanı sorgu sayısı'),
+    'db_query_duration_seconds': ('histogram', 'Sorgu süresi (route ve işlem türü bazında)'),
+    'db_slow_queries_total': ('counter', 'SLOW_QUERY_MS eşiğini aşan sorgu sayısı'),
+    'db_pool_size': ('gauge', 'Bağlantı havuzu boyutu (worker toplamı)'),
+    'db_pool_checked_out': ('gauge', 'Şu an kullanımdaki bağlantı sayısı'),
+    'db_pool_overflow': ('gauge', 'Havuz boyutunun üstünde açılmış bağlantı sayısı'),
+    'db_pool_checkout_seconds': ('histogram', 'Havuzdan bağlantı alma süresi (bekleme + pre-ping)'),
+    'db_pool_timeouts_total': ('counter', 'DB_POOL_TIMEOUT içinde bağlantı alınamayan istek sayısı'),
+    'review_decisions_total': ('counter', 'Kaydedilen karar sayısı'),
+    'review_decisions_per_minute': ('gauge', 'Son 60 saniyedeki karar sayısı'),
+    'review_pending_queue_depth': ('gauge', 'İlk kontrolü bekleyen kayıt sayısı'),
+    'review_recheck_queue_depth': ('gauge', 'Recheck bekleyen kayıt sayısı'),
+    'review_active_reviewers': ('gauge', 'Süresi dolmamış kirası olan kullanıcı sayısı'),
+}
+
+class MetricsRegistry:
+    """prometheus_client bağımlılığı olmadan thread-safe sayaç/histogram deposu"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}  # (name, labels) -> değer
+        self.histograms = {}  # (name, labels) -> [bucket sayıları..., toplam, adet]
+        self.in_flight = 0
+        self._decision_seconds = {}  # epoch saniyesi -> karar sayısı (son 60 sn)
+        self._gauges = {}  # name -> fonksiyon (process başına değer, worker'lar arasında toplanır)
+        self._thread = None
+
+    def register_gauge(self, name, read):
+        self._gauges[name] = read
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            key = (name, labels)
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    def add_in_flight(self, delta):
+        with self._lock:
+            self.in_flight += delta
+
+    def record_decisions(self, kind, statuses):
+        now = int(time.time())
+        with self._lock:
+            for status in statuses:
+                key = ('review_decisions_total', (('kind', kind), ('status', status)))
+                self.counters[key] = self.counters.get(key, 0) + 1
+            self._decision_seconds[now] = self._decision_seconds.get(now, 0) + len(statuses)
+            for second in [sec for sec in self._decision_seconds if sec <= now - 60]:
+                del self._decision_seconds[second]
+
+    def snapshot(self):
+        """JSON'a yazılabilir anlık görüntü"""
+        gauges = {name: read() for name, read in self._gauges.items()}
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), hist] for (name, labels), hist in self.histograms.items()],
+                'in_flight': self.in_flight,
+                'decision_seconds': list(self._decision_seconds.items()),
+                'gauges': gauges,
+            }
+
+    def write_snapshot(self):
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        path = METRICS_DIR / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def _run(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Metrik dosyası yazılamadı: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='metrics-flush', daemon=True)
+        self._thread.start()
+
+metrics = MetricsRegistry()
+METRIC_BUCKETS = {
+    'http_request_duration_seconds': HTTP_LATENCY_BUCKETS,
+    'db_queries_per_request': DB_QUERIES_BUCKETS,
+    'db_query_duration_seconds': DB_LATENCY_BUCKETS,
+    'db_pool_checkout_seconds': DB_LATENCY_BUCKETS,
+}
+
+def _pool_stat(name):
+    # Bellek içi SQLite gibi havuzlarda bu sayaçlar yoktur
+    read = getattr(engine.pool, name, None)
+    return read() if read is not None else 0
+
+metrics.register_gauge('db_pool_size', lambda: _pool_stat('size'))
+metrics.register_gauge('db_pool_checked_out', lambda: _pool_stat('checkedout'))
+metrics.register_gauge('db_pool_overflow', lambda: max(_pool_stat('overflow'), 0))  # QueuePool -pool_size'dan başlar
+
+# Sorgu enstrümantasyonu - her SQL ifadesi süresiyle birlikte onu çalıştıran route'a
+# (istek dışındaysa thread adına) yazılır, yavaş olanlar log'a düşer
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 250))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))  # Bir istekte aynı SELECT bu kadar tekrarlanırsa uyarı
+# Testlerde/debug'da NPlusOneWarning olarak verilir (testler hataya çevirebilir), production'da sadece log'a yazılır
+N_PLUS_ONE_WARNINGS = os.environ.get('N_PLUS_ONE_WARNINGS', '').lower() in ('1', 'true', 'yes')
+
+class NPlusOneWarning(UserWarning):
+    """Bir istek aynı sorguyu döngü içinde tekrar tekrar çalıştırıyor"""
+
+def query_route():
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    return f"thread:{threading.current_thread().name}"
+
+def short_sql(statement, limit=300):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+@event.listens_for(engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    elapsed = time.perf_counter() - started
+    route = query_route()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else '?'
+    metrics.observe('db_query_duration_seconds', (('route', route), ('operation', operation)), elapsed, DB_LATENCY_BUCKETS)
+    if has_request_context():
+        g.db_queries = g.get('db_queries', 0) + 1
+        g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+        if operation == 'SELECT':
+            counts = g.setdefault('db_statements', {})
+            counts[statement] = counts.get(statement, 0) + 1
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        metrics.inc('db_slow_queries_total', (('route', route),))
+        slow_query_logger.warning("%.1f ms [%s]: %s", elapsed * 1000, route, short_sql(statement),
+                                  extra={'route': route, 'duration_ms': round(elapsed * 1000, 1)})
+
+@event.listens_for(engine, 'handle_error')
+def discard_query_timer(context):
+    # Hata veren sorguda after_cursor_execute çalışmaz, başlangıç zamanı yığında kalmasın
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+def check_n_plus_one():
+    """Bu istekte N_PLUS_ONE_THRESHOLD kez veya daha fazla tekrarlanan SELECT'leri bildir
+
+    app.debug veya N_PLUS_ONE_WARNINGS açıksa NPlusOneWarning verilir, değilse log'a yazılır.
+    """
+    repeated = {statement: count for statement, count in g.get('db_statements', {}).items()
+                if count >= N_PLUS_ONE_THRESHOLD}
+    as_warning = N_PLUS_ONE_WARNINGS or app.debug
+    for statement, count in repeated.items():
+        message = f"[{query_route()}] aynı sorgu {count} kez çalıştı: {short_sql(statement, 160)}"
+        if as_warning:
+            warnings.warn(NPlusOneWarning(message), stacklevel=2)
         else:
-            df.to_csv(filename, index=False, encoding='utf-8-sig')
-        reviewed_skus.add(str(variant_sku))
-        print(f"⚠️ CSV'ye kaydedildi (kalıcı değil!): {variant_sku}", flush=True)
+            logger.warning(f"Olası N+1 sorgu {message}")
+    return repeated
+
+# İlk yükleme - port hemen açılsın diye ağır işler (migration, kontrol listesi,
+# kararlar) import sırasında değil warm_up() ile yapılır. WARMUP_MODE=sync ise
+# import sırasında çalışır (gunicorn preload ile worker'lar hazır durumu paylaşır).
+WARMUP_MODE = os.environ.get('WARMUP_MODE', 'background').lower()
+WARMUP_WAIT_SECONDS = float(os.environ.get('WARMUP_WAIT_SECONDS', 0.8))  # API isteği hazır olmayı en fazla bu kadar bekler
+WARMUP_RETRY_MAX_SECONDS = 30
+warmup_state = {'status': 'pending', 'steps': {}, 'error': None, 'attempts': 0}
+warmup_done = threading.Event()
+
+def prime_review_sync():
+    try:
+        review_change_feed.prime()
+    except Exception as e:
+        logger.error(f"Senkronizasyon watermark hatası: {e}")
 
-def save_recheck_review(variant_sku, product_sku, ai_pattern, image_url, approved=True):
-    """İkinci kontrol (recheck) sonuçlarını kaydet"""
-    timestamp = datetime.now(timezone.utc)
-    user_email = session.get('email', 'unknown')
-    recheck_status = 'Approved' if approved else 'Rejected'
-    
-    print(f"🔍 save_recheck_review çağrıldı: variant_sku={variant_sku}, recheck_status={recheck_status}", flush=True)
-    
-    if USE_DATABASE:
-        try:
-            db_session = SessionLocal()
-            
-            # İlk kontrol sonucunu al
-            original_review = db_session.query(PatternReview).filter_by(variant_sku=str(variant_sku)).first()
-            if not original_review:
-                print(f"❌ İlk kontrol kaydı bulunamadı: {variant_sku}", flush=True)
-                db_session.close()
-                return
-            
-            original_status = original_review.status
-            
-            # Recheck kaydını kontrol et
-            existing_recheck = db_session.query(PatternRecheck).filter_by(variant_sku=str(variant_sku)).first()
-            
-            if existing_recheck:
-                # Güncelle
-                existing_recheck.product_sku = product_sku
-                existing_recheck.ai_pattern = ai_pattern
-                existing_recheck.image_url = image_url
-                existing_recheck.recheck_status = recheck_status
-                existing_recheck.reviewed_by = user_email
-                existing_recheck.timestamp = timestamp
-                print(f"🔍 Mevcut recheck kaydı güncelleniyor...", flush=True)
-            else:
-                # Yeni recheck kaydı
-                recheck = PatternRecheck(
-                    id=str(variant_sku),
-                    variant_sku=str(variant_sku),
-                    product_sku=product_sku,
-                    ai_pattern=ai_pattern,
-                    image_url=image_url,
-                    original_status=original_status,
-                    recheck_status=recheck_status,
-                    reviewed_by=user_email,
-                    timestamp=timestamp
-                )
-                db_session.add(recheck)
-                print(f"🔍 Yeni recheck kaydı eklendi: {variant_sku}", flush=True)
-            
-            db_session.commit()
-            db_session.close()
-            print(f"✅ Recheck kaydı veritabanına kaydedildi: {variant_sku} - {recheck_status}", flush=True)
-        except Exception as e:
-            print(f"❌ Recheck kayıt hatası: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+def warmup_steps():
+    return [
+        ('migrations', migrate_database),
+        ('patterns', lambda: load_patterns(rebuild_queue=False)),  # Kuyruğu reviewed_skus adımı kurar
+        ('sync_watermark', prime_review_sync),
+        # Okuma hatası adımı başarısız saysın ve tekrar denensin (boş kümeyle devam edilmesin)
+        ('reviewed_skus', lambda: load_reviewed_skus(raise_errors=True)),
+        ('recheck_queue', lambda: rebuild_recheck_queue(raise_errors=True)),
+        ('journal_recovery', recover_decision_journals),
+    ]
+
+def run_warmup_step(name, step):
+    """Tek başlangıç adımını çalıştır ve durumunu kaydet, başarılıysa True döndür"""
+    warmup_state['steps'][name] = {'status': 'running'}
+    warmup_state['attempts'] += 1
+    started = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        warmup_state['error'] = f"{name}: {e}"
+        warmup_state['steps'][name] = {'status': 'retrying', 'error': str(e)}
+        return False
+    warmup_state['steps'][name] = {'status': 'done', 'seconds': round(time.perf_counter() - started, 3)}
+    return True
+
+def migrate_before_fork():
+    """Migration'ları gunicorn master'da fork'tan önce bir kez dene (başarısız olursa worker'ların warm-up'ı tekrar dener)"""
+    if warmup_state['steps'].get('migrations', {}).get('status') == 'done':
+        return
+    if not run_warmup_step('migrations', migrate_database):
+        logger.error(f"Master'da migration başarısız, worker'larda tekrar denenecek: {warmup_state['error']}")
+
+def warm_up():
+    """Başlangıç adımlarını sırayla çalıştır; hata veren adım (ör. veritabanı uyanmadıysa) artan aralıklarla tekrar denenir"""
+    if warmup_done.is_set():
+        return
+    warmup_state['status'] = 'running'
+    for name, step in warmup_steps():
+        delay = 1
+        # Fork'tan önce master'da tamamlanan adımlar (migration) worker'larda tekrar çalışmaz
+        while warmup_state['steps'].get(name, {}).get('status') != 'done':
+            if run_warmup_step(name, step):
+                break
+            logger.error(f"Başlangıç adımı başarısız ({name}), {delay} sn sonra tekrar denenecek: {warmup_state['error']}")
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+    warmup_state['status'] = 'ready'
+    warmup_state['error'] = None
+    warmup_done.set()
+    logger.info("Uygulama hazır")
+
+patterns_watcher = PatternsFileWatcher(PATTERNS_FILE)
+_background_pid = None
+
+def _start_worker_threads():
+    if WRITE_BEHIND:
+        start_write_behind()
+    if REVIEW_SYNC_SECONDS > 0:
+        review_change_feed.start()
+    if PATTERNS_WATCH_SECONDS > 0:
+        patterns_watcher.start()
+    if METRICS_MULTIPROCESS:
+        metrics.start()
+
+def _warm_up_then_start():
+    warm_up()
+    _start_worker_threads()
+
+def start_background_workers():
+    """Bu process'in arka plan thread'lerini başlat (gunicorn'da her worker fork'tan sonra çağırır)
+
+    Warm-up henüz yapılmadıysa önce arka planda o çalışır, diğer thread'ler ardından başlar.
+    """
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    _background_pid = os.getpid()
+    if warmup_done.is_set():
+        _start_worker_threads()
     else:
-        print(f"⚠️ USE_DATABASE=False, recheck CSV'ye kaydedilemiyor!", flush=True)
+        threading.Thread(target=_warm_up_then_start, name='warm-up', daemon=True).start()
 
-# İlk yükleme
-load_patterns()
-load_reviewed_skus()
+if WARMUP_MODE == 'sync':
+    warm_up()
+
+# gunicorn preload modunda thread'ler master'da değil worker'larda başlatılır (gunicorn.conf.py)
+if os.environ.get('DEFER_BACKGROUND_WORKERS', '').lower() not in ('1', 'true', 'yes'):
+    start_background_workers()
 
 LOGIN_TEMPLATE = """
 <!DOCTYPE html>
@@ -393,84 +2051,7 @@ LOGIN_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Giriş - Pattern Kontrol Sistemi</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 1rem;
-        }
-        .login-container {
-            background: white;
-            border-radius: 20px;
-            padding: 2rem;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-            max-width: 400px;
-            width: 100%;
-        }
-        h1 { text-align: center; color: #333; margin-bottom: 0.5rem; }
-        .subtitle { text-align: center; color: #666; font-size: 0.9rem; margin-bottom: 2rem; }
-        .form-group {
-            margin-bottom: 1.5rem;
-        }
-        label {
-            display: block;
-            margin-bottom: 0.5rem;
-            color: #333;
-            font-weight: 500;
-        }
-        input[type="email"] {
-            width: 100%;
-            padding: 1rem;
-            border: 2px solid #e0e0e0;
-            border-radius: 10px;
-            font-size: 1rem;
-            transition: border-color 0.3s;
-        }
-        input[type="email"]:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        .btn-login {
-            width: 100%;
-            padding: 1rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 10px;
-            font-size: 1.1rem;
-            font-weight: bold;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        .btn-login:hover {
-            transform: scale(1.02);
-        }
-        .btn-login:active {
-            transform: scale(0.98);
-        }
-        .error {
-            background: #ffebee;
-            color: #c62828;
-            padding: 0.8rem;
-            border-radius: 10px;
-            margin-bottom: 1rem;
-            text-align: center;
-        }
-        .info {
-            background: #e3f2fd;
-            color: #1976d2;
-            padding: 0.8rem;
-            border-radius: 10px;
-            margin-top: 1rem;
-            text-align: center;
-            font-size: 0.9rem;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('login.css') }}">
 </head>
 <body>
     <div class="login-container">
@@ -497,6 +2078,85 @@ LOGIN_TEMPLATE = """
 </html>
 """
 
+LOGIN_CSS = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    padding: 1rem;
+}
+.login-container {
+    background: white;
+    border-radius: 20px;
+    padding: 2rem;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+    max-width: 400px;
+    width: 100%;
+}
+h1 { text-align: center; color: #333; margin-bottom: 0.5rem; }
+.subtitle { text-align: center; color: #666; font-size: 0.9rem; margin-bottom: 2rem; }
+.form-group {
+    margin-bottom: 1.5rem;
+}
+label {
+    display: block;
+    margin-bottom: 0.5rem;
+    color: #333;
+    font-weight: 500;
+}
+input[type="email"] {
+    width: 100%;
+    padding: 1rem;
+    border: 2px solid #e0e0e0;
+    border-radius: 10px;
+    font-size: 1rem;
+    transition: border-color 0.3s;
+}
+input[type="email"]:focus {
+    outline: none;
+    border-color: #667eea;
+}
+.btn-login {
+    width: 100%;
+    padding: 1rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: none;
+    border-radius: 10px;
+    font-size: 1.1rem;
+    font-weight: bold;
+    cursor: pointer;
+    transition: transform 0.2s;
+}
+.btn-login:hover {
+    transform: scale(1.02);
+}
+.btn-login:active {
+    transform: scale(0.98);
+}
+.error {
+    background: #ffebee;
+    color: #c62828;
+    padding: 0.8rem;
+    border-radius: 10px;
+    margin-bottom: 1rem;
+    text-align: center;
+}
+.info {
+    background: #e3f2fd;
+    color: #1976d2;
+    padding: 0.8rem;
+    border-radius: 10px;
+    margin-top: 1rem;
+    text-align: center;
+    font-size: 0.9rem;
+}
+"""
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="tr">
@@ -504,119 +2164,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Pattern Kontrol Sistemi</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 1rem;
-        }
-        .container {
-            max-width: 600px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            padding: 1.5rem;
-            box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-        }
-        h1 { text-align: center; color: #333; margin-bottom: 0.5rem; }
-        .subtitle { text-align: center; color: #666; font-size: 0.9rem; margin-bottom: 1rem; }
-        .progress {
-            background: #e3f2fd;
-            padding: 0.8rem;
-            border-radius: 10px;
-            text-align: center;
-            margin-bottom: 1rem;
-            font-weight: bold;
-        }
-        .image-container {
-            position: relative;
-            width: 100%;
-            margin: 1rem 0;
-            touch-action: pan-y;
-        }
-        .swipe-indicator {
-            position: absolute;
-            top: 50%;
-            transform: translateY(-50%);
-            font-size: 5rem;
-            opacity: 0;
-            transition: opacity 0.3s;
-            z-index: 10;
-            pointer-events: none;
-            font-weight: bold;
-        }
-        .swipe-indicator.left { left: 20px; color: #f44336; }
-        .swipe-indicator.right { right: 20px; color: #4CAF50; }
-        .swipe-indicator.active { opacity: 0.9; }
-        .rug-image {
-            width: 100%;
-            max-height: 400px;
-            object-fit: contain;
-            border-radius: 10px;
-            display: block;
-            margin: 0 auto;
-            touch-action: pan-y;
-            cursor: pointer;
-        }
-        .info-box {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 1rem;
-            border-radius: 10px;
-            margin: 1rem 0;
-            text-align: center;
-        }
-        .info-box h3 { font-size: 1.5rem; margin-bottom: 0.5rem; }
-        .info-box p { font-size: 0.9rem; opacity: 0.9; }
-        .buttons {
-            display: flex;
-            gap: 1rem;
-        }
-        .btn {
-            flex: 1;
-            padding: 1.2rem;
-            font-size: 1.3rem;
-            font-weight: bold;
-            border: none;
-            border-radius: 15px;
-            cursor: pointer;
-            transition: transform 0.2s, box-shadow 0.2s;
-        }
-        .btn:active { transform: scale(0.95); }
-        .btn-approve {
-            background: #4CAF50;
-            color: white;
-            box-shadow: 0 4px 15px rgba(76, 175, 80, 0.4);
-        }
-        .btn-reject {
-            background: #f44336;
-            color: white;
-            box-shadow: 0 4px 15px rgba(244, 67, 54, 0.4);
-        }
-        .btn-next {
-            background: #2196F3;
-            color: white;
-            box-shadow: 0 4px 15px rgba(33, 150, 243, 0.4);
-        }
-        @media (max-width: 768px) {
-            .buttons { 
-                flex-direction: row; 
-                gap: 0.8rem;
-            }
-            .btn { 
-                padding: 1.5rem; 
-                font-size: 1.4rem; 
-            }
-            .info-box {
-                padding: 0.8rem;
-            }
-            .info-box h3 {
-                font-size: 1.2rem;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('review.css') }}">
 </head>
 <body>
     <div class="container">
@@ -643,163 +2191,743 @@ HTML_TEMPLATE = """
         <button class="btn btn-next" onclick="nextPattern()" style="width: 100%; margin-bottom: 1rem;">⏭️ Sonraki</button>
         
         <div class="progress" id="progress">Yükleniyor...</div>
+        <div class="decision-error" id="decisionError" hidden></div>
         
         <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid #e0e0e0;">
             <div>
-                <h2 style="margin: 0; font-size: 1.2rem; color: #333;">🎨 Pattern Kontrol Sistemi</h2>
+                <h2 style="margin: 0; font-size: 1.2rem; color: #333;">{% if page.recheck %}🔄 Recheck - Reddedilen Pattern'ler{% else %}🎨 Pattern Kontrol Sistemi{% endif %}</h2>
             </div>
             <div style="text-align: right;">
                 <div style="font-size: 0.9rem; color: #666; margin-bottom: 0.3rem;">👤 {{ session.email }}</div>
                 <div>
+                    {% if page.recheck %}<a href="/" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">🏠 Ana Sayfa</a>{% endif %}
                     <a href="/results" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">📊 Sonuçlarım</a>
                     <a href="/recheck" style="color: #ff9800; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">🔄 Recheck</a>
+                    <a href="/grid" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">🔲 Grid</a>
                     <a href="/logout" style="color: #f44336; text-decoration: none; font-size: 0.9rem;">Çıkış</a>
                 </div>
             </div>
         </div>
     </div>
 
-    <script>
-        let startX = 0, startY = 0, currentX = 0, isDragging = false;
-        const threshold = 80;
-        
-        const imageEl = document.getElementById('rugImage');
-        const indicatorLeft = document.getElementById('indicatorLeft');
-        const indicatorRight = document.getElementById('indicatorRight');
-        
-        // Swipe events
-        imageEl.addEventListener('touchstart', function(e) {
-            startX = e.touches[0].clientX;
-            startY = e.touches[0].clientY;
-            isDragging = true;
-            console.log('👆 Touch start:', startX, startY);
-        }, {passive: false});
-        
-        imageEl.addEventListener('touchmove', function(e) {
-            if (!isDragging) return;
-            currentX = e.touches[0].clientX;
-            const deltaX = currentX - startX;
-            const deltaY = Math.abs(e.touches[0].clientY - startY);
-            
-            if (Math.abs(deltaX) > deltaY && Math.abs(deltaX) > 20) {
-                e.preventDefault();
-                if (deltaX > 0) {
-                    indicatorRight.classList.add('active');
-                    indicatorLeft.classList.remove('active');
-                } else {
-                    indicatorLeft.classList.add('active');
-                    indicatorRight.classList.remove('active');
-                }
-            }
-        }, {passive: false});
-        
-        imageEl.addEventListener('touchend', function(e) {
-            if (!isDragging) return;
-            isDragging = false;
-            const deltaX = currentX - startX;
-            
+    <script id="page-config" type="application/json">{{ page|tojson }}</script>
+    <script src="{{ asset_url('review.js') }}"></script>
+</body>
+</html>
+"""
+
+REVIEW_CSS = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    padding: 1rem;
+}
+.container {
+    max-width: 600px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 20px;
+    padding: 1.5rem;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+}
+h1 { text-align: center; color: #333; margin-bottom: 0.5rem; }
+.subtitle { text-align: center; color: #666; font-size: 0.9rem; margin-bottom: 1rem; }
+.progress {
+    background: #e3f2fd;
+    padding: 0.8rem;
+    border-radius: 10px;
+    text-align: center;
+    margin-bottom: 1rem;
+    font-weight: bold;
+}
+.image-container {
+    position: relative;
+    width: 100%;
+    margin: 1rem 0;
+    touch-action: pan-y;
+}
+.swipe-indicator {
+    position: absolute;
+    top: 50%;
+    transform: translateY(-50%);
+    font-size: 5rem;
+    opacity: 0;
+    transition: opacity 0.3s;
+    z-index: 10;
+    pointer-events: none;
+    font-weight: bold;
+}
+.swipe-indicator.left { left: 20px; color: #f44336; }
+.swipe-indicator.right { right: 20px; color: #4CAF50; }
+.swipe-indicator.active { opacity: 0.9; }
+.rug-image {
+    width: 100%;
+    max-height: 400px;
+    object-fit: contain;
+    border-radius: 10px;
+    display: block;
+    margin: 0 auto;
+    touch-action: pan-y;
+    cursor: pointer;
+}
+.decision-error {
+    background: #ffebee;
+    color: #c62828;
+    padding: 0.8rem;
+    border-radius: 10px;
+    text-align: center;
+    margin-bottom: 1rem;
+    font-weight: bold;
+}
+.info-box {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 1rem;
+    border-radius: 10px;
+    margin: 1rem 0;
+    text-align: center;
+}
+.info-box h3 { font-size: 1.5rem; margin-bottom: 0.5rem; }
+.info-box p { font-size: 0.9rem; opacity: 0.9; }
+.buttons {
+    display: flex;
+    gap: 1rem;
+}
+.btn {
+    flex: 1;
+    padding: 1.2rem;
+    font-size: 1.3rem;
+    font-weight: bold;
+    border: none;
+    border-radius: 15px;
+    cursor: pointer;
+    transition: transform 0.2s, box-shadow 0.2s;
+}
+.btn:active { transform: scale(0.95); }
+.btn-approve {
+    background: #4CAF50;
+    color: white;
+    box-shadow: 0 4px 15px rgba(76, 175, 80, 0.4);
+}
+.btn-reject {
+    background: #f44336;
+    color: white;
+    box-shadow: 0 4px 15px rgba(244, 67, 54, 0.4);
+}
+.btn-next {
+    background: #2196F3;
+    color: white;
+    box-shadow: 0 4px 15px rgba(33, 150, 243, 0.4);
+}
+@media (max-width: 768px) {
+    .buttons { 
+        flex-direction: row; 
+        gap: 0.8rem;
+    }
+    .btn { 
+        padding: 1.5rem; 
+        font-size: 1.4rem; 
+    }
+    .info-box {
+        padding: 0.8rem;
+    }
+    .info-box h3 {
+        font-size: 1.2rem;
+    }
+}
+"""
+
+REVIEW_SCRIPT = """
+// Sayfa ayarları (normal kontrol veya recheck) şablondan gelir
+const PAGE = JSON.parse(document.getElementById('page-config').textContent);
+
+let startX = 0, startY = 0, currentX = 0, isDragging = false;
+const threshold = 80;
+
+const imageEl = document.getElementById('rugImage');
+const indicatorLeft = document.getElementById('indicatorLeft');
+const indicatorRight = document.getElementById('indicatorRight');
+
+// Swipe events
+imageEl.addEventListener('touchstart', function(e) {
+    startX = e.touches[0].clientX;
+    startY = e.touches[0].clientY;
+    isDragging = true;
+    console.log('👆 Touch start:', startX, startY);
+}, {passive: false});
+
+imageEl.addEventListener('touchmove', function(e) {
+    if (!isDragging) return;
+    currentX = e.touches[0].clientX;
+    const deltaX = currentX - startX;
+    const deltaY = Math.abs(e.touches[0].clientY - startY);
+
+    if (Math.abs(deltaX) > deltaY && Math.abs(deltaX) > 20) {
+        e.preventDefault();
+        if (deltaX > 0) {
+            indicatorRight.classList.add('active');
             indicatorLeft.classList.remove('active');
+        } else {
+            indicatorLeft.classList.add('active');
             indicatorRight.classList.remove('active');
-            
-            console.log('👋 Touch end, deltaX:', deltaX);
-            
-            if (Math.abs(deltaX) > threshold) {
-                if (deltaX > 0) {
-                    approvePattern();
-                } else {
-                    rejectPattern();
-                }
-            }
-        }, {passive: false});
-        
-        function loadPattern() {
-            fetch('/api/current')
-                .then(r => r.json())
-                .then(data => {
-                    if (data.error) {
-                        document.getElementById('progress').textContent = data.error;
-                        return;
-                    }
-                    document.getElementById('rugImage').src = data.image_url;
-                    document.getElementById('patternText').textContent = '🤖 ' + data.ai_pattern;
-                    document.getElementById('skuText').textContent = `Variant SKU: ${data.variant_sku} | Product SKU: ${data.product_sku}`;
-                    document.getElementById('progress').textContent = `İlerleme: ${data.reviewed}/${data.total} tamamlandı | Kalan: ${data.remaining}`;
-                });
-        }
-        
-        function approvePattern() {
-            fetch('/api/approve', {method: 'POST'})
-                .then(() => loadPattern());
-        }
-        
-        function rejectPattern() {
-            fetch('/api/reject', {method: 'POST'})
-                .then(() => loadPattern());
         }
-        
-        function nextPattern() {
-            fetch('/api/next', {method: 'POST'})
-                .then(() => loadPattern());
+    }
+}, {passive: false});
+
+imageEl.addEventListener('touchend', function(e) {
+    if (!isDragging) return;
+    isDragging = false;
+    const deltaX = currentX - startX;
+
+    indicatorLeft.classList.remove('active');
+    indicatorRight.classList.remove('active');
+
+    console.log('👋 Touch end, deltaX:', deltaX);
+
+    if (Math.abs(deltaX) > threshold) {
+        if (deltaX > 0) {
+            approvePattern();
+        } else {
+            rejectPattern();
         }
-        
-        // Klavye kısayolları - Sağ ok = Onay, Sol ok = Red
-        document.addEventListener('keydown', function(e) {
-            // Sağ ok tuşu = Onay
-            if (e.key === 'ArrowRight' || e.keyCode === 39) {
-                e.preventDefault();
-                console.log('➡️ Sağ ok tuşu - Onay');
-                approvePattern();
+    }
+}, {passive: false});
+
+// Sıradaki kayıtlar önceden alınır ve görselleri arka planda yüklenir
+const BATCH_SIZE = 5;
+const REFILL_THRESHOLD = 2;
+let buffer = [];
+let current = null;
+let lastError = null;
+let fetching = false;
+let refillDelay = 0;  // Yeni kart gelmeyen doldurmalardan sonra artan bekleme (ms)
+const REFILL_MAX_DELAY_MS = 5000;
+const handled = new Set();
+const preloaded = {};
+// Görseller /img proxy'sinden ekran genişliği x piksel yoğunluğuna uygun boyutta istenir
+const IMAGE_WIDTH = Math.round(Math.min(window.innerWidth, 600) * (window.devicePixelRatio || 1));
+
+function imageSrc(item) {
+    if (!item.image_src) return item.image_url;
+    return item.image_src + (item.image_src.includes('?') ? '&' : '?') + 'w=' + IMAGE_WIDTH;
+}
+
+function preloadImage(url) {
+    if (!url || preloaded[url]) return;
+    const img = new Image();
+    img.src = url;
+    preloaded[url] = img;
+}
+
+function showProgress(data) {
+    document.getElementById('progress').textContent = PAGE.recheck
+        ? `Recheck: ${data.rejected_count} reddedilen pattern | Kalan: ${data.remaining}`
+        : `İlerleme: ${data.reviewed}/${data.total} tamamlandı | Kalan: ${data.remaining}`;
+}
+
+function refillBuffer() {
+    if (fetching) return;
+    fetching = true;
+    fetch(PAGE.current_url + '?n=' + BATCH_SIZE)
+        .then(r => r.json())
+        .then(data => {
+            fetching = false;
+            if (data.error) {
+                lastError = data.error;
+                if (!current) document.getElementById('progress').textContent = data.error;
+                if (data.warming_up) setTimeout(refillBuffer, 1000);
+                return;
             }
-            // Sol ok tuşu = Red
-            else if (e.key === 'ArrowLeft' || e.keyCode === 37) {
-                e.preventDefault();
-                console.log('⬅️ Sol ok tuşu - Red');
-                rejectPattern();
+            lastError = null;
+            const queued = new Set(buffer.flatMap(groupSkus));
+            if (current) groupSkus(current).forEach(sku => queued.add(sku));
+            let added = 0;
+            (data.items || [data]).forEach(item => {
+                if (groupSkus(item).some(sku => handled.has(sku) || queued.has(sku))) return;
+                buffer.push(item);
+                preloadImage(imageSrc(item));
+                added++;
+            });
+            showProgress(data);
+            if (added) {
+                refillDelay = 0;
+                if (!current) showNext();
+            } else if (!current) {
+                // Hiç yeni kart yok: hemen tekrar istemek aynı cevabı alır, artan aralıkla dene
+                refillDelay = Math.min(Math.max(refillDelay * 2, 250), REFILL_MAX_DELAY_MS);
+                setTimeout(refillAfterFlush, refillDelay);
+            }
+        })
+        .catch(() => { fetching = false; });
+}
+
+// Kararı henüz gönderilmemiş kartlar sunucuda hâlâ bu kullanıcıya kiralı sayılır ve
+// tekrar döner; yeni kart istenmeden önce bekleyen kararlar gönderilir
+function refillAfterFlush() {
+    if (pendingDecisions.length) {
+        flushDecisions().then(refillBuffer);
+    } else {
+        refillBuffer();
+    }
+}
+
+// Aynı görseli paylaşan varyantlar tek kart olarak gelir, karar hepsine uygulanır
+function groupSkus(item) {
+    return item.group_skus || [item.variant_sku];
+}
+
+function showNext() {
+    current = buffer.shift() || null;
+    if (!current) {
+        if (lastError) document.getElementById('progress').textContent = lastError;
+        refillAfterFlush();
+        return;
+    }
+    document.getElementById('rugImage').src = imageSrc(current);
+    document.getElementById('patternText').textContent = '🤖 ' + current.ai_pattern;
+    const others = groupSkus(current).length - 1;
+    document.getElementById('skuText').textContent = `Variant SKU: ${current.variant_sku}`
+        + (others > 0 ? ` (+${others} varyant)` : '') + ` | Product SKU: ${current.product_sku}`;
+    if (buffer.length <= REFILL_THRESHOLD) refillAfterFlush();
+}
+
+function loadPattern() {
+    if (current) return;
+    refillBuffer();
+}
+
+// Kaydedilemeyen istekler artan aralıklarla tekrar gönderilir; yine olmazsa kartlar kuyruğa geri konur
+const DECISION_RETRIES = 3;
+// Kararlar biriktirilip /api/decisions'a toplu gönderilir (boyut/süre eşiği veya sayfa kapanırken)
+const DECISION_BATCH_SIZE = 10;
+const DECISION_FLUSH_MS = 3000;
+let pendingDecisions = [];
+let flushTimer = null;
+
+function showDecisionError(message) {
+    const el = document.getElementById('decisionError');
+    el.textContent = message || '';
+    el.hidden = !message;
+}
+
+function requeue(items) {
+    items.slice().reverse().forEach(item => {
+        groupSkus(item).forEach(sku => handled.delete(sku));
+        buffer.unshift(item);
+    });
+    if (!current) showNext();
+}
+
+function postWithRetry(url, body, items, attempt) {
+    return fetch(url, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: body
+    })
+        .then(r => {
+            if (!r.ok) throw Object.assign(new Error('HTTP ' + r.status), {status: r.status});
+            showDecisionError(null);
+        })
+        .catch(err => {
+            // 4xx (ör. oturum düştü) tekrar denemeyle düzelmez
+            const retryable = !err.status || err.status >= 500;
+            if (retryable && attempt < DECISION_RETRIES) {
+                showDecisionError(`⚠️ ${items.length} karar kaydedilemedi, tekrar deneniyor...`);
+                return new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt))
+                    .then(() => postWithRetry(url, body, items, attempt + 1));
             }
+            requeue(items);
+            showDecisionError(`⚠️ ${items.length} karar kaydedilemedi, kartlar tekrar gösterilecek`);
         });
+}
+
+function decisionBody(batch) {
+    return JSON.stringify({
+        mode: PAGE.mode,
+        decisions: batch.flatMap(d => groupSkus(d.item).map(sku => ({variant_sku: sku, status: d.status})))
+    });
+}
+
+function flushDecisions() {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    if (!pendingDecisions.length) return Promise.resolve();
+    const batch = pendingDecisions;
+    pendingDecisions = [];
+    return postWithRetry(PAGE.decisions_url, decisionBody(batch), batch.map(d => d.item), 0);
+}
+
+// Sayfa kapanırken / arka plana geçerken bekleyen kararlar sendBeacon ile gönderilir
+function beaconDecisions() {
+    if (!pendingDecisions.length) return;
+    const body = new Blob([decisionBody(pendingDecisions)], {type: 'application/json'});
+    if (navigator.sendBeacon && navigator.sendBeacon(PAGE.decisions_url, body)) {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+        pendingDecisions = [];
+    } else {
+        flushDecisions();
+    }
+}
+
+window.addEventListener('pagehide', beaconDecisions);
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') beaconDecisions();
+});
+
+function decide(status) {
+    if (!current) return;
+    groupSkus(current).forEach(sku => handled.add(sku));
+    pendingDecisions.push({item: current, status: status});
+    if (pendingDecisions.length >= DECISION_BATCH_SIZE) {
+        flushDecisions();
+    } else if (!flushTimer) {
+        flushTimer = setTimeout(flushDecisions, DECISION_FLUSH_MS);
+    }
+    showNext();
+}
+
+function approvePattern() {
+    decide('Approved');
+}
+
+function rejectPattern() {
+    decide('Rejected');
+}
+
+function nextPattern() {
+    if (!current) return;
+    groupSkus(current).forEach(sku => handled.add(sku));
+    const body = JSON.stringify({variant_sku: current.variant_sku, variant_skus: groupSkus(current)});
+    postWithRetry(PAGE.next_url, body, [current], 0);
+    showNext();
+}
+
+// Klavye kısayolları - Sağ ok = Onay, Sol ok = Red
+document.addEventListener('keydown', function(e) {
+    // Sağ ok tuşu = Onay
+    if (e.key === 'ArrowRight' || e.keyCode === 39) {
+        e.preventDefault();
+        console.log('➡️ Sağ ok tuşu - Onay');
+        approvePattern();
+    }
+    // Sol ok tuşu = Red
+    else if (e.key === 'ArrowLeft' || e.keyCode === 37) {
+        e.preventDefault();
+        console.log('⬅️ Sol ok tuşu - Red');
+        rejectPattern();
+    }
+});
+
+// İlk yükleme
+loadPattern();
+"""
+
+# Kontrol ve recheck sayfaları aynı şablonu kullanır, farkları bu ayarlar belirler
+REVIEW_PAGES = {
+    'review': {
+        'recheck': False,
+        'mode': 'review',
+        'current_url': '/api/current',
+        'decisions_url': '/api/decisions',
+        'next_url': '/api/next',
+    },
+    'recheck': {
+        'recheck': True,
+        'mode': 'recheck',
+        'current_url': '/api/recheck/current',
+        'decisions_url': '/api/decisions',
+        'next_url': '/api/recheck/next',
+    },
+}
+
+GRID_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="tr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Pattern Kontrol Sistemi - Grid</title>
+    <link rel="stylesheet" href="{{ asset_url('review.css') }}">
+    <link rel="stylesheet" href="{{ asset_url('grid.css') }}">
+</head>
+<body>
+    <div class="container grid-container">
+        <p style="text-align: center; font-size: 0.75rem; color: #666; margin-bottom: 1rem; padding: 0.5rem; background: #f5f5f5; border-radius: 8px;">
+            <strong>Hatalı olanların seçimini kaldır</strong> | <strong>Enter = Seçilileri onayla ✅</strong>
+        </p>
         
-        // İlk yükleme
-        loadPattern();
-    </script>
+        <div class="info-box grid-header">
+            <h3 id="patternText">🤖 AI Pattern</h3>
+            <select id="patternSelect"></select>
+        </div>
+        
+        <div class="grid" id="grid"></div>
+        
+        <button class="btn btn-approve" id="approveButton" onclick="approveSelected()" style="width: 100%; margin: 1rem 0;">✅ Seçilileri Onayla</button>
+        
+        <div class="progress" id="progress">Yükleniyor...</div>
+        
+        <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid #e0e0e0;">
+            <div>
+                <h2 style="margin: 0; font-size: 1.2rem; color: #333;">🔲 Grid Kontrol</h2>
+            </div>
+            <div style="text-align: right;">
+                <div style="font-size: 0.9rem; color: #666; margin-bottom: 0.3rem;">👤 {{ session.email }}</div>
+                <div>
+                    <a href="/" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">🏠 Ana Sayfa</a>
+                    <a href="/results" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">📊 Sonuçlarım</a>
+                    <a href="/logout" style="color: #f44336; text-decoration: none; font-size: 0.9rem;">Çıkış</a>
+                </div>
+            </div>
+        </div>
+    </div>
+
+    <script id="page-config" type="application/json">{{ {'page_size': page_size}|tojson }}</script>
+    <script src="{{ asset_url('grid.js') }}"></script>
 </body>
 </html>
 """
 
-RECHECK_TEMPLATE = HTML_TEMPLATE.replace(
-    '<h2 style="margin: 0; font-size: 1.2rem; color: #333;">🎨 Pattern Kontrol Sistemi</h2>',
-    '<h2 style="margin: 0; font-size: 1.2rem; color: #333;">🔄 Recheck - Reddedilen Pattern\'ler</h2>'
-).replace(
-    'fetch(\'/api/current\')',
-    'fetch(\'/api/recheck/current\')'
-).replace(
-    'fetch(\'/api/approve\', {method: \'POST\'})',
-    'fetch(\'/api/recheck/approve\', {method: \'POST\'})'
-).replace(
-    'fetch(\'/api/reject\', {method: \'POST\'})',
-    'fetch(\'/api/recheck/reject\', {method: \'POST\'})'
-).replace(
-    'fetch(\'/api/next\', {method: \'POST\'})',
-    'fetch(\'/api/recheck/next\', {method: \'POST\'})'
-).replace(
-    'İlerleme: ${data.reviewed}/${data.total} tamamlandı | Kalan: ${data.remaining}',
-    'Recheck: ${data.rejected_count} reddedilen pattern | Kalan: ${data.remaining}'
-).replace(
-    '<a href="/results" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">📊 Sonuçlarım</a>',
-    '<a href="/" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">🏠 Ana Sayfa</a><a href="/results" style="color: #667eea; text-decoration: none; font-size: 0.9rem; margin-right: 1rem;">📊 Sonuçlarım</a>'
-)
+GRID_CSS = """
+.container.grid-container { max-width: 1100px; }
+.grid-header { display: flex; justify-content: space-between; align-items: center; gap: 1rem; }
+.grid-header h3 { margin: 0; }
+.grid-header select { padding: 0.4rem; border-radius: 8px; border: none; font-size: 0.9rem; max-width: 50%; }
+.grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fill, minmax(160px, 1fr));
+    gap: 0.6rem;
+}
+.tile {
+    position: relative;
+    border: 3px solid #4CAF50;
+    border-radius: 10px;
+    overflow: hidden;
+    cursor: pointer;
+    background: #fafafa;
+}
+.tile img { width: 100%; aspect-ratio: 1; object-fit: contain; display: block; }
+.tile .tile-sku { font-size: 0.7rem; color: #666; padding: 0.2rem 0.4rem; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+.tile .tile-mark { position: absolute; top: 0.3rem; right: 0.4rem; font-size: 1.3rem; }
+.tile.outlier { border-color: #f44336; opacity: 0.45; }
+@media (max-width: 768px) {
+    .grid { grid-template-columns: repeat(auto-fill, minmax(110px, 1fr)); }
+}
+"""
+
+GRID_SCRIPT = """
+// Aynı AI pattern'ine sahip kartlar: hepsi seçili gelir, hatalılar tıklanarak çıkarılır
+const PAGE = JSON.parse(document.getElementById('page-config').textContent);
+const THUMB_WIDTH = 320;
+
+const gridEl = document.getElementById('grid');
+const patternSelect = document.getElementById('patternSelect');
+const approveButton = document.getElementById('approveButton');
+let cards = [];
+let pattern = null;
+let sending = false;
+
+function thumbSrc(item) {
+    if (!item.image_src) return item.image_url;
+    return item.image_src + (item.image_src.includes('?') ? '&' : '?') + 'w=' + THUMB_WIDTH;
+}
+
+function groupSkus(item) {
+    return item.group_skus || [item.variant_sku];
+}
+
+function updateButton() {
+    const selected = cards.filter(card => !card.outlier).reduce((n, card) => n + groupSkus(card).length, 0);
+    approveButton.textContent = `✅ Seçilileri Onayla (${selected})`;
+    approveButton.disabled = sending || cards.length === 0;
+}
+
+function renderGrid(data) {
+    cards = data.items || [];
+    gridEl.innerHTML = '';
+    cards.forEach(card => {
+        const tile = document.createElement('div');
+        tile.className = 'tile';
+        const img = document.createElement('img');
+        img.loading = 'lazy';
+        img.src = thumbSrc(card);
+        img.alt = card.variant_sku;
+        const sku = document.createElement('div');
+        sku.className = 'tile-sku';
+        const others = groupSkus(card).length - 1;
+        sku.textContent = card.variant_sku + (others > 0 ? ` (+${others})` : '');
+        const mark = document.createElement('div');
+        mark.className = 'tile-mark';
+        mark.textContent = '✅';
+        tile.append(img, sku, mark);
+        tile.addEventListener('click', () => {
+            card.outlier = !card.outlier;
+            tile.classList.toggle('outlier', card.outlier);
+            mark.textContent = card.outlier ? '❌' : '✅';
+            updateButton();
+        });
+        gridEl.appendChild(tile);
+    });
+    updateButton();
+}
+
+function showProgress(data) {
+    document.getElementById('progress').textContent = `İlerleme: ${data.reviewed}/${data.total} tamamlandı | Kalan: ${data.remaining}`;
+}
+
+function loadPatterns() {
+    fetch('/api/grid/patterns')
+        .then(r => r.json())
+        .then(data => {
+            patternSelect.innerHTML = '';
+            (data.patterns || []).forEach(p => {
+                const option = document.createElement('option');
+                option.value = p.ai_pattern;
+                option.textContent = `${p.ai_pattern} (${p.remaining})`;
+                patternSelect.appendChild(option);
+            });
+            if (pattern) patternSelect.value = pattern;
+        });
+}
+
+function loadGrid() {
+    const params = new URLSearchParams({n: PAGE.page_size});
+    if (pattern) params.set('pattern', pattern);
+    fetch('/api/grid?' + params)
+        .then(r => r.json())
+        .then(data => {
+            if (data.error) {
+                if (pattern) {
+                    // Bu pattern bitti - listeyi yenile ve sıradaki pattern'e geç
+                    pattern = null;
+                    loadPatterns();
+                    loadGrid();
+                    return;
+                }
+                renderGrid({items: []});
+                document.getElementById('progress').textContent = data.error;
+                return;
+            }
+            pattern = data.ai_pattern;
+            patternSelect.value = pattern;
+            document.getElementById('patternText').textContent = '🤖 ' + pattern;
+            renderGrid(data);
+            showProgress(data);
+        });
+}
+
+function approveSelected() {
+    if (sending || cards.length === 0) return;
+    sending = true;
+    updateButton();
+    const approved = cards.filter(card => !card.outlier).flatMap(groupSkus);
+    const outliers = cards.filter(card => card.outlier).flatMap(groupSkus);
+    fetch('/api/grid/approve', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({variant_skus: approved, outliers: outliers})
+    })
+        .then(r => r.json())
+        .then(data => {
+            sending = false;
+            if (data.error) {
+                document.getElementById('progress').textContent = data.error;
+                updateButton();
+                return;
+            }
+            loadGrid();
+        })
+        .catch(() => { sending = false; updateButton(); });
+}
+
+patternSelect.addEventListener('change', () => {
+    pattern = patternSelect.value;
+    loadGrid();
+});
+
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Enter' && e.target.tagName !== 'SELECT') {
+        e.preventDefault();
+        approveSelected();
+    }
+});
+
+// İlk yükleme
+loadPatterns();
+loadGrid();
+"""
+
+# Sonuç/admin tablolarını JSON API'den sayfa sayfa dolduran ortak script
+PAGINATED_TABLE_SCRIPT = """
+function setupPaginatedTable(tableId, url, columns) {
+    const table = document.getElementById(tableId);
+    const tbody = table.querySelector('tbody');
+    const button = document.createElement('button');
+    button.className = 'btn load-more';
+    button.textContent = 'Daha fazla yükle';
+    button.style.display = 'none';
+    table.insertAdjacentElement('afterend', button);
+    let cursor = null;
+    let loading = false;
+
+    function loadPage() {
+        if (loading) return;
+        loading = true;
+        button.disabled = true;
+        const sep = url.includes('?') ? '&' : '?';
+        fetch(url + sep + 'limit=50' + (cursor ? '&cursor=' + encodeURIComponent(cursor) : ''))
+            .then(r => r.json())
+            .then(data => {
+                (data.items || []).forEach(item => {
+                    const tr = document.createElement('tr');
+                    columns.forEach(col => {
+                        const td = document.createElement('td');
+                        let value = item[col] == null ? '' : String(item[col]);
+                        if (col === 'timestamp') value = value.slice(0, 19);
+                        td.textContent = value;
+                        tr.appendChild(td);
+                    });
+                    tbody.appendChild(tr);
+                });
+                cursor = data.next_cursor;
+                button.style.display = cursor ? 'block' : 'none';
+            })
+            .finally(() => { loading = false; button.disabled = false; });
+    }
+
+    button.addEventListener('click', loadPage);
+    // Tablonun sonuna yaklaşınca bir sonraki sayfayı otomatik yükle
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries[0].isIntersecting && cursor) loadPage();
+        }).observe(button);
+    }
+    loadPage();
+}
+"""
 
 @app.route('/')
 def index():
     if 'email' not in session:
         return redirect(url_for('login'))
-    return render_template_string(HTML_TEMPLATE, session=session)
+    return render_template('review.html', page=REVIEW_PAGES['review'])
 
 @app.route('/recheck')
 def recheck():
     """Reddedilen pattern'leri tekrar kontrol sayfası"""
     if 'email' not in session:
         return redirect(url_for('login'))
-    return render_template_string(RECHECK_TEMPLATE, session=session)
+    return render_template('review.html', page=REVIEW_PAGES['recheck'])
+
+@app.route('/grid')
+def grid():
+    """Aynı AI pattern'ine sahip görselleri toplu kontrol sayfası"""
+    if 'email' not in session:
+        return redirect(url_for('login'))
+    return render_template('grid.html', page_size=GRID_PAGE_SIZE)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -808,10 +2936,10 @@ def login():
         
         # Sadece @boutiquerugs.com uzantılı mailleri kabul et
         if not email.endswith('@boutiquerugs.com'):
-            return render_template_string(LOGIN_TEMPLATE, error='❌ Sadece @boutiquerugs.com uzantılı email adresleri ile giriş yapabilirsiniz.')
+            return render_template('login.html', error='❌ Sadece @boutiquerugs.com uzantılı email adresleri ile giriş yapabilirsiniz.')
         
         if '@' not in email or len(email) < 15:  # @boutiquerugs.com = 15 karakter
-            return render_template_string(LOGIN_TEMPLATE, error='❌ Lütfen geçerli bir email adresi girin.')
+            return render_template('login.html', error='❌ Lütfen geçerli bir email adresi girin.')
         
         # Giriş başarılı
         session['email'] = email
@@ -820,246 +2948,377 @@ def login():
     # GET request - login sayfasını göster
     if 'email' in session:
         return redirect(url_for('index'))
-    return render_template_string(LOGIN_TEMPLATE)
+    return render_template('login.html')
 
 @app.route('/logout')
 def logout():
-    session.pop('email', None)
+    email = session.pop('email', None)
+    if email:
+        review_leases.release_all(email)
+        recheck_leases.release_all(email)
     return redirect(url_for('login'))
 
-@app.route('/results')
-def results():
-    """Kullanıcının kendi sonuçlarını göster"""
-    auth_error = require_auth()
-    if auth_error:
-        return redirect(url_for('login'))
-    
-    user_email = session.get('email', '')
-    
-    # Veritabanından kullanıcının kayıtlarını çek
-    approved_data = []
-    rejected_data = []
-    
-    if USE_DATABASE:
-        try:
-            db_session = SessionLocal()
-            user_reviews = db_session.query(PatternReview).filter_by(reviewed_by=user_email).all()
-            db_session.close()
-            
-            for review in user_reviews:
-                item = {
-                    'Variant SKU': review.variant_sku,
-                    'Product SKU': review.product_sku,
-                    'AI Detected Pattern': review.ai_pattern,
-                    'Status': review.status,
-                    'Timestamp': review.timestamp.isoformat() if review.timestamp else ''
-                }
-                if review.status == 'Approved':
-                    approved_data.append(item)
-                else:
-                    rejected_data.append(item)
-        except Exception as e:
-            print(f"Veritabanı okuma hatası: {e}")
-    else:
-        # Fallback: CSV'den oku
-        approved_file = DATA_DIR / "approved_patterns.csv"
-        rejected_file = DATA_DIR / "rejected_patterns.csv"
-        
-        if approved_file.exists():
-            try:
-                approved_df = pd.read_csv(approved_file)
-                if 'Reviewed By' in approved_df.columns:
-                    user_approved = approved_df[approved_df['Reviewed By'] == user_email]
-                    approved_data = user_approved.to_dict('records')
-            except:
-                pass
-        
-        if rejected_file.exists():
-            try:
-                rejected_df = pd.read_csv(rejected_file)
-                if 'Reviewed By' in rejected_df.columns:
-                    user_rejected = rejected_df[rejected_df['Reviewed By'] == user_email]
-                    rejected_data = user_rejected.to_dict('records')
-            except:
-                pass
-    
-    results_html = f"""
-    <!DOCTYPE html>
-    <html lang="tr">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Sonuçlarım - Pattern Kontrol Sistemi</title>
-        <style>
-            * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 1rem;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 20px;
-                padding: 2rem;
-                box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-            }}
-            h1 {{ color: #333; margin-bottom: 1rem; }}
-            .header {{
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                margin-bottom: 2rem;
-            }}
-            .btn {{
-                padding: 0.8rem 1.5rem;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                text-decoration: none;
-                font-weight: bold;
-                cursor: pointer;
-            }}
-            .stats {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 1rem;
-                margin-bottom: 2rem;
-            }}
-            .stat-card {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 1.5rem;
-                border-radius: 15px;
-                text-align: center;
-            }}
-            .stat-card h3 {{
-                font-size: 2rem;
-                margin-bottom: 0.5rem;
-            }}
-            .stat-card p {{
-                opacity: 0.9;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 1rem;
-            }}
-            th, td {{
-                padding: 0.8rem;
-                text-align: left;
-                border-bottom: 1px solid #e0e0e0;
-            }}
-            th {{
-                background: #f5f5f5;
-                font-weight: bold;
-            }}
-            tr:hover {{
-                background: #f9f9f9;
-            }}
-            .section {{
-                margin-bottom: 3rem;
-            }}
-            .section h2 {{
-                color: #333;
-                margin-bottom: 1rem;
-                padding-bottom: 0.5rem;
-                border-bottom: 2px solid #667eea;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>📊 Sonuçlarım</h1>
-                <div>
-                    <a href="/" class="btn">← Ana Sayfa</a>
-                    <a href="/admin/all" class="btn" style="background: #4CAF50; margin-left: 0.5rem;">📊 Tüm Kayıtlar</a>
-                    <a href="/logout" class="btn" style="background: #f44336; margin-left: 0.5rem;">Çıkış</a>
-                </div>
+RESULTS_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="tr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Sonuçlarım - Pattern Kontrol Sistemi</title>
+    <link rel="stylesheet" href="{{ asset_url('results.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 Sonuçlarım</h1>
+            <div>
+                <a href="/" class="btn">← Ana Sayfa</a>
+                <a href="/admin/all" class="btn" style="background: #4CAF50; margin-left: 0.5rem;">📊 Tüm Kayıtlar</a>
+                <a href="/logout" class="btn" style="background: #f44336; margin-left: 0.5rem;">Çıkış</a>
             </div>
-            
-            <div class="stats">
-                <div class="stat-card">
-                    <h3>{len(approved_data)}</h3>
-                    <p>✅ Onaylanan</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);">
-                    <h3>{len(rejected_data)}</h3>
-                    <p>❌ Reddedilen</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);">
-                    <h3>{len(approved_data) + len(rejected_data)}</h3>
-                    <p>📝 Toplam</p>
-                </div>
+        </div>
+
+        <div class="stats">
+            <div class="stat-card">
+                <h3>{{ counts['Approved'] }}</h3>
+                <p>✅ Onaylanan</p>
             </div>
-            
-            <div class="section">
-                <h2>✅ Onaylanan Pattern'ler ({len(approved_data)})</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Variant SKU</th>
-                            <th>Product SKU</th>
-                            <th>AI Pattern</th>
-                            <th>Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    for item in approved_data:
-        results_html += f"""
-                        <tr>
-                            <td>{item.get('Variant SKU', '')}</td>
-                            <td>{item.get('Product SKU', '')}</td>
-                            <td>{item.get('AI Detected Pattern', '')}</td>
-                            <td>{item.get('Timestamp', '')[:19] if item.get('Timestamp') else ''}</td>
-                        </tr>
-        """
+            <div class="stat-card" style="background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);">
+                <h3>{{ counts['Rejected'] }}</h3>
+                <p>❌ Reddedilen</p>
+            </div>
+            <div class="stat-card" style="background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);">
+                <h3>{{ counts['Approved'] + counts['Rejected'] }}</h3>
+                <p>📝 Toplam</p>
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>✅ Onaylanan Pattern'ler ({{ counts['Approved'] }})</h2>
+            <table id="approvedTable">
+                <thead>
+                    <tr>
+                        <th>Variant SKU</th>
+                        <th>Product SKU</th>
+                        <th>AI Pattern</th>
+                        <th>Tarih</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+
+        <div class="section">
+            <h2>❌ Reddedilen Pattern'ler ({{ counts['Rejected'] }})</h2>
+            <table id="rejectedTable">
+                <thead>
+                    <tr>
+                        <th>Variant SKU</th>
+                        <th>Product SKU</th>
+                        <th>AI Pattern</th>
+                        <th>Tarih</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+    </div>
+    <script src="{{ asset_url('tables.js') }}"></script>
+    <script>
+        const resultColumns = ['variant_sku', 'product_sku', 'ai_pattern', 'timestamp'];
+        setupPaginatedTable('approvedTable', '/api/results?status=Approved', resultColumns);
+        setupPaginatedTable('rejectedTable', '/api/results?status=Rejected', resultColumns);
+    </script>
+</body>
+</html>
+"""
+
+RESULTS_CSS = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    padding: 1rem;
+}
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 20px;
+    padding: 2rem;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+}
+h1 { color: #333; margin-bottom: 1rem; }
+.header {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 2rem;
+}
+.btn {
+    padding: 0.8rem 1.5rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: none;
+    border-radius: 10px;
+    text-decoration: none;
+    font-weight: bold;
+    cursor: pointer;
+}
+.stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 1rem;
+    margin-bottom: 2rem;
+}
+.stat-card {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 1.5rem;
+    border-radius: 15px;
+    text-align: center;
+}
+.stat-card h3 {
+    font-size: 2rem;
+    margin-bottom: 0.5rem;
+}
+.stat-card p {
+    opacity: 0.9;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-top: 1rem;
+}
+th, td {
+    padding: 0.8rem;
+    text-align: left;
+    border-bottom: 1px solid #e0e0e0;
+}
+th {
+    background: #f5f5f5;
+    font-weight: bold;
+}
+tr:hover {
+    background: #f9f9f9;
+}
+.load-more {
+    display: block;
+    margin: 1rem auto 0;
+}
+.section {
+    margin-bottom: 3rem;
+}
+.section h2 {
+    color: #333;
+    margin-bottom: 1rem;
+    padding-bottom: 0.5rem;
+    border-bottom: 2px solid #667eea;
+}
+"""
+
+@app.route('/results')
+def results():
+    """Kullanıcının kendi sonuçlarını göster"""
+    auth_error = require_auth()
+    if auth_error:
+        return redirect(url_for('login'))
     
-    results_html += """
-                    </tbody>
-                </table>
-            </div>
-            
-            <div class="section">
-                <h2>❌ Reddedilen Pattern'ler (""" + str(len(rejected_data)) + """)</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Variant SKU</th>
-                            <th>Product SKU</th>
-                            <th>AI Pattern</th>
-                            <th>Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
+    user_email = session.get('email', '')
     
-    for item in rejected_data:
-        results_html += f"""
-                        <tr>
-                            <td>{item.get('Variant SKU', '')}</td>
-                            <td>{item.get('Product SKU', '')}</td>
-                            <td>{item.get('AI Detected Pattern', '')}</td>
-                            <td>{item.get('Timestamp', '')[:19] if item.get('Timestamp') else ''}</td>
-                        </tr>
-        """
+    # Sadece sayılar çekilir, tablo satırları /api/results'tan sayfa sayfa gelir
+    counts = {'Approved': 0, 'Rejected': 0}
     
-    results_html += """
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    try:
+        with db_session_scope() as db_session:
+            rows = db_session.execute(
+                select(PatternReview.status, func.count())
+                .where(PatternReview.reviewed_by == user_email)
+                .group_by(PatternReview.status)
+            ).all()
+        for status, count in rows:
+            counts[status] = counts.get(status, 0) + count
+    except Exception as e:
+        logger.error(f"Veritabanı okuma hatası: {e}")
     
-    return results_html
+    return render_template('results.html', counts=counts)
+
+def collect_metric_snapshots():
+    """Bu worker'ın güncel metrikleri + (çoklu worker'da) diğer canlı worker'ların son yazdıkları"""
+    snapshots = [metrics.snapshot()]
+    if METRICS_MULTIPROCESS and METRICS_DIR.exists():
+        for path in METRICS_DIR.glob('*.json'):
+            pid = path.stem
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            if not _process_alive(int(pid)):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                pass
+    return snapshots
+
+def count_active_reviewers():
+    if review_leases.store is not None:
+        # Paylaşılan kiralarda tüm worker'ların kullanıcıları veritabanından sayılır
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        leases = ReviewLease.__table__
+        with db_session_scope() as db_session:
+            return db_session.execute(
+                select(func.count(func.distinct(leases.c.reviewer))).where(leases.c.expires_at > now)
+            ).scalar()
+    return len(review_leases.active_reviewers() | recheck_leases.active_reviewers())
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+def render_metrics(snapshots):
+    """Snapshot'ları birleştirip Prometheus metin formatında döndür"""
+    counters, histograms, decision_seconds, process_gauges = {}, {}, {}, {}
+    in_flight = 0
+    for snap in snapshots:
+        for name, labels, value in snap['counters']:
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in snap['histograms']:
+            key = (name, tuple(tuple(label) for label in labels))
+            merged = histograms.setdefault(key, [0] * len(hist))
+            for i, value in enumerate(hist):
+                merged[i] += value
+        in_flight += snap['in_flight']
+        for second, count in snap['decision_seconds']:
+            decision_seconds[int(second)] = decision_seconds.get(int(second), 0) + count
+        for name, value in snap.get('gauges', {}).items():
+            process_gauges[name] = process_gauges.get(name, 0) + value
+
+    now = int(time.time())
+    gauges = {
+        **process_gauges,
+        'http_requests_in_flight': in_flight,
+        'review_decisions_per_minute': sum(count for second, count in decision_seconds.items() if second > now - 60),
+        'review_pending_queue_depth': len(pending_queue),
+        'review_recheck_queue_depth': len(recheck_queue),
+    }
+    try:
+        gauges['review_active_reviewers'] = count_active_reviewers()
+    except Exception as e:
+        logger.warning(f"Aktif kullanıcı sayısı alınamadı: {e}")
+
+    lines = []
+    for name, (metric_type, help_text) in METRIC_HELP.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == 'gauge':
+            if name in gauges:
+                lines.append(f"{name} {gauges[name]}")
+        elif metric_type == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        else:
+            buckets = METRIC_BUCKETS[name]
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, hist):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+    return '\n'.join(lines) + '\n'
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+    metrics.add_in_flight(1)
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        # Route şablonu kullanılır (/img/<variant_sku>), ham path etiket sayısını patlatır
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = (('route', route), ('method', request.method))
+        metrics.observe('http_request_duration_seconds', labels, time.perf_counter() - started, HTTP_LATENCY_BUCKETS)
+        metrics.observe('db_queries_per_request', (('route', route),), g.get('db_queries', 0), DB_QUERIES_BUCKETS)
+        metrics.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+        metrics.add_in_flight(-1)
+        check_n_plus_one()
+        # Tarayıcı geliştirici araçlarında istek başına veritabanı süresi/sorgu sayısı görünsün
+        response.headers['Server-Timing'] = f'db;dur={g.db_seconds * 1000:.1f};desc="{g.db_queries} queries"'
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # after_request çalışmadıysa (yakalanmamış hata) in-flight sayacı yine de düşsün
+    if g.pop('metrics_started', None) is not None:
+        metrics.add_in_flight(-1)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(collect_metric_snapshots()), mimetype='text/plain; version=0.0.4')
+
+WARMUP_PATH_PREFIXES = ('/api/', '/img/', '/download/')  # Kuyruklar/veritabanı hazır olmadan çalışamayan yollar
+
+@app.before_request
+def wait_for_warmup():
+    """Warm-up bitmediyse kısa süre bekle, hâlâ bitmediyse 503 döndür (istemci tekrar dener)"""
+    if warmup_done.is_set() or not request.path.startswith(WARMUP_PATH_PREFIXES):
+        return None
+    if warmup_done.wait(WARMUP_WAIT_SECONDS):
+        return None
+    response = jsonify({'error': '⏳ Sistem hazırlanıyor, lütfen bekleyin...', 'warming_up': True})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+def _timed_check(check):
+    started = time.perf_counter()
+    try:
+        check()
+        ok, error = True, None
+    except Exception as e:
+        ok, error = False, str(e)
+    result = {'ok': ok, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+    if error:
+        result['error'] = error
+    return result
+
+def _check_database():
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+
+@app.route('/ready')
+def ready():
+    """Hazır olma durumu: warm-up ilerlemesi ve bağımlılık gecikmeleri (health check için)"""
+    dependencies = {
+        'patterns_file': _timed_check(PATTERNS_FILE.stat),
+        'database': _timed_check(_check_database),
+    }
+    is_ready = warmup_done.is_set()
+    response = jsonify({
+        'ready': is_ready,
+        'status': warmup_state['status'],
+        'steps': warmup_state['steps'],
+        'error': warmup_state['error'],
+        'dependencies': dependencies,
+    })
+    response.status_code = 200 if is_ready else 503
+    return response
 
 def require_auth():
     """Authentication kontrolü"""
@@ -1072,10 +3331,12 @@ def api_current():
     auth_error = require_auth()
     if auth_error:
         return auth_error
-    pattern = get_current_pattern()
+    pattern = get_current_pattern(get_batch_size())
     if pattern is None:
         return jsonify({'error': '🎉 Tüm pattern\'ler kontrol edildi!'})
-    return jsonify(pattern)
+    return jsonify(with_image_src(pattern))
+
+DECISION_SAVE_ERROR = 'Karar kaydedilemedi, lütfen tekrar deneyin'
 
 @app.route('/api/approve', methods=['POST'])
 def api_approve():
@@ -1083,13 +3344,13 @@ def api_approve():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    pattern = get_current_pattern()
-    if pattern:
-        save_review(pattern['variant_sku'], pattern['product_sku'], 
-                   pattern['ai_pattern'], pattern['image_url'], approved=True)
-        # Kullanıcı bazlı index'i artır
-        current_index = session.get(f'current_index_{user_email}', 0)
-        session[f'current_index_{user_email}'] = current_index + 1
+    items = get_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        if not save_review(items, approved=True):
+            # Kira bırakılmaz: istemci aynı kararı tekrar gönderebilir
+            return jsonify({'error': DECISION_SAVE_ERROR}), 500
+        for item in items:
+            review_leases.release(user_email, item['variant_sku'])
     return jsonify({'success': True})
 
 @app.route('/api/reject', methods=['POST'])
@@ -1098,13 +3359,13 @@ def api_reject():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    pattern = get_current_pattern()
-    if pattern:
-        save_review(pattern['variant_sku'], pattern['product_sku'], 
-                   pattern['ai_pattern'], pattern['image_url'], approved=False)
-        # Kullanıcı bazlı index'i artır
-        current_index = session.get(f'current_index_{user_email}', 0)
-        session[f'current_index_{user_email}'] = current_index + 1
+    items = get_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        if not save_review(items, approved=False):
+            # Kira bırakılmaz: istemci aynı kararı tekrar gönderebilir
+            return jsonify({'error': DECISION_SAVE_ERROR}), 500
+        for item in items:
+            review_leases.release(user_email, item['variant_sku'])
     return jsonify({'success': True})
 
 @app.route('/api/next', methods=['POST'])
@@ -1113,21 +3374,125 @@ def api_next():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    # Kullanıcı bazlı index'i artır
-    current_index = session.get(f'current_index_{user_email}', 0)
-    session[f'current_index_{user_email}'] = current_index + 1
+    items = get_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        review_leases.skip(user_email, *(item['variant_sku'] for item in items))
     return jsonify({'success': True})
 
+@app.route('/api/decisions', methods=['POST'])
+def api_decisions():
+    """Toplu karar kaydı: {"mode": "review"|"recheck", "decisions": [{"variant_sku": ..., "status": "Approved"|"Rejected"}]}"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    user_email = session.get('email', 'unknown')
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'review')
+    decisions = data.get('decisions')
+    if mode not in ('review', 'recheck') or not isinstance(decisions, list):
+        return jsonify({'error': 'Invalid request'}), 400
+    if len(decisions) > MAX_DECISIONS_PER_REQUEST:
+        return jsonify({'error': f'En fazla {MAX_DECISIONS_PER_REQUEST} karar gönderilebilir'}), 400
+    
+    queue, leases = (pending_queue, review_leases) if mode == 'review' else (recheck_queue, recheck_leases)
+    accepted = {}  # variant_sku -> (item, status); item doğrulama sırasında bir kez alınır
+    skipped = []
+    for decision in decisions:
+        if not isinstance(decision, dict):
+            skipped.append(None)
+            continue
+        sku = str(decision.get('variant_sku', ''))
+        status = decision.get('status')
+        # Kontrol ile kayıt arasında başka bir thread SKU'yu kuyruktan çıkarabilir; get() None döner
+        item = queue.get(sku) if status in REVIEW_STATUSES else None
+        if item is None or leases.holder(sku) not in (None, user_email):
+            skipped.append(sku)
+            continue
+        accepted[sku] = (item, status)
+    
+    try:
+        if mode == 'review':
+            save_reviews(list(accepted.values()), user_email)
+        else:
+            save_recheck_reviews({sku: status for sku, (_, status) in accepted.items()}, user_email)
+        for sku in accepted:
+            leases.release(user_email, sku)
+    except Exception as e:
+        logger.error(f"Toplu kayıt hatası: {e}")
+        return jsonify({'error': DECISION_SAVE_ERROR}), 500
+    
+    return jsonify({'success': True, 'saved': len(accepted), 'skipped': skipped})
+
+@app.route('/api/grid')
+def api_grid():
+    """Grid sayfası: ?pattern=... (verilmezse kuyruktaki ilk boşta kaydın pattern'i) ve ?n=..."""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    page = get_grid_page(request.args.get('pattern'), get_grid_size())
+    if page is None:
+        return jsonify({'error': '🎉 Bu pattern için kontrol bekleyen kayıt kalmadı!'})
+    return jsonify(with_image_src(page))
+
+@app.route('/api/grid/patterns')
+def api_grid_patterns():
+    """Kontrol bekleyen kayıt sayısına göre AI pattern'leri (grid'deki seçim listesi)"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    if patterns_info is None:
+        load_patterns(rebuild_queue=False)
+        load_reviewed_skus()
+    counts = pending_queue.pattern_counts()
+    return jsonify({'patterns': [{'ai_pattern': pattern, 'remaining': count} for pattern, count in counts.most_common()]})
+
+@app.route('/api/grid/approve', methods=['POST'])
+def api_grid_approve():
+    """Grid kararı: {"variant_skus": [onaylananlar], "outliers": [seçimi kaldırılanlar]}
+
+    Onaylananlar tek toplu kayıtla yazılır; outlier'lar onaylanmaz, kira bırakılır
+    ve tek tek kontrol edilmek üzere bu kullanıcının grid sayfalarına tekrar gelmez.
+    """
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    user_email = session.get('email', 'unknown')
+    data = request.get_json(silent=True) or {}
+    approved = data.get('variant_skus')
+    outliers = data.get('outliers', [])
+    if not isinstance(approved, list) or not isinstance(outliers, list):
+        return jsonify({'error': 'Invalid request'}), 400
+    if len(approved) + len(outliers) > MAX_DECISIONS_PER_REQUEST:
+        return jsonify({'error': f'En fazla {MAX_DECISIONS_PER_REQUEST} karar gönderilebilir'}), 400
+    
+    def leased(skus):
+        return [str(sku) for sku in skus if sku in pending_queue and review_leases.holder(sku) in (None, user_email)]
+    
+    # Item'lar bir kez alınır: kontrol ile kayıt arasında kuyruktan çıkan SKU toplu kaydı bozmasın
+    accepted = [item for item in map(pending_queue.get, leased(approved)) if item is not None]
+    try:
+        save_reviews([(item, 'Approved') for item in accepted], user_email)
+        for item in accepted:
+            review_leases.release(user_email, item['variant_sku'])
+    except Exception as e:
+        logger.exception(f"Grid kayıt hatası: {e}")
+        return jsonify({'error': DECISION_SAVE_ERROR}), 500
+    skipped = leased(outliers)
+    if skipped:
+        review_leases.skip(user_email, *skipped)
+    
+    return jsonify({'success': True, 'saved': len(accepted), 'outliers': len(skipped)})
+
 # Recheck API routes
 @app.route('/api/recheck/current')
 def api_recheck_current():
     auth_error = require_auth()
     if auth_error:
         return auth_error
-    pattern = get_current_recheck_pattern()
+    pattern = get_current_recheck_pattern(get_batch_size())
     if pattern is None:
         return jsonify({'error': '🎉 Tüm reddedilen pattern\'ler tekrar kontrol edildi!'})
-    return jsonify(pattern)
+    return jsonify(with_image_src(pattern))
 
 @app.route('/api/recheck/approve', methods=['POST'])
 def api_recheck_approve():
@@ -1135,15 +3500,13 @@ def api_recheck_approve():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    pattern = get_current_recheck_pattern()
-    if pattern:
-        save_recheck_review(pattern['variant_sku'], pattern['product_sku'], 
-                           pattern['ai_pattern'], pattern['image_url'], approved=True)
-        # Kullanıcı bazlı index'i artır
-        current_index = session.get(f'recheck_index_{user_email}', 0)
-        session[f'recheck_index_{user_email}'] = current_index + 1
-        # reviewed_skus'a ekle (artık tekrar gösterilmesin)
-        reviewed_skus.add(str(pattern['variant_sku']))
+    items = get_recheck_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        if not save_recheck_review(items, approved=True):
+            # Kira bırakılmaz: istemci aynı kararı tekrar gönderebilir
+            return jsonify({'error': DECISION_SAVE_ERROR}), 500
+        for item in items:
+            recheck_leases.release(user_email, item['variant_sku'])
     return jsonify({'success': True})
 
 @app.route('/api/recheck/reject', methods=['POST'])
@@ -1152,15 +3515,13 @@ def api_recheck_reject():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    pattern = get_current_recheck_pattern()
-    if pattern:
-        save_recheck_review(pattern['variant_sku'], pattern['product_sku'], 
-                           pattern['ai_pattern'], pattern['image_url'], approved=False)
-        # Kullanıcı bazlı index'i artır
-        current_index = session.get(f'recheck_index_{user_email}', 0)
-        session[f'recheck_index_{user_email}'] = current_index + 1
-        # reviewed_skus'a ekle (artık tekrar gösterilmesin)
-        reviewed_skus.add(str(pattern['variant_sku']))
+    items = get_recheck_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        if not save_recheck_review(items, approved=False):
+            # Kira bırakılmaz: istemci aynı kararı tekrar gönderebilir
+            return jsonify({'error': DECISION_SAVE_ERROR}), 500
+        for item in items:
+            recheck_leases.release(user_email, item['variant_sku'])
     return jsonify({'success': True})
 
 @app.route('/api/recheck/next', methods=['POST'])
@@ -1169,481 +3530,750 @@ def api_recheck_next():
     if auth_error:
         return auth_error
     user_email = session.get('email', 'unknown')
-    # Kullanıcı bazlı index'i artır
-    current_index = session.get(f'recheck_index_{user_email}', 0)
-    session[f'recheck_index_{user_email}'] = current_index + 1
+    items = get_recheck_patterns_for_decision(get_requested_sku(), get_requested_group())
+    if items:
+        recheck_leases.skip(user_email, *(item['variant_sku'] for item in items))
     return jsonify({'success': True})
 
-@app.route('/admin/all')
-def admin_all():
-    """Tüm kayıtları görüntüleme sayfası (tüm kullanıcılar)"""
-    if 'email' not in session:
-        return redirect(url_for('login'))
-    
-    # Veritabanından tüm kayıtları çek
-    approved_data = []
-    rejected_data = []
-    recheck_data = []
+# Sayfalama (keyset: timestamp DESC, variant_sku DESC)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+REVIEW_COLUMNS = ('variant_sku', 'product_sku', 'ai_pattern', 'reviewed_by', 'status', 'timestamp')
+RECHECK_COLUMNS = ('variant_sku', 'product_sku', 'ai_pattern', 'original_status', 'recheck_status', 'reviewed_by', 'timestamp')
+
+def encode_cursor(timestamp, variant_sku):
+    """Son satırın (timestamp, variant_sku) anahtarını URL-safe cursor'a çevir"""
+    raw = json.dumps([timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp), str(variant_sku)])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Cursor'ı (timestamp_iso, variant_sku) olarak çöz - geçersizse ValueError"""
+    try:
+        timestamp, variant_sku = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        datetime.fromisoformat(timestamp)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return timestamp, variant_sku
+
+def get_page_limit():
+    """İstekteki ?limit= parametresini güvenli aralığa çek"""
+    try:
+        limit = int(request.args.get('limit', PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+def _serialize_row(row):
+    item = dict(row)
+    if isinstance(item.get('timestamp'), datetime):
+        item['timestamp'] = item['timestamp'].isoformat()
+    return item
+
+def paginate_decisions(model, columns, filters, cursor, limit):
+    """Keyset sayfalama ile bir sayfa kayıt döndür: (items, next_cursor)"""
+    query = select(*[getattr(model, col) for col in columns]).where(*filters)
+    if cursor:
+        timestamp, variant_sku = decode_cursor(cursor)
+        query = query.where(
+            tuple_(model.timestamp, model.variant_sku) < tuple_(literal(datetime.fromisoformat(timestamp), DateTime), literal(variant_sku, String))
+        )
+    query = query.order_by(model.timestamp.desc(), model.variant_sku.desc()).limit(limit + 1)
+    with db_session_scope() as db_session:
+        rows = db_session.execute(query).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]['timestamp'], rows[-1]['variant_sku']) if has_more else None
+    return [_serialize_row(row) for row in rows], next_cursor
+
+def decisions_page_response(status=None, reviewed_by=None, recheck=False):
+    """Sonuç/admin listeleri için ortak JSON sayfa cevabı"""
+    status = status or request.args.get('status')
+    if status is not None and status not in REVIEW_STATUSES:
+        return jsonify({'error': 'Invalid status'}), 400
+    cursor = request.args.get('cursor')
+    limit = get_page_limit()
+    try:
+        if recheck:
+            items, next_cursor = paginate_decisions(PatternRecheck, RECHECK_COLUMNS, [], cursor, limit)
+        else:
+            filters = []
+            if status:
+                filters.append(PatternReview.status == status)
+            if reviewed_by:
+                filters.append(PatternReview.reviewed_by == reviewed_by)
+            items, next_cursor = paginate_decisions(PatternReview, REVIEW_COLUMNS, filters, cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+@app.route('/api/results')
+def api_results():
+    """Kullanıcının kendi kararları (sayfalı): ?status=Approved|Rejected&cursor=...&limit=..."""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    return decisions_page_response(reviewed_by=session.get('email', ''))
+
+@app.route('/api/admin/reviews')
+def api_admin_reviews():
+    """Tüm kullanıcıların kararları (sayfalı)"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    return decisions_page_response()
+
+@app.route('/api/admin/rechecks')
+def api_admin_rechecks():
+    """Tüm recheck kayıtları (sayfalı)"""
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    return decisions_page_response(recheck=True)
+
+def load_review_stats():
+    """Kullanıcı bazlı onay/red/recheck sayılarını GROUP BY ile veritabanında hesapla
+
+    Döner: ({email: {'approved', 'rejected', 'recheck'}}, {'approved', 'rejected', 'recheck'})
+    """
     user_stats = {}
+    totals = {'approved': 0, 'rejected': 0, 'recheck': 0}
+    with db_session_scope() as db_session:
+        review_counts = db_session.execute(
+            select(PatternReview.reviewed_by, PatternReview.status, func.count())
+            .group_by(PatternReview.reviewed_by, PatternReview.status)
+        ).all()
+        recheck_counts = db_session.execute(
+            select(PatternRecheck.reviewed_by, func.count())
+            .group_by(PatternRecheck.reviewed_by)
+        ).all()
     
-    if USE_DATABASE:
-        try:
-            db_session = SessionLocal()
-            all_reviews = db_session.query(PatternReview).all()
-            all_rechecks = db_session.query(PatternRecheck).all()
-            db_session.close()
-            
-            for review in all_reviews:
-                item = {
-                    'Variant SKU': review.variant_sku,
-                    'Product SKU': review.product_sku,
-                    'AI Detected Pattern': review.ai_pattern,
-                    'Reviewed By': review.reviewed_by,
-                    'Status': review.status,
-                    'Timestamp': review.timestamp.isoformat() if review.timestamp else ''
-                }
-                
-                if review.status == 'Approved':
-                    approved_data.append(item)
-                else:
-                    rejected_data.append(item)
-                
-                # İstatistikler
-                email = review.reviewed_by
-                if email not in user_stats:
-                    user_stats[email] = {'approved': 0, 'rejected': 0, 'recheck': 0}
-                if review.status == 'Approved':
-                    user_stats[email]['approved'] += 1
-                else:
-                    user_stats[email]['rejected'] += 1
-            
-            # Recheck kayıtlarını ekle
-            for recheck in all_rechecks:
-                item = {
-                    'Variant SKU': recheck.variant_sku,
-                    'Product SKU': recheck.product_sku,
-                    'AI Detected Pattern': recheck.ai_pattern,
-                    'Original Status': recheck.original_status,
-                    'Recheck Status': recheck.recheck_status,
-                    'Reviewed By': recheck.reviewed_by,
-                    'Timestamp': recheck.timestamp.isoformat() if recheck.timestamp else ''
-                }
-                recheck_data.append(item)
-                
-                # İstatistikler
-                email = recheck.reviewed_by
-                if email not in user_stats:
-                    user_stats[email] = {'approved': 0, 'rejected': 0, 'recheck': 0}
-                user_stats[email]['recheck'] = user_stats[email].get('recheck', 0) + 1
-        except Exception as e:
-            print(f"Veritabanı okuma hatası: {e}")
-    else:
-        # Fallback: CSV'den oku
-        approved_file = DATA_DIR / "approved_patterns.csv"
-        rejected_file = DATA_DIR / "rejected_patterns.csv"
-        
-        if approved_file.exists():
-            try:
-                df_approved = pd.read_csv(approved_file, encoding='utf-8-sig', on_bad_lines='skip')
-                approved_data = df_approved.to_dict('records')
-            except Exception as e:
-                print(f"Approved CSV okuma hatası: {e}")
-        
-        if rejected_file.exists():
-            try:
-                df_rejected = pd.read_csv(rejected_file, encoding='utf-8-sig', on_bad_lines='skip')
-                rejected_data = df_rejected.to_dict('records')
-            except Exception as e:
-                print(f"Rejected CSV okuma hatası: {e}")
-        
-        # Kullanıcı bazlı istatistikler
-        for item in approved_data + rejected_data:
-            email = item.get('Reviewed By', 'unknown')
-            if email not in user_stats:
-                user_stats[email] = {'approved': 0, 'rejected': 0}
-            if item.get('Status') == 'Approved':
-                user_stats[email]['approved'] += 1
-            else:
-                user_stats[email]['rejected'] += 1
-    
-    admin_html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>📊 Tüm Kayıtlar - Admin</title>
-        <style>
-            body {{
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                margin: 0;
-                padding: 1rem;
-            }}
-            .container {{
-                max-width: 1400px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 20px;
-                padding: 2rem;
-                box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-            }}
-            .header {{
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                margin-bottom: 2rem;
-                flex-wrap: wrap;
-                gap: 1rem;
-            }}
-            h1 {{ color: #333; margin: 0; }}
-            .btn {{
-                padding: 0.8rem 1.5rem;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                text-decoration: none;
-                font-weight: bold;
-                cursor: pointer;
-                display: inline-block;
-            }}
-            .btn-danger {{
-                background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);
-            }}
-            .stats {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 1rem;
-                margin-bottom: 2rem;
-            }}
-            .stat-card {{
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                padding: 1.5rem;
-                border-radius: 15px;
-                text-align: center;
-            }}
-            .stat-card h3 {{
-                font-size: 2.5rem;
-                margin: 0;
-            }}
-            .stat-card p {{
-                margin: 0.5rem 0 0 0;
-                font-size: 1.1rem;
-            }}
-            .user-stats {{
-                background: #f5f5f5;
-                padding: 1.5rem;
-                border-radius: 15px;
-                margin-bottom: 2rem;
-            }}
-            .user-stats h2 {{
-                margin-top: 0;
-                color: #333;
-            }}
-            .user-item {{
-                display: flex;
-                justify-content: space-between;
-                padding: 0.8rem;
-                margin: 0.5rem 0;
-                background: white;
-                border-radius: 10px;
-                border-left: 4px solid #667eea;
-            }}
-            .section {{
-                margin-bottom: 3rem;
-            }}
-            .section h2 {{
-                color: #333;
-                margin-bottom: 1rem;
-                padding-bottom: 0.5rem;
-                border-bottom: 2px solid #667eea;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 1rem;
-            }}
-            th, td {{
-                padding: 1rem;
-                text-align: left;
-                border-bottom: 1px solid #e0e0e0;
-            }}
-            th {{
-                background: #f5f5f5;
-                font-weight: bold;
-                color: #333;
-            }}
-            tr:hover {{
-                background: #f9f9f9;
-            }}
-            .download-btn {{
-                background: #4CAF50;
-                margin-left: 0.5rem;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>📊 Tüm Kayıtlar (Admin)</h1>
-                <div>
-                    <a href="/" class="btn">← Ana Sayfa</a>
-                    <a href="/results" class="btn">📊 Sonuçlarım</a>
-                    <a href="/logout" class="btn btn-danger">Çıkış</a>
-                </div>
+    for email, status, count in review_counts:
+        key = 'approved' if status == 'Approved' else 'rejected'
+        user_stats.setdefault(email, {'approved': 0, 'rejected': 0, 'recheck': 0})[key] += count
+        totals[key] += count
+    for email, count in recheck_counts:
+        user_stats.setdefault(email, {'approved': 0, 'rejected': 0, 'recheck': 0})['recheck'] += count
+        totals['recheck'] += count
+    return user_stats, totals
+
+ADMIN_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>📊 Tüm Kayıtlar - Admin</title>
+    <link rel="stylesheet" href="{{ asset_url('admin.css') }}">
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 Tüm Kayıtlar (Admin)</h1>
+            <div>
+                <a href="/" class="btn">← Ana Sayfa</a>
+                <a href="/results" class="btn">📊 Sonuçlarım</a>
+                <a href="/logout" class="btn btn-danger">Çıkış</a>
             </div>
-            
-            <div class="stats">
-                <div class="stat-card">
-                    <h3>{len(approved_data)}</h3>
-                    <p>✅ Toplam Onaylanan</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);">
-                    <h3>{len(rejected_data)}</h3>
-                    <p>❌ Toplam Reddedilen</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);">
-                    <h3>{len(approved_data) + len(rejected_data)}</h3>
-                    <p>📝 Toplam Kayıt</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #4CAF50 0%, #388E3C 100%);">
-                    <h3>{len(user_stats)}</h3>
-                    <p>👥 Kullanıcı Sayısı</p>
-                </div>
-                <div class="stat-card" style="background: linear-gradient(135deg, #ff9800 0%, #f57c00 100%);">
-                    <h3>{len(recheck_data)}</h3>
-                    <p>🔄 Recheck Kayıtları</p>
-                </div>
+        </div>
+
+        <div class="stats">
+            <div class="stat-card">
+                <h3>{{ totals['approved'] }}</h3>
+                <p>✅ Toplam Onaylanan</p>
             </div>
-            
-            <div class="user-stats">
-                <h2>👥 Kullanıcı İstatistikleri</h2>
-    """
-    
-    for email, stats in sorted(user_stats.items(), key=lambda x: x[1]['approved'] + x[1]['rejected'] + x[1].get('recheck', 0), reverse=True):
-        recheck_count = stats.get('recheck', 0)
-        admin_html += f"""
-                <div class="user-item">
-                    <div>
-                        <strong>{email}</strong>
-                        <div style="font-size: 0.9rem; color: #666; margin-top: 0.3rem;">
-                            ✅ {stats['approved']} Onay | ❌ {stats['rejected']} Red | 🔄 {recheck_count} Recheck | 📝 {stats['approved'] + stats['rejected']} Toplam
-                        </div>
+            <div class="stat-card" style="background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);">
+                <h3>{{ totals['rejected'] }}</h3>
+                <p>❌ Toplam Reddedilen</p>
+            </div>
+            <div class="stat-card" style="background: linear-gradient(135deg, #2196F3 0%, #1976D2 100%);">
+                <h3>{{ totals['approved'] + totals['rejected'] }}</h3>
+                <p>📝 Toplam Kayıt</p>
+            </div>
+            <div class="stat-card" style="background: linear-gradient(135deg, #4CAF50 0%, #388E3C 100%);">
+                <h3>{{ user_stats|length }}</h3>
+                <p>👥 Kullanıcı Sayısı</p>
+            </div>
+            <div class="stat-card" style="background: linear-gradient(135deg, #ff9800 0%, #f57c00 100%);">
+                <h3>{{ totals['recheck'] }}</h3>
+                <p>🔄 Recheck Kayıtları</p>
+            </div>
+        </div>
+
+        <div class="user-stats">
+            <h2>👥 Kullanıcı İstatistikleri</h2>
+            {% for email, stats in user_stats %}
+            <div class="user-item">
+                <div>
+                    <strong>{{ email }}</strong>
+                    <div style="font-size: 0.9rem; color: #666; margin-top: 0.3rem;">
+                        ✅ {{ stats['approved'] }} Onay | ❌ {{ stats['rejected'] }} Red | 🔄 {{ stats.get('recheck', 0) }} Recheck | 📝 {{ stats['approved'] + stats['rejected'] }} Toplam
                     </div>
                 </div>
-        """
-    
-    admin_html += """
-            </div>
-            
-            <div class="section">
-                <h2>✅ Tüm Onaylanan Pattern'ler (""" + str(len(approved_data)) + """) 
-                    <a href="/download/approved" class="btn download-btn">📥 CSV İndir</a>
-                </h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Variant SKU</th>
-                            <th>Product SKU</th>
-                            <th>AI Pattern</th>
-                            <th>Reviewed By</th>
-                            <th>Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    for item in approved_data:
-        admin_html += f"""
-                        <tr>
-                            <td>{item.get('Variant SKU', '')}</td>
-                            <td>{item.get('Product SKU', '')}</td>
-                            <td>{item.get('AI Detected Pattern', '')}</td>
-                            <td>{item.get('Reviewed By', '')}</td>
-                            <td>{item.get('Timestamp', '')[:19] if item.get('Timestamp') else ''}</td>
-                        </tr>
-        """
-    
-    admin_html += """
-                    </tbody>
-                </table>
             </div>
-            
-            <div class="section">
-                <h2>❌ Tüm Reddedilen Pattern'ler (""" + str(len(rejected_data)) + """) 
-                    <a href="/download/rejected" class="btn download-btn">📥 CSV İndir</a>
-                </h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Variant SKU</th>
-                            <th>Product SKU</th>
-                            <th>AI Pattern</th>
-                            <th>Reviewed By</th>
-                            <th>Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    for item in rejected_data:
-        admin_html += f"""
-                        <tr>
-                            <td>{item.get('Variant SKU', '')}</td>
-                            <td>{item.get('Product SKU', '')}</td>
-                            <td>{item.get('AI Detected Pattern', '')}</td>
-                            <td>{item.get('Reviewed By', '')}</td>
-                            <td>{item.get('Timestamp', '')[:19] if item.get('Timestamp') else ''}</td>
-                        </tr>
-        """
+            {% endfor %}
+        </div>
+
+        <div class="section">
+            <h2>✅ Tüm Onaylanan Pattern'ler ({{ totals['approved'] }}) 
+                <a href="/download/approved" class="btn download-btn">📥 CSV İndir</a>
+            </h2>
+            <table id="approvedTable">
+                <thead>
+                    <tr>
+                        <th>Variant SKU</th>
+                        <th>Product SKU</th>
+                        <th>AI Pattern</th>
+                        <th>Reviewed By</th>
+                        <th>Tarih</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+
+        <div class="section">
+            <h2>❌ Tüm Reddedilen Pattern'ler ({{ totals['rejected'] }}) 
+                <a href="/download/rejected" class="btn download-btn">📥 CSV İndir</a>
+            </h2>
+            <table id="rejectedTable">
+                <thead>
+                    <tr>
+                        <th>Variant SKU</th>
+                        <th>Product SKU</th>
+                        <th>AI Pattern</th>
+                        <th>Reviewed By</th>
+                        <th>Tarih</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+
+        <div class="section">
+            <h2>🔄 Recheck Kayıtları ({{ totals['recheck'] }}) 
+                <a href="/download/recheck" class="btn download-btn">📥 CSV İndir</a>
+            </h2>
+            <table id="recheckTable">
+                <thead>
+                    <tr>
+                        <th>Variant SKU</th>
+                        <th>Product SKU</th>
+                        <th>AI Pattern</th>
+                        <th>İlk Durum</th>
+                        <th>Recheck Durum</th>
+                        <th>Reviewed By</th>
+                        <th>Tarih</th>
+                    </tr>
+                </thead>
+                <tbody></tbody>
+            </table>
+        </div>
+    </div>
+    <script src="{{ asset_url('tables.js') }}"></script>
+    <script>
+        const reviewColumns = ['variant_sku', 'product_sku', 'ai_pattern', 'reviewed_by', 'timestamp'];
+        setupPaginatedTable('approvedTable', '/api/admin/reviews?status=Approved', reviewColumns);
+        setupPaginatedTable('rejectedTable', '/api/admin/reviews?status=Rejected', reviewColumns);
+        setupPaginatedTable('recheckTable', '/api/admin/rechecks',
+            ['variant_sku', 'product_sku', 'ai_pattern', 'original_status', 'recheck_status', 'reviewed_by', 'timestamp']);
+    </script>
+</body>
+</html>
+"""
+
+ADMIN_CSS = """
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    margin: 0;
+    padding: 1rem;
+}
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    background: white;
+    border-radius: 20px;
+    padding: 2rem;
+    box-shadow: 0 10px 40px rgba(0,0,0,0.2);
+}
+.header {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin-bottom: 2rem;
+    flex-wrap: wrap;
+    gap: 1rem;
+}
+h1 { color: #333; margin: 0; }
+.btn {
+    padding: 0.8rem 1.5rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border: none;
+    border-radius: 10px;
+    text-decoration: none;
+    font-weight: bold;
+    cursor: pointer;
+    display: inline-block;
+}
+.btn-danger {
+    background: linear-gradient(135deg, #f44336 0%, #d32f2f 100%);
+}
+.stats {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+    gap: 1rem;
+    margin-bottom: 2rem;
+}
+.stat-card {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 1.5rem;
+    border-radius: 15px;
+    text-align: center;
+}
+.stat-card h3 {
+    font-size: 2.5rem;
+    margin: 0;
+}
+.stat-card p {
+    margin: 0.5rem 0 0 0;
+    font-size: 1.1rem;
+}
+.user-stats {
+    background: #f5f5f5;
+    padding: 1.5rem;
+    border-radius: 15px;
+    margin-bottom: 2rem;
+}
+.user-stats h2 {
+    margin-top: 0;
+    color: #333;
+}
+.user-item {
+    display: flex;
+    justify-content: space-between;
+    padding: 0.8rem;
+    margin: 0.5rem 0;
+    background: white;
+    border-radius: 10px;
+    border-left: 4px solid #667eea;
+}
+.section {
+    margin-bottom: 3rem;
+}
+.section h2 {
+    color: #333;
+    margin-bottom: 1rem;
+    padding-bottom: 0.5rem;
+    border-bottom: 2px solid #667eea;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin-top: 1rem;
+}
+th, td {
+    padding: 1rem;
+    text-align: left;
+    border-bottom: 1px solid #e0e0e0;
+}
+th {
+    background: #f5f5f5;
+    font-weight: bold;
+    color: #333;
+}
+tr:hover {
+    background: #f9f9f9;
+}
+.load-more {
+    display: block;
+    margin: 1rem auto 0;
+}
+.download-btn {
+    background: #4CAF50;
+    margin-left: 0.5rem;
+}
+"""
+
+@app.route('/admin/all')
+def admin_all():
+    """Tüm kayıtları görüntüleme sayfası (tüm kullanıcılar)"""
+    if 'email' not in session:
+        return redirect(url_for('login'))
     
-    admin_html += """
-                    </tbody>
-                </table>
-            </div>
-            
-            <div class="section">
-                <h2>🔄 Recheck Kayıtları (""" + str(len(recheck_data)) + """) 
-                    <a href="/download/recheck" class="btn download-btn">📥 CSV İndir</a>
-                </h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Variant SKU</th>
-                            <th>Product SKU</th>
-                            <th>AI Pattern</th>
-                            <th>İlk Durum</th>
-                            <th>Recheck Durum</th>
-                            <th>Reviewed By</th>
-                            <th>Tarih</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
+    # Sadece istatistikler çekilir, tablo satırları /api/admin/* üzerinden sayfa sayfa gelir
+    user_stats = {}
+    totals = {'approved': 0, 'rejected': 0, 'recheck': 0}
     
-    for item in recheck_data:
-        admin_html += f"""
-                        <tr>
-                            <td>{item.get('Variant SKU', '')}</td>
-                            <td>{item.get('Product SKU', '')}</td>
-                            <td>{item.get('AI Detected Pattern', '')}</td>
-                            <td>{item.get('Original Status', '')}</td>
-                            <td>{item.get('Recheck Status', '')}</td>
-                            <td>{item.get('Reviewed By', '')}</td>
-                            <td>{item.get('Timestamp', '')[:19] if item.get('Timestamp') else ''}</td>
-                        </tr>
-        """
+    try:
+        # İstatistikler veritabanında hesaplanır (GROUP BY)
+        user_stats, totals = load_review_stats()
+    except Exception as e:
+        logger.error(f"Veritabanı okuma hatası: {e}")
     
-    admin_html += """
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
+    # Kullanıcılar toplam karar sayısına göre sıralanır
+    user_stats = sorted(user_stats.items(), key=lambda x: x[1]['approved'] + x[1]['rejected'] + x[1].get('recheck', 0), reverse=True)
+    return render_template('admin.html', user_stats=user_stats, totals=totals)
+
+# CSV export ayarları - satırlar sunucu tarafı cursor ile parça parça akıtılır
+EXPORT_BATCH_SIZE = 1000  # Veritabanından tek seferde çekilen satır sayısı
+EXPORT_CHUNK_BYTES = 64 * 1024  # İstemciye gönderilen parça boyutu
+EXPORTS = {
+    'approved': ('approved_patterns.csv', PatternReview, PatternReview.status == 'Approved',
+                 ['Variant SKU', 'Product SKU', 'AI Detected Pattern', 'Design Image URL', 'Status', 'Reviewed By', 'Timestamp'],
+                 ['variant_sku', 'product_sku', 'ai_pattern', 'image_url', 'status', 'reviewed_by', 'timestamp']),
+    'rejected': ('rejected_patterns.csv', PatternReview, PatternReview.status == 'Rejected',
+                 ['Variant SKU', 'Product SKU', 'AI Detected Pattern', 'Design Image URL', 'Status', 'Reviewed By', 'Timestamp'],
+                 ['variant_sku', 'product_sku', 'ai_pattern', 'image_url', 'status', 'reviewed_by', 'timestamp']),
+    'recheck': ('recheck_patterns.csv', PatternRecheck, None,
+                ['Variant SKU', 'Product SKU', 'AI Detected Pattern', 'Design Image URL', 'Original Status', 'Recheck Status', 'Reviewed By', 'Timestamp'],
+                ['variant_sku', 'product_sku', 'ai_pattern', 'image_url', 'original_status', 'recheck_status', 'reviewed_by', 'timestamp']),
+}
+
+def _gzip_stream(chunks):
+    """Byte parçalarını akış halinde gzip'le"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _export_rows(model, condition, columns):
+    """Satırları sunucu tarafı cursor (yield_per) ile çek - bellekte tüm tablo tutulmaz
+
+    Akış istek bittikten sonra da sürdüğü için kendi bağlantısını kullanır (istek session'ını değil).
     """
-    
-    return admin_html
+    query = select(*[getattr(model, col) for col in columns])
+    if condition is not None:
+        query = query.where(condition)
+    with db_session_scope() as db_session:
+        result = db_session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            yield [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+def _csv_chunks(header, rows):
+    """CSV satırlarını ~EXPORT_CHUNK_BYTES'lık UTF-8 parçalar halinde üret (BOM ile, Excel için)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def _download_response(chunks, filename, use_gzip):
+    if use_gzip:
+        chunks = _gzip_stream(chunks)
+        filename += '.gz'
+    return Response(
+        chunks,
+        mimetype='application/gzip' if use_gzip else 'text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @app.route('/download/<file_type>')
 def download_csv(file_type):
-    """CSV dosyalarını indirme endpoint'i (veritabanından)"""
+    """CSV dosyalarını indirme endpoint'i (veritabanından, akış halinde). ?gzip=1 ile sıkıştırılmış indirir"""
     if 'email' not in session:
         return redirect(url_for('login'))
     
+    use_gzip = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
     try:
-        if USE_DATABASE:
-            db_session = SessionLocal()
-            if file_type == 'approved':
-                reviews = db_session.query(PatternReview).filter_by(status='Approved').all()
-                filename = 'approved_patterns.csv'
-            elif file_type == 'rejected':
-                reviews = db_session.query(PatternReview).filter_by(status='Rejected').all()
-                filename = 'rejected_patterns.csv'
-            elif file_type == 'recheck':
-                rechecks = db_session.query(PatternRecheck).all()
-                filename = 'recheck_patterns.csv'
-                # Recheck için özel format
-                data = []
-                for recheck in rechecks:
-                    data.append({
-                        'Variant SKU': recheck.variant_sku,
-                        'Product SKU': recheck.product_sku,
-                        'AI Detected Pattern': recheck.ai_pattern,
-                        'Design Image URL': recheck.image_url,
-                        'Original Status': recheck.original_status,
-                        'Recheck Status': recheck.recheck_status,
-                        'Reviewed By': recheck.reviewed_by,
-                        'Timestamp': recheck.timestamp.isoformat() if recheck.timestamp else ''
-                    })
-                df = pd.DataFrame(data)
-                output = io.StringIO()
-                df.to_csv(output, index=False, encoding='utf-8-sig')
-                output.seek(0)
-                return send_file(
-                    io.BytesIO(output.getvalue().encode('utf-8-sig')),
-                    mimetype='text/csv',
-                    as_attachment=True,
-                    download_name=filename
-                )
+        if file_type not in EXPORTS:
+            return jsonify({'error': 'Invalid file type'}), 400
+        filename, model, condition, header, columns = EXPORTS[file_type]
+        return _download_response(_csv_chunks(header, _export_rows(model, condition, columns)), filename, use_gzip)
+    except Exception as e:
+        logger.error(f"CSV indirme hatası: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Şablonlar bir kez derlenir (Jinja cache'i); CSS/JS içerik hash'li adreslerden
+# uzun süreli cache ile sunulur, içerik değişince adres de değişir
+TEMPLATES = {
+    'login.html': LOGIN_TEMPLATE,
+    'review.html': HTML_TEMPLATE,
+    'grid.html': GRID_TEMPLATE,
+    'results.html': RESULTS_TEMPLATE,
+    'admin.html': ADMIN_TEMPLATE,
+}
+STATIC_SOURCES = {
+    'login.css': LOGIN_CSS,
+    'review.css': REVIEW_CSS,
+    'review.js': REVIEW_SCRIPT,
+    'grid.css': GRID_CSS,
+    'grid.js': GRID_SCRIPT,
+    'tables.js': PAGINATED_TABLE_SCRIPT,
+    'results.css': RESULTS_CSS,
+    'admin.css': ADMIN_CSS,
+}
+STATIC_MIMETYPES = {'css': 'text/css', 'js': 'text/javascript'}
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+def build_static_assets(sources):
+    """Her dosya için içerik hash'li ad üret, gzip'li halini önceden hazırla"""
+    assets, urls = {}, {}
+    for name, content in sources.items():
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = name.rsplit('.', 1)
+        filename = f"{stem}.{digest}.{ext}"
+        assets[filename] = {
+            'data': data,
+            'gzip': gzip.compress(data, 9, mtime=0),
+            'mimetype': STATIC_MIMETYPES[ext],
+            'etag': digest,
+        }
+        urls[name] = f"/assets/{filename}"
+    return assets, urls
+
+STATIC_ASSETS, STATIC_URLS = build_static_assets(STATIC_SOURCES)
+
+@app.template_global()
+def asset_url(name):
+    return STATIC_URLS[name]
+
+@app.route('/assets/<filename>')
+def static_asset(filename):
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return jsonify({'error': 'Dosya bulunamadı'}), 404
+    use_gzip = 'gzip' in request.accept_encodings
+    response = Response(asset['gzip'] if use_gzip else asset['data'], mimetype=asset['mimetype'])
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(asset['etag'] + ('-gz' if use_gzip else ''))
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_MAX_AGE
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
+
+app.jinja_loader = DictLoader(TEMPLATES)
+for template_name in TEMPLATES:
+    app.jinja_env.get_template(template_name)  # İlk istekte derleme maliyeti olmasın
+
+# Görsel proxy: S3'teki tam çözünürlüklü görseller bir kez indirilir, cihaza uygun
+# boyutta WebP/JPEG varyantları üretilip diskte (boyut sınırlı LRU) saklanır
+IMAGE_CACHE_DIR = Path(os.environ.get('IMAGE_CACHE_DIR', DATA_DIR / "image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(float(os.environ.get('IMAGE_CACHE_MAX_MB', 500)) * 1024 * 1024)
+IMAGE_WIDTHS = (320, 480, 640, 800, 1080, 1440)  # İzin verilen genişlikler (cache'i sınırlı tutar)
+IMAGE_DEFAULT_WIDTH = 800
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 80))
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', 10))  # İndirme için toplam süre sınırı
+IMAGE_MAX_SOURCE_BYTES = int(float(os.environ.get('IMAGE_MAX_SOURCE_MB', 20)) * 1024 * 1024)
+IMAGE_MAX_CONCURRENT = int(os.environ.get('IMAGE_MAX_CONCURRENT', 4))  # Worker başına aynı anda indirilen/işlenen görsel
+IMAGE_MAX_AGE = 24 * 3600  # ?v= olmadan istenen görseller için
+IMAGE_IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # ?v= (görsel URL'inin hash'i) ile istenenler asla değişmez
+
+class ImageDiskCache:
+    """Dosya tabanlı, toplam boyutu sınırlı LRU cache.
+
+    Her erişimde dosyanın mtime'ı güncellenir; sınır aşılınca dizin taranıp en
+    eski dosyalar silinir. Dizin taraması mtime'a dayandığı için aynı dizini
+    kullanan tüm worker'lar ortak bir LRU sırası görür.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # Yaklaşık toplam boyut (ilk kullanımda hesaplanır)
+
+    def path(self, key):
+        return self.directory / key
+
+    def get(self, key):
+        """Dosya varsa yolunu döndür ve LRU sırasında öne al"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, data):
+        """Veriyi atomik olarak yaz, gerekirse eski dosyaları sil"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        tmp_path = path.with_name(f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
             else:
-                return jsonify({'error': 'Invalid file type'}), 400
-            
-            db_session.close()
-            
-            # DataFrame oluştur
-            data = []
-            for review in reviews:
-                data.append({
-                    'Variant SKU': review.variant_sku,
-                    'Product SKU': review.product_sku,
-                    'AI Detected Pattern': review.ai_pattern,
-                    'Design Image URL': review.image_url,
-                    'Status': review.status,
-                    'Reviewed By': review.reviewed_by,
-                    'Timestamp': review.timestamp.isoformat() if review.timestamp else ''
-                })
-            
-            df = pd.DataFrame(data)
-            
-            # CSV'yi memory'de oluştur
-            output = io.StringIO()
-            df.to_csv(output, index=False, encoding='utf-8-sig')
-            output.seek(0)
-            
-            return send_file(
-                io.BytesIO(output.getvalue().encode('utf-8-sig')),
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=filename
-            )
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict(keep=str(path))
+        return path
+
+    def _scan(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, keep=None):
+        """En eski dosyaları sınırın %90'ına inene kadar sil - az önce yazılan (keep) hariç (self._lock altında)"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+image_cache = ImageDiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+# Varyant ve orijinal kilitleri ayrı havuzlardadır ve hep bu sırayla alınır (varyant -> orijinal):
+# aynı şeride düşen iki anahtar thread'i kendi kendine kilitleyemez
+_image_variant_locks = [threading.Lock() for _ in range(64)]
+_image_original_locks = [threading.Lock() for _ in range(64)]
+# İndirme/küçültme request thread'lerinde yapılır; hepsini meşgul etmesin diye sınırlı
+_image_work_slots = threading.BoundedSemaphore(IMAGE_MAX_CONCURRENT)
+
+@contextmanager
+def _image_key_lock(locks, key):
+    """Aynı görsel için eş zamanlı istekler orijinali/varyantı bir kez indirsin/işlesin
+
+    Kilit IMAGE_FETCH_TIMEOUT içinde alınamazsa TimeoutError (proxy orijinale yönlendirir).
+    """
+    lock = locks[hash(key) % len(locks)]
+    if not lock.acquire(timeout=IMAGE_FETCH_TIMEOUT):
+        raise TimeoutError(f"Görsel kilidi alınamadı: {key}")
+    try:
+        yield
+    finally:
+        lock.release()
+
+def image_version(image_url):
+    return hashlib.sha1(str(image_url).encode('utf-8')).hexdigest()[:12]
+
+def image_proxy_url(item):
+    """Item'ın görseli için /img adresi (görsel URL'i değişirse adres de değişir)"""
+    return url_for('image_proxy', variant_sku=item['variant_sku'], v=image_version(item['image_url']))
+
+def with_image_src(pattern):
+    """API yanıtındaki item'lara proxy görsel adresini (image_src) ekle"""
+    pattern = dict(pattern)
+    if 'variant_sku' in pattern:
+        pattern['image_src'] = image_proxy_url(pattern)
+    if 'items' in pattern:
+        pattern['items'] = [dict(item, image_src=image_proxy_url(item)) for item in pattern['items']]
+    return pattern
+
+def get_image_width():
+    """İstenen genişliği izin verilen en yakın (büyük) genişliğe yuvarla"""
+    try:
+        width = int(request.args.get('w', IMAGE_DEFAULT_WIDTH))
+    except ValueError:
+        width = IMAGE_DEFAULT_WIDTH
+    return next((w for w in IMAGE_WIDTHS if w >= width), IMAGE_WIDTHS[-1])
+
+def load_original_image(image_url):
+    """Orijinal görseli cache'ten veya kaynaktan (bir kez) getir"""
+    import requests
+    key = f"orig-{image_version(image_url)}"
+    path = image_cache.get(key)
+    if path is None:
+        with _image_key_lock(_image_original_locks, key):
+            path = image_cache.get(key)
+            if path is None:
+                path = image_cache.put(key, fetch_image(requests, image_url))
+    return path.read_bytes()
+
+def fetch_image(requests, image_url):
+    """Kaynağı IMAGE_FETCH_TIMEOUT süre ve IMAGE_MAX_SOURCE_BYTES boyut sınırıyla indir"""
+    deadline = time.monotonic() + IMAGE_FETCH_TIMEOUT
+    with requests.get(image_url, timeout=IMAGE_FETCH_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        if int(response.headers.get('Content-Length') or 0) > IMAGE_MAX_SOURCE_BYTES:
+            raise ValueError(f"Görsel çok büyük: {response.headers['Content-Length']} byte")
+        data = bytearray()
+        for chunk in response.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > IMAGE_MAX_SOURCE_BYTES:
+                raise ValueError(f"Görsel {IMAGE_MAX_SOURCE_BYTES} byte sınırını aşıyor")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Görsel {IMAGE_FETCH_TIMEOUT} sn içinde indirilemedi")
+    return bytes(data)
+
+def render_image_variant(original, width, fmt):
+    """Görseli width x width kutusuna sığacak şekilde küçült ve WebP/JPEG olarak kodla"""
+    from PIL import Image, ImageOps
+    with Image.open(io.BytesIO(original)) as img:
+        img.draft('RGB', (width, width))  # JPEG'ler hedef boyuta yakın çözünürlükte decode edilir
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGB')
+        img.thumbnail((width, width), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == 'webp':
+            img.save(out, 'WEBP', quality=IMAGE_QUALITY, method=4)
         else:
-            # Fallback: CSV dosyasından
-            if file_type == 'approved':
-                file_path = DATA_DIR / "approved_patterns.csv"
-                filename = 'approved_patterns.csv'
-            elif file_type == 'rejected':
-                file_path = DATA_DIR / "rejected_patterns.csv"
-                filename = 'rejected_patterns.csv'
-            else:
-                return jsonify({'error': 'Invalid file type'}), 400
-            
-            if not file_path.exists():
-                return jsonify({'error': 'File not found'}), 404
-            
-            return send_file(
-                str(file_path),
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=filename
-            )
+            img.save(out, 'JPEG', quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+@app.route('/img/<variant_sku>')
+def image_proxy(variant_sku):
+    auth_error = require_auth()
+    if auth_error:
+        return auth_error
+    item = pattern_items.get(variant_sku)
+    if item is None or not isinstance(item['image_url'], str) or not item['image_url']:
+        return jsonify({'error': 'Görsel bulunamadı'}), 404
+    
+    width = get_image_width()
+    fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'jpeg'
+    version = image_version(item['image_url'])
+    key = f"{version}-{width}.{fmt}"
+    try:
+        path = image_cache.get(key)
+        if path is None:
+            with _image_key_lock(_image_variant_locks, key):
+                path = image_cache.get(key)
+                if path is None:
+                    if not _image_work_slots.acquire(timeout=IMAGE_FETCH_TIMEOUT):
+                        raise TimeoutError("Görsel işleme kapasitesi dolu")
+                    try:
+                        variant = render_image_variant(load_original_image(item['image_url']), width, fmt)
+                    finally:
+                        _image_work_slots.release()
+                    path = image_cache.put(key, variant)
+        # Başka bir worker dosyayı silebilir, içerik şimdi okunur (varyantlar küçük)
+        data = path.read_bytes()
     except Exception as e:
-        print(f"CSV indirme hatası: {e}")
-        return jsonify({'error': str(e)}), 500
+        # Pillow yoksa veya kaynak işlenemiyorsa orijinal görsele yönlendir
+        logger.warning(f"Görsel proxy hatası ({variant_sku}): {e}")
+        return redirect(item['image_url'])
+    
+    immutable = request.args.get('v') == version
+    response = send_file(io.BytesIO(data), mimetype=f'image/{fmt}', etag=key, conditional=True,
+                         max_age=IMAGE_IMMUTABLE_MAX_AGE if immutable else IMAGE_MAX_AGE)
+    response.cache_control.private = True  # Giriş gerektirir, paylaşılan cache'lerde tutulmaz
+    if immutable:
+        response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
 
 if __name__ == '__main__':
-    import os
+    import signal
+    # SIGTERM'de atexit çalışsın (write-behind journal'ı kapanışta boşaltılır)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,60 @@
+"""
+Gunicorn ayarları - production'da çoklu worker ile çalıştırma
+
+Çalıştırma: gunicorn -c gunicorn.conf.py app_flask:app
+
+Uygulama kodu master process'te bir kez yüklenir (preload_app). Varsayılan
+WARMUP_MODE=background ile port hemen açılır ve her worker fork'tan sonra
+kontrol listesini/kararları arka planda yükler (durum: /ready). Migration'lar
+worker'lar fork edilmeden master'da bir kez çalışır. WARMUP_MODE=sync
+verilirse yükleme master'da yapılır ve worker'lar bu durumu copy-on-write
+paylaşır (daha az bellek, ama port yükleme bitince açılır). Arka plan
+thread'leri (senkronizasyon, write-behind) her worker'da fork'tan sonra başlar.
+"""
+import gc
+import multiprocessing
+import os
+
+# Worker sayısı uygulama import edilmeden önce belli olmalı (paylaşılan kiralar buna bakar)
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Thread'ler master'da değil, post_fork'ta worker'larda başlatılsın
+os.environ.setdefault('DEFER_BACKGROUND_WORKERS', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# Uzun süre çalışan worker'larda bellek birikmesin diye periyodik yenileme
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+
+def when_ready(server):
+    import app_flask
+    # Migration'lar worker'lar fork edilmeden master'da bir kez çalışır; worker'lar
+    # advisory lock için yarışıp CREATE INDEX CONCURRENTLY'yi kilitlemesin
+    app_flask.migrate_before_fork()
+    app_flask.engine.dispose()
+    # Preload sonrası nesneleri GC'den çıkar: worker'larda refcount/GC sayfaları kopyalamasın
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app_flask
+    # Master'dan kalan bağlantılar worker'lar arasında paylaşılmasın
+    app_flask.engine.dispose(close=False)
+    app_flask.start_background_workers()
+
+
+def worker_exit(server, worker):
+    import app_flask
+    # Kapanışta journal'daki kararları veritabanına yaz
+    if app_flask.decision_journal is not None:
+        app_flask.decision_journal.stop()
+    app_flask.review_change_feed.stop()